@@ -1,6 +1,7 @@
 # app/main.py - Intelligence Platform FastAPI Application
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import uvicorn
 
@@ -10,6 +11,10 @@ from app.api.v1 import ai_routes
 from app.routes import admin_users
 from app.routes import companies  # 🆕 Added companies import
 from app.services.web_scraping import api_routes_working
+from app.modules.rag_engine.vectorization_worker import get_vectorization_worker
+from app.modules.rag_engine.health_prober import stop_rag_health_prober
+from app.services.web_scraping.shared_resources import close_shared_resources
+from app.services.web_scraping.metrics import scraping_metrics
 
 # Database
 from app.database import create_tables
@@ -23,6 +28,9 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("🛑 Shutting down Intelligence Platform API...")
+    await stop_rag_health_prober()
+    await get_vectorization_worker().stop()
+    await close_shared_resources()
 
 # FastAPI app
 app = FastAPI(
@@ -68,5 +76,13 @@ async def root():
 async def health():
     return {"status": "healthy", "version": "5.0"}
 
+# Metriche di scraping per dominio (formato Prometheus)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        scraping_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
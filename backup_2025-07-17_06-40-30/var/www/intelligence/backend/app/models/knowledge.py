@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Boolean, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 #from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -21,6 +21,7 @@ class KnowledgeDocument(Base):
     processed = Column(Boolean, default=False)
     processing_status = Column(String, default="pending")
     meta_data = Column(JSON, default=dict)
+    chunks_count = Column(Integer, nullable=False, default=0)  # Pre-aggregato, vedi kb_counters
     
     # Relationship
 #    chunks = relationship("DocumentChunk", back_populates="document")
@@ -34,7 +35,8 @@ class DocumentChunk(Base):
     content = Column(Text, nullable=False)
     page_number = Column(Integer, nullable=True)
     chunk_tokens = Column(Integer, nullable=True)
-    embedding_vector = Column(JSON, nullable=True)
+    embedding_vector = Column(JSON, nullable=True)  # Legacy: sostituito da embedding_blob
+    embedding_blob = Column(LargeBinary, nullable=True)  # float16/int8, vedi rag_engine.vector_codec
     created_at = Column(DateTime, default=func.now())
     
     # Relationship
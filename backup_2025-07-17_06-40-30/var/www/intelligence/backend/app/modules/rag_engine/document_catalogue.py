@@ -0,0 +1,352 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .kb_counters import SCRAPED_DOCUMENTS, TOTAL_DOCUMENTS, bump_counters, read_counters
+
+logger = logging.getLogger(__name__)
+
+class DocumentCatalogue:
+    """
+    Catalogo documenti caricati, servito da knowledge_documents
+
+    - Paginazione keyset (cursor opaco) invece di OFFSET
+    - Ordinamento per data, nome o dimensione
+    - Filtri su formato, azienda e intervallo date
+    - Riconciliazione catalogo <-> directory uploads
+    """
+
+    SORT_COLUMNS = {
+        'created_at': 'created_at',
+        'filename': 'filename',
+        'file_size': 'file_size'
+    }
+    MAX_PAGE_SIZE = 200
+
+    def __init__(self, connection_factory: Callable):
+        self._connect = connection_factory
+
+    @staticmethod
+    def _normalize_format(file_format: Optional[str]) -> Optional[str]:
+        return file_format.lower().lstrip('.') if file_format else None
+
+    @staticmethod
+    def _encode_cursor(sort: str, sort_value: Any, document_id: int) -> str:
+        if isinstance(sort_value, datetime):
+            sort_value = sort_value.isoformat()
+        raw = json.dumps([sort, sort_value, document_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> tuple:
+        """(valore, id) del cursor; ValueError se non valido o di un altro ordinamento"""
+        try:
+            cursor_sort, sort_value, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if cursor_sort != sort:
+                raise ValueError(f"Cursor creato per l'ordinamento {cursor_sort}")
+            if sort_value is not None:
+                if sort == 'created_at':
+                    sort_value = datetime.fromisoformat(sort_value)
+                elif sort == 'file_size':
+                    sort_value = int(sort_value)
+                elif not isinstance(sort_value, str):
+                    raise ValueError("Valore del cursor non valido")
+            return sort_value, int(document_id)
+        except ValueError as e:
+            raise ValueError(f"Cursor non valido: {e}")
+        except Exception:
+            raise ValueError("Cursor non valido")
+
+    @staticmethod
+    def _original_filename(filename: str) -> str:
+        """Nome originale da {timestamp data}_{timestamp ora}_{uuid}_{nome} (formato di /rag/upload)"""
+        parts = filename.split('_', 3)
+        return parts[3] if len(parts) == 4 and parts[3] else filename
+
+    def register_upload(self, filename: str, original_filename: str, file_size: int,
+                        content_hash: str, company_id: Optional[int] = None,
+                        uploaded_by: str = "rag_upload",
+                        metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Registra un file caricato nel catalogo e aggiorna i contatori"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO knowledge_documents (
+                    filename, original_filename, file_type, file_size, content_hash,
+                    company_id, uploaded_by, meta_data, created_at, updated_at
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+                RETURNING id
+            """, (
+                filename,
+                original_filename,
+                self._normalize_format(Path(filename).suffix),
+                file_size,
+                content_hash,
+                company_id,
+                uploaded_by,
+                json.dumps(metadata or {})
+            ))
+            document_id = cursor.fetchone()[0]
+            bump_counters(cursor, total_documents=1)
+            conn.commit()
+            return document_id
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def remove_by_filename(self, filename: str) -> Dict[str, int]:
+        """Rimuove documento e chunk dal catalogo (stessa transazione dei contatori)"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, chunks_count FROM knowledge_documents WHERE filename = %s",
+                (filename,)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return {'documents_deleted': 0, 'chunks_deleted': 0}
+
+            document_ids = [row[0] for row in rows]
+            cursor.execute("DELETE FROM document_chunks WHERE document_id = ANY(%s)", (document_ids,))
+            chunks_deleted = cursor.rowcount
+            cursor.execute("DELETE FROM knowledge_documents WHERE id = ANY(%s)", (document_ids,))
+            documents_deleted = cursor.rowcount
+
+            bump_counters(cursor, total_documents=-documents_deleted, total_chunks=-chunks_deleted)
+            conn.commit()
+            return {'documents_deleted': documents_deleted, 'chunks_deleted': chunks_deleted}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _filters(self, file_format: Optional[str], company_id: Optional[int],
+                 date_from: Optional[datetime], date_to: Optional[datetime]) -> tuple:
+        # I documenti scrappati non sono file in uploads/
+        conditions = ["filename NOT LIKE 'scraped_%%'"]
+        params: List[Any] = []
+
+        if file_format:
+            conditions.append("file_type = %s")
+            params.append(self._normalize_format(file_format))
+        if company_id is not None:
+            conditions.append("company_id = %s")
+            params.append(company_id)
+        if date_from:
+            conditions.append("created_at >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("created_at < %s")
+            params.append(date_to)
+        return conditions, params
+
+    def list_documents(self, limit: int = 50, cursor: Optional[str] = None,
+                       sort: str = 'created_at', order: str = 'desc',
+                       file_format: Optional[str] = None, company_id: Optional[int] = None,
+                       date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Pagina di documenti caricati
+
+        Returns:
+            {'documents': [...], 'total': int, 'next_cursor': str|None, 'limit': int}
+            total conta tutti i documenti che rispettano i filtri, non la pagina
+        """
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Ordinamento non supportato: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Direzione non supportata: {order}")
+
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
+        column = self.SORT_COLUMNS[sort]
+        comparator = '<' if order == 'desc' else '>'
+
+        conditions, params = self._filters(file_format, company_id, date_from, date_to)
+        filtered = len(conditions) > 1
+        count_conditions, count_params = list(conditions), list(params)
+        if cursor:
+            sort_value, last_id = self._decode_cursor(cursor, sort)
+            conditions.append(f"({column}, id) {comparator} (%s, %s)")
+            params.extend([sort_value, last_id])
+
+        # Una riga in piu' per sapere se esiste la pagina successiva
+        params.append(limit + 1)
+
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"""
+                SELECT id, filename, original_filename, file_type, file_size,
+                       company_id, created_at, chunks_count
+                FROM knowledge_documents
+                WHERE {' AND '.join(conditions)}
+                ORDER BY {column} {order.upper()}, id {order.upper()}
+                LIMIT %s
+            """, params)
+            rows = cur.fetchall()
+
+            # Totale del catalogo: contatori se non ci sono filtri, altrimenti COUNT sugli indici
+            if filtered:
+                cur.execute(
+                    f"SELECT COUNT(*) FROM knowledge_documents WHERE {' AND '.join(count_conditions)}",
+                    count_params
+                )
+                total = cur.fetchone()[0]
+            else:
+                counters = read_counters(cur)
+                total = counters[TOTAL_DOCUMENTS] - counters[SCRAPED_DOCUMENTS]
+        finally:
+            conn.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        documents = []
+        for row in rows:
+            documents.append({
+                "id": row[0],
+                "filename": row[1],
+                "original_filename": row[2],
+                "format": f".{row[3]}" if row[3] else None,
+                "size": row[4],
+                "company_id": row[5],
+                "modified": row[6].isoformat() if row[6] else None,
+                "chunks_count": row[7]
+            })
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            sort_value = {'created_at': last[6], 'filename': last[1], 'file_size': last[4]}[sort]
+            next_cursor = self._encode_cursor(sort, sort_value, last[0])
+
+        return {
+            'documents': documents,
+            'total': total,
+            'next_cursor': next_cursor,
+            'limit': limit
+        }
+
+    def backfill_uploads(self, upload_dir: Path, filenames: List[str], batch_size: int = 200) -> int:
+        """
+        Cataloga file gia' presenti in uploads/ senza riga knowledge_documents
+        (caricati prima del catalogo); una transazione per batch
+
+        Returns:
+            Documenti inseriti
+        """
+        inserted = 0
+        for start in range(0, len(filenames), batch_size):
+            rows = []
+            for filename in filenames[start:start + batch_size]:
+                path = Path(upload_dir) / filename
+                content_hash = hashlib.sha256()
+                try:
+                    with open(path, 'rb') as handle:
+                        for block in iter(lambda: handle.read(1024 * 1024), b''):
+                            content_hash.update(block)
+                    stat = path.stat()
+                except OSError as e:
+                    logger.warning(f"Backfill skipped {filename}: {e}")
+                    continue
+                rows.append((
+                    filename,
+                    self._original_filename(filename),
+                    self._normalize_format(path.suffix),
+                    stat.st_size,
+                    content_hash.hexdigest(),
+                    "catalogue_backfill",
+                    json.dumps({"backfilled": True}),
+                    datetime.fromtimestamp(stat.st_mtime)
+                ))
+            if not rows:
+                continue
+
+            conn = self._connect()
+            try:
+                cursor = conn.cursor()
+                # Riga per riga con NOT EXISTS: un upload concorrente non viene duplicato
+                batch_inserted = 0
+                for row in rows:
+                    cursor.execute("""
+                        INSERT INTO knowledge_documents (
+                            filename, original_filename, file_type, file_size, content_hash,
+                            uploaded_by, meta_data, created_at, updated_at
+                        )
+                        SELECT %s, %s, %s, %s, %s, %s, %s, %s, NOW()
+                        WHERE NOT EXISTS (SELECT 1 FROM knowledge_documents WHERE filename = %s)
+                    """, row + (row[0],))
+                    batch_inserted += cursor.rowcount
+                bump_counters(cursor, total_documents=batch_inserted)
+                conn.commit()
+                inserted += batch_inserted
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        if inserted:
+            logger.info(f"📚 Catalogue backfill: {inserted} uploaded files catalogued")
+        return inserted
+
+    def reconcile(self, upload_dir: Path, sample_size: int = 100, backfill: bool = False) -> Dict[str, Any]:
+        """
+        Confronta catalogo e directory uploads
+
+        Args:
+            backfill: cataloga i file su disco senza riga (upload precedenti al catalogo)
+
+        Returns:
+            File su disco non catalogati e righe di catalogo senza file
+            (conteggi + un campione di nomi)
+        """
+        with os.scandir(upload_dir) as entries:
+            on_disk = {entry.name for entry in entries if entry.is_file()}
+
+        conn = self._connect()
+        try:
+            # Cursore server-side: i nomi vengono letti a blocchi
+            cur = conn.cursor(name="catalogue_reconcile")
+            cur.itersize = 5000
+            cur.execute("SELECT filename FROM knowledge_documents WHERE filename NOT LIKE 'scraped_%'")
+            catalogued = {row[0] for row in cur}
+            cur.close()
+        finally:
+            conn.close()
+
+        missing_from_catalogue = sorted(on_disk - catalogued)
+        missing_on_disk = sorted(catalogued - on_disk)
+
+        backfilled = 0
+        if backfill and missing_from_catalogue:
+            backfilled = self.backfill_uploads(upload_dir, missing_from_catalogue)
+            if backfilled == len(missing_from_catalogue):
+                missing_from_catalogue = []
+
+        if missing_from_catalogue or missing_on_disk:
+            logger.warning(
+                f"Catalogue drift: {len(missing_from_catalogue)} files not catalogued, "
+                f"{len(missing_on_disk)} catalogue rows without file"
+            )
+
+        return {
+            'files_on_disk': len(on_disk),
+            'catalogued_documents': len(catalogued),
+            'missing_from_catalogue_count': len(missing_from_catalogue),
+            'missing_on_disk_count': len(missing_on_disk),
+            'missing_from_catalogue': missing_from_catalogue[:sample_size],
+            'missing_on_disk': missing_on_disk[:sample_size],
+            'backfilled': backfilled,
+            'timestamp': datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class HealthProber:
+    """
+    Health check in background con risultati in cache
+
+    Ogni dipendenza (Qdrant, PostgreSQL, OpenAI, ...) viene verificata da
+    un task asincrono al proprio intervallo; gli endpoint di health leggono
+    solo lo snapshot in memoria, senza toccare i backend.
+    """
+
+    def __init__(self, default_interval: float = 30.0):
+        self.default_interval = default_interval
+        self._probes: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Callable[[], Optional[Dict[str, Any]]],
+                 interval: Optional[float] = None, critical: bool = True):
+        """
+        Registra una probe sincrona
+
+        La probe solleva un'eccezione se la dipendenza non e' sana e puo'
+        ritornare un dict di dettagli da esporre nello snapshot.
+        """
+        self._probes[name] = {
+            'probe': probe,
+            'interval': interval or self.default_interval,
+            'critical': critical,
+            'next_run': 0.0
+        }
+        self._results[name] = {
+            'healthy': None,
+            'checked_at': None,
+            'latency_ms': None,
+            'error': None
+        }
+
+    async def _run_probe(self, name: str):
+        """Esegue una probe in un thread e salva esito e latenza"""
+        entry = self._probes[name]
+        started = time.perf_counter()
+        result = {'healthy': False, 'error': None}
+
+        try:
+            details = await asyncio.to_thread(entry['probe'])
+            result['healthy'] = True
+            if details:
+                result['details'] = details
+        except Exception as e:
+            result['error'] = str(e)
+            logger.warning(f"Health probe {name} failed: {e}")
+
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        result['checked_at'] = datetime.utcnow().isoformat()
+        self._results[name] = result
+        entry['next_run'] = time.monotonic() + entry['interval']
+
+    async def refresh(self, force: bool = False):
+        """Aggiorna le probe scadute (tutte se force=True)"""
+        now = time.monotonic()
+        due = [
+            name for name, entry in self._probes.items()
+            if force or entry['next_run'] <= now
+        ]
+        if due:
+            await asyncio.gather(*(self._run_probe(name) for name in due))
+
+    async def _loop(self):
+        """Loop di refresh in background"""
+        tick = min([entry['interval'] for entry in self._probes.values()] + [self.default_interval])
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health prober loop error: {e}")
+            await asyncio.sleep(max(1.0, tick / 2))
+
+    async def start(self):
+        """
+        Avvia il loop in background (dal lifespan dell'app). Non attende le
+        probe: fino al primo giro i componenti risultano healthy=None.
+        """
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+        logger.info(f"✅ Health prober started ({len(self._probes)} probes)")
+
+    async def stop(self):
+        """Ferma il task in background"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Stato corrente in cache, senza chiamate ai backend"""
+        components = {name: dict(result) for name, result in self._results.items()}
+        overall = all(
+            components[name]['healthy'] is True
+            for name, entry in self._probes.items()
+            if entry['critical']
+        )
+        return {
+            'components': components,
+            'overall': overall,
+            'cached': True,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+def create_rag_health_prober(vector_service_factory: Callable, interval: float = 30.0,
+                             openai_interval: float = 300.0) -> HealthProber:
+    """
+    Prober standard per il sistema RAG: Qdrant, PostgreSQL e OpenAI.
+    OpenAI viene verificato con models.list (gratuito) a intervallo lungo.
+
+    Il servizio vettoriale e' creato dentro la prima probe (in un thread):
+    se Qdrant o la chiave OpenAI mancano, le probe falliscono e vengono
+    ritentate, senza bloccare chi crea il prober.
+    """
+    service = {}
+    service_lock = threading.Lock()
+
+    def vector_service():
+        with service_lock:
+            if 'instance' not in service:
+                service['instance'] = vector_service_factory()
+        return service['instance']
+
+    prober = HealthProber(default_interval=interval)
+    prober.register('qdrant', lambda: vector_service().probe_qdrant())
+    prober.register('database', lambda: vector_service().probe_database())
+    prober.register('openai', lambda: vector_service().probe_openai(), interval=openai_interval, critical=False)
+    return prober
+
+_rag_health_prober: Optional[HealthProber] = None
+
+def get_rag_health_prober() -> HealthProber:
+    """Prober condiviso, avviato dalla prima richiesta a /rag/health"""
+    global _rag_health_prober
+    if _rag_health_prober is None:
+        from app.modules.rag_engine.vector_service import VectorRAGService
+        _rag_health_prober = create_rag_health_prober(VectorRAGService)
+    return _rag_health_prober
+
+async def stop_rag_health_prober():
+    """Ferma il prober se e' stato creato (no-op se /rag/health non e' servito)"""
+    if _rag_health_prober is not None:
+        await _rag_health_prober.stop()
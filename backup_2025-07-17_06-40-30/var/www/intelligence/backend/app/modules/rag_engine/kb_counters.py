@@ -0,0 +1,60 @@
+"""
+Contatori materializzati della knowledge base
+
+La tabella knowledge_base_counters sostituisce i COUNT(*) sulle tabelle
+knowledge_documents / document_chunks / scraped_websites. I contatori
+vengono aggiornati con il cursore del chiamante, quindi nella stessa
+transazione delle insert/delete che li modificano.
+"""
+
+from typing import Dict
+
+TOTAL_DOCUMENTS = "total_documents"
+SCRAPED_DOCUMENTS = "scraped_documents"
+TOTAL_CHUNKS = "total_chunks"
+SCRAPED_SITES = "scraped_sites"
+
+COUNTER_NAMES = (TOTAL_DOCUMENTS, SCRAPED_DOCUMENTS, TOTAL_CHUNKS, SCRAPED_SITES)
+
+def bump_counters(cursor, **deltas: int) -> None:
+    """
+    Applica delta ai contatori (es. bump_counters(cur, total_documents=1))
+
+    Le righe vengono aggiornate in ordine di nome per evitare deadlock
+    tra transazioni concorrenti.
+    """
+    rows = sorted((name, int(delta)) for name, delta in deltas.items() if delta)
+    if not rows:
+        return
+
+    unknown = [name for name, _ in rows if name not in COUNTER_NAMES]
+    if unknown:
+        raise ValueError(f"Contatori sconosciuti: {unknown}")
+
+    placeholders = ", ".join(["(%s, %s)"] * len(rows))
+    params = [value for row in rows for value in row]
+    cursor.execute(f"""
+        INSERT INTO knowledge_base_counters (name, value)
+        VALUES {placeholders}
+        ON CONFLICT (name) DO UPDATE
+        SET value = knowledge_base_counters.value + EXCLUDED.value,
+            updated_at = NOW()
+    """, params)
+
+def bump_document_chunks(cursor, document_id, delta: int) -> None:
+    """Aggiorna il numero di chunk pre-aggregato di un documento e il totale"""
+    if not delta:
+        return
+    cursor.execute(
+        "UPDATE knowledge_documents SET chunks_count = COALESCE(chunks_count, 0) + %s WHERE id = %s",
+        (delta, document_id)
+    )
+    bump_counters(cursor, total_chunks=delta)
+
+def read_counters(cursor) -> Dict[str, int]:
+    """Legge tutti i contatori (O(1), una riga per contatore)"""
+    cursor.execute("SELECT name, value FROM knowledge_base_counters")
+    values = {name: 0 for name in COUNTER_NAMES}
+    for name, value in cursor.fetchall():
+        values[name] = int(value)
+    return values
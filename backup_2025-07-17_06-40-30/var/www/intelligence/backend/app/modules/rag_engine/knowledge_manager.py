@@ -75,7 +75,7 @@ class KnowledgeManager:
             cur.execute("""
                 SELECT 
                     id, filename, file_size, processed_at, created_at,
-                    (SELECT COUNT(*) FROM document_chunks WHERE document_id = kd.id) as chunks_count
+                    chunks_count
                 FROM knowledge_documents kd
                 WHERE company_id = %s
                 ORDER BY created_at DESC 
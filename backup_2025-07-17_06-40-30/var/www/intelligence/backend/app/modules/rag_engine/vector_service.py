@@ -5,16 +5,20 @@ import hashlib
 import json
 import logging
 from typing import List, Dict, Optional, Any
-from uuid import UUID, uuid4
+from uuid import UUID, uuid4, uuid5, NAMESPACE_URL
 from datetime import datetime
 
 import os
 import openai
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny, PayloadSchemaType
+import numpy as np
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+
+from .kb_counters import bump_document_chunks
+from .vector_codec import decode_vector_list, encode_vector
 
 logger = logging.getLogger(__name__)
 
@@ -36,8 +40,12 @@ class VectorRAGService:
             timeout=30
         )
         self.collection_name = "intelligence_knowledge"
+        # Indice di primo livello: un vettore riassuntivo per documento
+        self.summary_collection_name = "intelligence_knowledge_documents"
         self.chunk_size = 1000
         self.chunk_overlap = 200
+        # Codec degli embedding salvati in document_chunks.embedding_blob
+        self.embedding_codec = os.getenv("EMBEDDING_BLOB_CODEC", "float16")
         
         # Database connection
         # Database config from environment
@@ -56,30 +64,38 @@ class VectorRAGService:
     
     def _ensure_collection_exists(self):
         """
-        Assicura che la collection Qdrant esista
+        Assicura che le collection Qdrant (chunks + sommari documento) esistano
         """
         try:
             collections = self.qdrant_client.get_collections()
-            collection_exists = any(
-                c.name == self.collection_name 
-                for c in collections.collections
-            )
+            existing = {c.name for c in collections.collections}
             
-            if not collection_exists:
-                self.qdrant_client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=1536,  # OpenAI text-embedding-3-small
-                        distance=Distance.COSINE
+            for collection_name in (self.collection_name, self.summary_collection_name):
+                if collection_name not in existing:
+                    self.qdrant_client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=VectorParams(
+                            size=1536,  # OpenAI text-embedding-3-small
+                            distance=Distance.COSINE
+                        )
                     )
-                )
-                logger.info(f"✅ Created Qdrant collection: {self.collection_name}")
-            else:
-                logger.info(f"✅ Collection {self.collection_name} already exists")
-                
+                    logger.info(f"✅ Created Qdrant collection: {collection_name}")
+                else:
+                    logger.info(f"✅ Collection {collection_name} already exists")
+            
         except Exception as e:
             logger.error(f"❌ Error with Qdrant collection: {e}")
             raise
+        
+        try:
+            # Indice payload per il filtro document_id della ricerca gerarchica
+            self.qdrant_client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name="document_id",
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Could not create document_id payload index: {e}")
     
     def _get_db_connection(self):
         """
@@ -87,9 +103,38 @@ class VectorRAGService:
         """
         return psycopg2.connect(**self.db_config)
     
+    def probe_qdrant(self) -> Dict[str, Any]:
+        """
+        Probe Qdrant: legge solo la collection principale
+        """
+        info = self.qdrant_client.get_collection(self.collection_name)
+        return {
+            'total_points': info.points_count,
+            'status': str(info.status),
+            'collection_name': self.collection_name
+        }
+    
+    def probe_database(self) -> None:
+        """
+        Probe PostgreSQL: SELECT 1
+        """
+        conn = self._get_db_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+        finally:
+            conn.close()
+    
+    def probe_openai(self) -> None:
+        """
+        Probe OpenAI senza costi (nessun embedding generato)
+        """
+        self.openai_client.models.list()
+    
     def health_check(self) -> Dict[str, Any]:
         """
-        Health check completo del sistema
+        Health check completo del sistema (chiamate live: per gli
+        endpoint usare HealthProber, che tiene i risultati in cache)
         """
         health_status = {
             'qdrant': False,
@@ -100,7 +145,7 @@ class VectorRAGService:
         
         try:
             # Test Qdrant
-            self.qdrant_client.get_collections()
+            self.probe_qdrant()
             health_status['qdrant'] = True
         except:
             pass
@@ -114,10 +159,7 @@ class VectorRAGService:
         
         try:
             # Test Database
-            conn = self._get_db_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT 1")
-            conn.close()
+            self.probe_database()
             health_status['database'] = True
         except:
             pass
@@ -154,42 +196,287 @@ class VectorRAGService:
             logger.error(f"Error generating embeddings: {e}")
             raise
     
+    def embed_texts(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        """
+        Embeddings per piu' testi, una chiamata OpenAI ogni batch_size testi
+        """
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            response = self.openai_client.embeddings.create(
+                model="text-embedding-3-small",
+                input=texts[start:start + batch_size]
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+        return embeddings
+    
+    def index_document_chunks(self, chunks: List[Dict[str, Any]], document_id: str) -> int:
+        """
+        Indicizza i chunk di un documento (sincrono, da eseguire in un thread)
+        
+        Returns:
+            Numero di punti scritti
+        """
+        if not chunks:
+            return 0
+        
+        texts = [chunk.get("content", chunk.get("text", "")) for chunk in chunks]
+        embeddings = self.embed_texts(texts)
+        
+        points = []
+        for i, (chunk, text, embedding) in enumerate(zip(chunks, texts, embeddings)):
+            metadata = chunk.get('metadata', {})
+            points.append(PointStruct(
+                id=str(uuid5(NAMESPACE_URL, f"{document_id}_{i}")),
+                vector=embedding,
+                payload={
+                    "document_id": document_id,
+                    "chunk_index": i,
+                    "content": text,
+                    "filename": metadata.get('filename', ''),
+                    "metadata": metadata
+                }
+            ))
+        
+        # Inserisci in Qdrant
+        self.qdrant_client.upsert(
+            collection_name=self.collection_name,
+            points=points
+        )
+        
+        logger.info(f"✅ Added {len(points)} chunks for document {document_id}")
+        
+        self._store_chunk_embeddings(document_id, texts, embeddings)
+        
+        # Sommario documento per la ricerca coarse-to-fine
+        chunk_metadata = chunks[0].get('metadata', {}) if chunks else {}
+        self.upsert_document_summary(
+            document_id,
+            embeddings,
+            filename=chunk_metadata.get('filename', ''),
+            chunks_count=len(points)
+        )
+        return len(points)
+    
+    def _store_chunk_embeddings(self, document_id: str, texts: List[str],
+                                embeddings: List[List[float]]) -> bool:
+        """
+        Sostituisce i document_chunks del documento con i chunk appena
+        indicizzati e il loro embedding_blob (cache per rebuild e sommari)
+        
+        Best effort: se il salvataggio fallisce i vettori restano in Qdrant.
+        """
+        conn = self._get_db_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM document_chunks WHERE document_id = %s", (document_id,))
+            deleted = cur.rowcount
+            execute_values(cur, """
+                INSERT INTO document_chunks (document_id, chunk_index, content, embedding_blob)
+                VALUES %s
+            """, [
+                (document_id, index, text, psycopg2.Binary(encode_vector(embedding, self.embedding_codec)))
+                for index, (text, embedding) in enumerate(zip(texts, embeddings))
+            ], page_size=500)
+            bump_document_chunks(cur, document_id, len(texts) - deleted)
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"⚠️ Could not cache embeddings for document {document_id}: {e}")
+            return False
+        finally:
+            conn.close()
+    
     async def add_document_chunks(self, chunks: List[Dict[str, Any]], document_id: str) -> bool:
         """
         Aggiunge chunks di documento al vector database
         """
         try:
-            points = []
-            for i, chunk in enumerate(chunks):
-                # Genera embeddings per il chunk
-                embedding = await self.generate_embeddings(chunk.get("content", chunk.get("text", "")))
-                
-                # Crea punto per Qdrant
-                point = PointStruct(
-                    id=f"{document_id}_{i}",
-                    vector=embedding,
-                    payload={
-                        "document_id": document_id,
-                        "chunk_index": i,
-                        "content": chunk.get("content", chunk.get("text", "")),
-                        "metadata": chunk.get('metadata', {})
-                    }
+            await asyncio.to_thread(self.index_document_chunks, chunks, document_id)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error adding document chunks: {e}")
+            return False
+    
+    def delete_document_points(self, document_id: str, filename: Optional[str] = None) -> None:
+        """
+        Rimuove chunk e sommario di un documento (prima di re-indicizzarlo)
+        
+        Con il filename rimuove anche i punti legacy di vectorize_html_from_db.py,
+        che hanno id da md5 e document_id = nome file senza '.html'.
+        """
+        document_ids = [str(document_id)]
+        if filename and filename.startswith('scraped_'):
+            document_ids.append(filename.replace('.html', ''))
+        self.qdrant_client.delete(
+            collection_name=self.collection_name,
+            points_selector=Filter(
+                must=[FieldCondition(key="document_id", match=MatchAny(any=document_ids))]
+            )
+        )
+        self.qdrant_client.delete(
+            collection_name=self.summary_collection_name,
+            points_selector=[str(uuid5(NAMESPACE_URL, f"document:{document_id}"))]
+        )
+    
+    def rebuild_collection_from_database(self, batch_size: int = 256) -> Dict[str, Any]:
+        """
+        Ricostruisce le collection Qdrant (chunk e sommari documento) dagli
+        embedding salvati in document_chunks.embedding_blob, senza chiamare OpenAI
+        
+        Gli id dei punti sono gli stessi dell'indicizzazione live, quindi
+        la ricostruzione su una collection esistente sovrascrive e non duplica.
+        """
+        restored = 0
+        summaries = 0
+        last_key = None
+        current = None  # (document_id, filename, embeddings) del documento in corso
+        conn = self._get_db_connection()
+
+        def flush_summary():
+            nonlocal summaries
+            if current and self.upsert_document_summary(
+                str(current[0]), current[2], filename=current[1], chunks_count=len(current[2])
+            ):
+                summaries += 1
+
+        try:
+            cur = conn.cursor()
+            while True:
+                # Keyset su (documento, chunk): i chunk di un documento arrivano contigui
+                after = "AND (dc.document_id, dc.chunk_index) > (%s, %s)" if last_key else ""
+                cur.execute(f"""
+                    SELECT dc.document_id, dc.chunk_index, dc.content,
+                           dc.embedding_blob, kd.filename
+                    FROM document_chunks dc
+                    JOIN knowledge_documents kd ON kd.id = dc.document_id
+                    WHERE dc.embedding_blob IS NOT NULL
+                      {after}
+                    ORDER BY dc.document_id, dc.chunk_index
+                    LIMIT %s
+                """, (*(last_key or ()), batch_size))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+
+                points = []
+                for document_id, chunk_index, content, blob, filename in rows:
+                    vector = decode_vector_list(blob)
+                    if current is None or current[0] != document_id:
+                        flush_summary()
+                        current = (document_id, filename, [])
+                    current[2].append(vector)
+                    points.append(PointStruct(
+                        id=str(uuid5(NAMESPACE_URL, f"{document_id}_{chunk_index}")),
+                        vector=vector,
+                        payload={
+                            "document_id": str(document_id),
+                            "chunk_index": chunk_index,
+                            "content": content,
+                            "filename": filename
+                        }
+                    ))
+                self.qdrant_client.upsert(
+                    collection_name=self.collection_name,
+                    points=points
                 )
-                points.append(point)
+
+                restored += len(points)
+                last_key = (rows[-1][0], rows[-1][1])
+
+            flush_summary()
+            logger.info(f"✅ Restored {restored} vectors and {summaries} document summaries from database cache")
+            return {'success': True, 'restored_points': restored, 'restored_summaries': summaries}
+
+        except Exception as e:
+            logger.error(f"Error rebuilding collection from database: {e}")
+            return {'success': False, 'restored_points': restored, 'restored_summaries': summaries, 'error': str(e)}
+        finally:
+            conn.close()
+
+    def upsert_document_summary(self, document_id: str, chunk_embeddings: List[List[float]],
+                                filename: str = "", chunks_count: Optional[int] = None) -> bool:
+        """
+        Salva il vettore riassuntivo del documento (centroide normalizzato
+        degli embedding dei chunk) nella collection dei sommari
+        """
+        if not chunk_embeddings:
+            return False
+        
+        try:
+            centroid = np.mean(np.asarray(chunk_embeddings, dtype=np.float32), axis=0)
+            norm = float(np.linalg.norm(centroid))
+            if norm > 0:
+                centroid /= norm
             
-            # Inserisci in Qdrant
             self.qdrant_client.upsert(
-                collection_name=self.collection_name,
-                points=points
+                collection_name=self.summary_collection_name,
+                points=[PointStruct(
+                    id=str(uuid5(NAMESPACE_URL, f"document:{document_id}")),
+                    vector=centroid.tolist(),
+                    payload={
+                        "document_id": str(document_id),
+                        "filename": filename,
+                        "chunks_count": chunks_count if chunks_count is not None else len(chunk_embeddings)
+                    }
+                )]
             )
-            
-            logger.info(f"✅ Added {len(points)} chunks for document {document_id}")
             return True
             
         except Exception as e:
-            logger.error(f"Error adding document chunks: {e}")
+            logger.error(f"Error upserting summary for document {document_id}: {e}")
             return False
     
+    def _format_hits(self, search_result) -> List[Dict[str, Any]]:
+        """
+        Formatta i risultati Qdrant nel formato delle API RAG
+        """
+        results = []
+        for hit in search_result:
+            results.append({
+                "id": hit.id,
+                "score": hit.score,
+                "content": hit.payload.get("content", hit.payload.get("text", "")),
+                "document_id": hit.payload["document_id"],
+                "chunk_index": hit.payload["chunk_index"],
+                "filename": hit.payload.get("filename", ""),
+                "metadata": hit.payload.get("metadata", {})
+            })
+        return results
+    
+    def search_chunks_by_vector(self, query_embedding: List[float], limit: int = 5,
+                                score_threshold: float = 0.3,
+                                document_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Ricerca chunks per vettore, opzionalmente ristretta a document_ids
+        """
+        query_filter = None
+        if document_ids is not None:
+            query_filter = Filter(
+                must=[FieldCondition(key="document_id", match=MatchAny(any=document_ids))]
+            )
+        
+        search_result = self.qdrant_client.search(
+            collection_name=self.collection_name,
+            query_vector=query_embedding,
+            query_filter=query_filter,
+            limit=limit,
+            score_threshold=score_threshold
+        )
+        return self._format_hits(search_result)
+    
+    def search_documents_by_vector(self, query_embedding: List[float], limit: int = 5) -> List[str]:
+        """
+        Primo livello: documenti piu' vicini alla query tramite i sommari
+        """
+        search_result = self.qdrant_client.search(
+            collection_name=self.summary_collection_name,
+            query_vector=query_embedding,
+            limit=limit
+        )
+        return [hit.payload["document_id"] for hit in search_result]
+    
     async def search_similar_chunks(self, query: str, limit: int = 5, score_threshold: float = 0.3) -> List[Dict[str, Any]]:
         """
         Ricerca chunks simili alla query
@@ -199,28 +486,30 @@ class VectorRAGService:
             query_embedding = await self.generate_embeddings(query)
             
             # Ricerca in Qdrant
-            search_result = self.qdrant_client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=limit,
-                score_threshold=score_threshold
-            )
+            return self.search_chunks_by_vector(query_embedding, limit, score_threshold)
             
-            # Formatta risultati
-            results = []
-            for hit in search_result:
-                results.append({
-                    "id": hit.id,
-                    "score": hit.score,
-                    "content": hit.payload.get("content", hit.payload.get("text", "")),
-                    "document_id": hit.payload["document_id"],
-                    "chunk_index": hit.payload["chunk_index"],
-                    "filename": hit.payload.get("filename", ""),
-                    "metadata": hit.payload.get("metadata", {})
-                })
+        except Exception as e:
+            logger.error(f"Error searching similar chunks: {e}")
+            return []
+    
+    async def search_hierarchical(self, query: str, limit: int = 5, score_threshold: float = 0.3,
+                                  top_documents: int = 5) -> List[Dict[str, Any]]:
+        """
+        Ricerca coarse-to-fine: sceglie i top documenti dai sommari, poi
+        cerca i chunk solo dentro quei documenti (filtro payload).
+        Se l'indice sommari e' vuoto ricade sulla ricerca piatta.
+        """
+        try:
+            query_embedding = await self.generate_embeddings(query)
             
-            return results
+            document_ids = self.search_documents_by_vector(query_embedding, top_documents)
+            if not document_ids:
+                return self.search_chunks_by_vector(query_embedding, limit, score_threshold)
+            
+            return self.search_chunks_by_vector(
+                query_embedding, limit, score_threshold, document_ids=document_ids
+            )
             
         except Exception as e:
-            logger.error(f"Error searching similar chunks: {e}")
+            logger.error(f"Error in hierarchical search: {e}")
             return []
@@ -0,0 +1,156 @@
+"""
+🧵 Vettorizzazione incrementale in-process
+
+Le route di scraping accodano l'id del knowledge_document appena creato;
+il worker chunka e indicizza solo quel documento. Niente subprocess e
+niente ri-vettorizzazione di tutti i documenti scrappati.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.services.web_scraping.content_gate import content_gate
+
+logger = logging.getLogger(__name__)
+
+def chunk_text(text: str, size: int = 1000, overlap: int = 200) -> List[str]:
+    """Chunk a finestra fissa con sovrapposizione"""
+    if not text:
+        return []
+    step = max(size - overlap, 1)
+    return [text[i:i + size] for i in range(0, max(len(text) - overlap, 1), step)]
+
+class VectorizationWorker:
+    """
+    Coda di documenti da vettorizzare, consumata da `concurrency` task
+
+    Il lavoro bloccante (lettura DB, chiamate OpenAI e Qdrant) gira in un
+    thread, cosi' l'event loop delle API resta libero.
+    """
+
+    def __init__(self, connection_factory: Callable, vector_service_factory: Callable,
+                 concurrency: int = 2, max_queue: int = 1000):
+        self._connect = connection_factory
+        self._vector_service_factory = vector_service_factory
+        self._vector_service = None
+        self._service_lock = threading.Lock()
+        self.concurrency = concurrency
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._pending: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {'queued': 0, 'vectorized': 0, 'failed': 0, 'rejected': 0, 'chunks': 0}
+
+    @property
+    def vector_service(self):
+        # VectorRAGService crea i client OpenAI/Qdrant: solo al primo documento
+        with self._service_lock:
+            if self._vector_service is None:
+                self._vector_service = self._vector_service_factory()
+        return self._vector_service
+
+    def _ensure_started(self):
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.concurrency:
+            self._tasks.append(asyncio.create_task(self._run()))
+
+    async def enqueue(self, document_id: int) -> bool:
+        """Accoda un documento; False se e' gia' in coda"""
+        if document_id in self._pending:
+            return False
+        self._ensure_started()
+        self._pending.add(document_id)
+        await self._queue.put(document_id)
+        self.stats['queued'] += 1
+        return True
+
+    async def _run(self):
+        while True:
+            document_id = await self._queue.get()
+            try:
+                chunks = await asyncio.to_thread(self._vectorize, document_id)
+                self.stats['vectorized'] += 1
+                self.stats['chunks'] += chunks
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"❌ Vectorization failed for document {document_id}: {e}")
+            finally:
+                self._pending.discard(document_id)
+                self._queue.task_done()
+
+    def _load_document(self, document_id: int) -> Optional[tuple]:
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT filename, extracted_text FROM knowledge_documents WHERE id = %s",
+                (document_id,)
+            )
+            return cursor.fetchone()
+        finally:
+            conn.close()
+
+    def _vectorize(self, document_id: int) -> int:
+        """Sostituisce i vettori di un documento; ritorna i chunk scritti"""
+        row = self._load_document(document_id)
+        if not row:
+            logger.warning(f"⚠️ Document {document_id} not found, skipping vectorization")
+            return 0
+
+        filename, text = row
+        if not text or len(text.strip()) < 50:
+            logger.warning(f"⚠️ Content too short: {filename}")
+            return 0
+
+        # Pagine scrappate: niente embedding per errori, cookie wall, lingue non ammesse...
+        if filename.startswith('scraped_'):
+            decision = content_gate.evaluate(text)
+            if not decision.accepted:
+                self.stats['rejected'] += 1
+                logger.info(f"🚧 Not vectorizing {filename}: {decision.reason}")
+                return 0
+
+        service = self.vector_service
+        service.delete_document_points(str(document_id), filename)
+
+        chunks = [
+            {
+                'content': chunk,
+                'metadata': {
+                    'filename': filename,
+                    'chunk_index': index,
+                    'source': 'web_scraping' if filename.startswith('scraped_') else 'upload'
+                }
+            }
+            for index, chunk in enumerate(chunk_text(text, service.chunk_size, service.chunk_overlap))
+        ]
+        written = service.index_document_chunks(chunks, str(document_id))
+        logger.info(f"✅ Vectorized: {filename} ({written} chunks)")
+        return written
+
+    async def join(self):
+        """Attende lo svuotamento della coda"""
+        await self._queue.join()
+
+    async def stop(self):
+        """Ferma i task del worker (i documenti ancora in coda restano non vettorizzati)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> Dict[str, Any]:
+        return {**self.stats, 'pending': len(self._pending), 'workers': len(self._tasks)}
+
+_worker: Optional[VectorizationWorker] = None
+
+def get_vectorization_worker() -> VectorizationWorker:
+    """Worker condiviso del processo API"""
+    global _worker
+    if _worker is None:
+        from app.modules.rag_engine.vector_service import VectorRAGService
+        from app.services.web_scraping.api_routes_working import get_db_connection
+        _worker = VectorizationWorker(get_db_connection, VectorRAGService)
+    return _worker
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Form
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Form, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import asyncio
+import hashlib
 import os
 from pathlib import Path
 import shutil
@@ -12,6 +13,8 @@ from app.core.database import get_db
 from app.modules.rag_engine.knowledge_manager import KnowledgeManager
 from app.modules.rag_engine.document_processor import DocumentProcessor
 from app.modules.rag_engine.vector_service import VectorRAGService
+from app.modules.rag_engine.health_prober import get_rag_health_prober
+from app.modules.rag_engine.document_catalogue import DocumentCatalogue
 
 router = APIRouter(prefix="/rag", tags=["RAG Knowledge Management"])
 
@@ -19,27 +22,36 @@ router = APIRouter(prefix="/rag", tags=["RAG Knowledge Management"])
 km = KnowledgeManager()
 doc_processor = DocumentProcessor()
 vector_service = VectorRAGService()
+catalogue = DocumentCatalogue(vector_service._get_db_connection)
 
 UPLOAD_DIR = Path("/var/www/intelligence/backend/uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 @router.get("/health")
 async def rag_health_check():
-    """Health check completo del sistema RAG"""
-    health = await km.health_check()
+    """Health check del sistema RAG (snapshot in cache, aggiornato in background)"""
+    prober = get_rag_health_prober()
+    # Avvio alla prima richiesta: start() e' idempotente e non attende le probe
+    await prober.start()
+    health = prober.snapshot()
+    components = health['components']
     
-    # Test aggiuntivi
-    try:
-        # Test Qdrant connection
-        qdrant_stats = vector_service.get_stats()
-        health['qdrant_detailed'] = qdrant_stats
-        
-        # Test OpenAI embeddings
-        test_embedding = await vector_service.generate_embeddings("test")
-        health['openai_embeddings'] = f"OK - {len(test_embedding)} dimensions"
-        
-    except Exception as e:
-        health['additional_checks_error'] = str(e)
+    # Campi storici di km.health_check e dei test aggiuntivi, ricavati dallo snapshot
+    vector_health = {name: components[name]['healthy'] is True for name in ('qdrant', 'openai', 'database')}
+    vector_health['overall'] = vector_health['qdrant'] and vector_health['database']
+    health['vector_service'] = vector_health
+    health['document_processor'] = {
+        'supported_formats': doc_processor.get_supported_formats(),
+        'vector_service_health': vector_health
+    }
+    health['supported_formats'] = doc_processor.get_supported_formats()
+    
+    qdrant = components['qdrant']
+    health['qdrant_detailed'] = qdrant.get('details') or {'error': qdrant['error']}
+    if components['openai']['healthy']:
+        health['openai_embeddings'] = "OK"
+    elif components['openai']['error']:
+        health['additional_checks_error'] = components['openai']['error']
     
     return health
 
@@ -102,11 +114,27 @@ async def upload_document(
         safe_filename = f"{timestamp}_{document_id}_{file.filename}"
         file_path = UPLOAD_DIR / safe_filename
         
-        # Salva file
+        # Salva file calcolando hash e dimensione in un solo passaggio
+        content_hash = hashlib.sha256()
+        file_size = 0
         with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        file_size = file_path.stat().st_size
+            while True:
+                block = file.file.read(1024 * 1024)
+                if not block:
+                    break
+                content_hash.update(block)
+                file_size += len(block)
+                buffer.write(block)
+        
+        # Registra nel catalogo knowledge_documents
+        catalogue_id = catalogue.register_upload(
+            filename=safe_filename,
+            original_filename=file.filename,
+            file_size=file_size,
+            content_hash=content_hash.hexdigest(),
+            company_id=company_id,
+            metadata={"description": description, "document_uuid": document_id}
+        )
         
         # Estrai testo dal documento
         extraction_result = await doc_processor.extract_text(file_path)
@@ -115,6 +143,7 @@ async def upload_document(
             "success": True,
             "message": "Documento caricato e processato con successo",
             "document_id": document_id,
+            "catalogue_id": catalogue_id,
             "filename": file.filename,
             "safe_filename": safe_filename,
             "size": file_size,
@@ -205,31 +234,52 @@ async def semantic_search(
         raise HTTPException(status_code=500, detail=f"Errore ricerca: {str(e)}")
 
 @router.get("/documents")
-async def list_documents():
-    """Lista documenti caricati"""
+async def list_documents(
+    limit: int = Query(50, ge=1, le=DocumentCatalogue.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("created_at", pattern="^(created_at|filename|file_size)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    format: Optional[str] = None,
+    company_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
+    """Lista documenti caricati dal catalogo (paginazione keyset)"""
     try:
-        files = list(UPLOAD_DIR.glob("*"))
-        documents = []
-        
-        for file_path in files:
-            if file_path.is_file():
-                documents.append({
-                    "filename": file_path.name,
-                    "size": file_path.stat().st_size,
-                    "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                    "format": file_path.suffix.lower()
-                })
+        page = await asyncio.to_thread(
+            catalogue.list_documents,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            order=order,
+            file_format=format,
+            company_id=company_id,
+            date_from=date_from,
+            date_to=date_to
+        )
         
         return {
-            "documents": documents,
-            "total": len(documents),
+            "documents": page["documents"],
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "limit": page["limit"],
             "upload_directory": str(UPLOAD_DIR),
             "timestamp": datetime.utcnow().isoformat()
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Errore lista documenti: {str(e)}")
 
+@router.get("/documents/reconcile")
+async def reconcile_documents(backfill: bool = False):
+    """Confronta catalogo documenti e directory uploads (backfill=true cataloga i file mancanti)"""
+    try:
+        return await asyncio.to_thread(catalogue.reconcile, UPLOAD_DIR, backfill=backfill)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Errore riconciliazione: {str(e)}")
+
 
 @router.post("/chat")
 async def rag_chat(request: dict):
@@ -364,12 +414,16 @@ async def delete_document_intelligent(document_id: str):
         # Delete physical file
         document_path.unlink()
         
+        # Delete catalogue row + chunks (aggiorna i contatori)
+        catalogue_result = catalogue.remove_by_filename(document_path.name)
+        
         return {
             "success": True,
             "message": "Documento eliminato intelligentemente", 
             "details": {
                 "file_deleted": str(document_path.name),
-                "qdrant_chunks_deleted": deleted_chunks
+                "qdrant_chunks_deleted": deleted_chunks,
+                "catalogue_documents_deleted": catalogue_result["documents_deleted"]
             }
         }
         
@@ -384,12 +438,20 @@ async def vector_rag_chat(request: dict):
         if not query:
             raise HTTPException(status_code=400, detail="Query richiesta")
         
-        # USA VECTOR SERVICE
-        search_results = await vector_service.search_similar_chunks(
-            query, 
-            limit=5, 
-            score_threshold=0.3
-        )
+        # USA VECTOR SERVICE (gerarchica: sommari documento -> chunk)
+        if request.get("hierarchical", False):
+            search_results = await vector_service.search_hierarchical(
+                query,
+                limit=5,
+                score_threshold=0.3,
+                top_documents=request.get("top_documents", 5)
+            )
+        else:
+            search_results = await vector_service.search_similar_chunks(
+                query, 
+                limit=5, 
+                score_threshold=0.3
+            )
         
         # DEBUG: Print search results
         print(f"🔍 DEBUG Vector Search Results: {len(search_results)}")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark ricerca piatta vs gerarchica (sommari documento -> chunk)
+
+Per ogni query l'embedding viene calcolato una sola volta, cosi' le
+latenze misurano solo Qdrant. La recall@k della ricerca gerarchica e'
+calcolata usando i risultati della ricerca piatta come riferimento.
+
+Uso:
+    python bench_hierarchical_search.py [--limit 5] [--top-documents 5] [query ...]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.modules.rag_engine.vector_service import VectorRAGService
+
+DEFAULT_QUERIES = [
+    "chi sono i soci fondatori dell'azienda",
+    "servizi di consulenza offerti",
+    "contatti e indirizzo della sede",
+    "certificazioni e standard di qualità",
+    "progetti di intelligenza artificiale",
+]
+
+REPEATS = 5
+
+def p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+def timed(fn, *args, **kwargs):
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+async def run_benchmark(queries, limit, top_documents):
+    vector_service = VectorRAGService()
+
+    flat_latencies = []
+    hier_latencies = []
+    recalls = []
+
+    print(f"🚀 Benchmark ricerca: {len(queries)} query, k={limit}, top_documents={top_documents}\n")
+
+    for query in queries:
+        embedding = await vector_service.generate_embeddings(query)
+
+        flat, flat_samples = timed(
+            vector_service.search_chunks_by_vector, embedding, limit, 0.0
+        )
+
+        def hierarchical():
+            document_ids = vector_service.search_documents_by_vector(embedding, top_documents)
+            return vector_service.search_chunks_by_vector(
+                embedding, limit, 0.0, document_ids=document_ids
+            )
+
+        hier, hier_samples = timed(hierarchical)
+
+        flat_ids = {hit["id"] for hit in flat}
+        hier_ids = {hit["id"] for hit in hier}
+        recall = len(flat_ids & hier_ids) / len(flat_ids) if flat_ids else 1.0
+
+        flat_latencies.extend(flat_samples)
+        hier_latencies.extend(hier_samples)
+        recalls.append(recall)
+
+        print(f"🔍 {query[:50]:<50} flat {statistics.median(flat_samples):7.2f} ms | "
+              f"gerarchica {statistics.median(hier_samples):7.2f} ms | recall@{limit} {recall:.2f}")
+
+    print(f"\n📊 RISULTATI:")
+    print(f"   Flat       p50 {statistics.median(flat_latencies):7.2f} ms  p95 {p95(flat_latencies):7.2f} ms")
+    print(f"   Gerarchica p50 {statistics.median(hier_latencies):7.2f} ms  p95 {p95(hier_latencies):7.2f} ms")
+    print(f"   Recall@{limit} media (vs flat): {statistics.mean(recalls):.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flat vs hierarchical RAG search benchmark")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--top-documents", type=int, default=5)
+    parser.add_argument("queries", nargs="*")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.queries or DEFAULT_QUERIES, args.limit, args.top_documents))
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark estrazione HTML: percorso storico vs passaggio unico
+
+"Prima" riproduce gli estrattori storici di scraping_engine.py
+(BeautifulSoup html.parser, get_text() ripetuto per email/telefono/testo,
+titolo ricalcolato per ogni contatto, regex compilate a ogni chiamata).
+"Dopo" usa ParsedPage + estrattori di html_extraction.py per ogni backend
+disponibile.
+
+Uso:
+    python bench_html_extraction.py <directory con pagine .html> [--repeats 3]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from bs4 import BeautifulSoup
+
+from app.services.web_scraping.html_extraction import (
+    BACKEND_HTML_PARSER,
+    BACKEND_LXML,
+    BACKEND_SELECTOLAX,
+    available_backend,
+    extract_company_fields,
+    extract_contact_fields,
+    parse_page
+)
+
+def legacy_extract(html: str) -> dict:
+    """Percorso storico: piu' get_text() sullo stesso albero"""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [a['href'] for a in soup.find_all('a', href=True)]
+    data = {}
+
+    for selector in ['h1', 'title', '.company-name', '#company-name', '[itemprop="name"]',
+                     '.logo img[alt]', '.brand', '.site-title']:
+        found = None
+        for element in soup.select(selector):
+            text = element.get('alt', '') if element.name == 'img' else element.get_text()
+            if element.name == 'title':
+                text = text.split('|')[0].split('-')[0]
+            text = text.strip()
+            if text and 2 < len(text) < 100:
+                found = text
+                break
+        if found:
+            data['company_name'] = found
+            break
+
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc:
+        data['description'] = meta_desc.get('content', '').strip()
+
+    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', soup.get_text())
+    data['email'] = emails[0] if emails else None
+
+    text = soup.get_text()
+    for pattern in [r'\+39\s?\d{2,3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}',
+                    r'0\d{1,3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}',
+                    r'\d{3}[\s.-]?\d{3}[\s.-]?\d{4}']:
+        phones = re.findall(pattern, text)
+        if phones:
+            data['phone'] = phones[0]
+            break
+
+    for selector in ['.address', '.indirizzo', '.contact-info', '[itemprop="address"]', '.location']:
+        element = soup.select_one(selector)
+        if element:
+            data['address'] = element.get_text().strip()
+            break
+
+    contacts = []
+    sections = soup.find_all(['div', 'section'], class_=lambda x: x and any(
+        keyword in x.lower() for keyword in ['team', 'staff', 'contact', 'chi-siamo', 'about']
+    ))
+    for section in sections:
+        for email in re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', section.get_text()):
+            section_text = section.get_text()
+            title = soup.find('title')
+            contacts.append({
+                'email': email,
+                'context': section_text[:50],
+                'title': title.get_text().strip() if title else None
+            })
+
+    for script in soup(["script", "style"]):
+        script.decompose()
+    lines = (line.strip() for line in soup.get_text().splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    data['text'] = ' '.join(chunk for chunk in chunks if chunk)
+
+    return {'data': data, 'contacts': contacts, 'links': links}
+
+def single_pass_extract(html: str, backend: str) -> dict:
+    page = parse_page(html, backend)
+    return {
+        'data': extract_company_fields(page, ''),
+        'contacts': extract_contact_fields(page),
+        'links': page.links,
+        'text': page.text
+    }
+
+def measure(label, fn, pages, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for html in pages:
+            fn(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    pages_per_second = len(pages) / best if best else 0.0
+    print(f"  {label:<28} {pages_per_second:>9.1f} pagine/s  ({best * 1000 / len(pages):.2f} ms/pagina)")
+    return pages_per_second
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark estrazione HTML")
+    parser.add_argument("pages_dir", help="Directory con pagine HTML salvate")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    files = sorted(Path(args.pages_dir).glob("*.htm*"))
+    if not files:
+        print(f"❌ Nessuna pagina .html in {args.pages_dir}")
+        sys.exit(1)
+
+    pages = [path.read_text(encoding='utf-8', errors='replace') for path in files]
+    total_kb = sum(len(html.encode('utf-8')) for html in pages) / 1024
+    print(f"🚀 Benchmark estrazione: {len(pages)} pagine, {total_kb:.0f} KB, best of {args.repeats}\n")
+
+    baseline = measure("prima (html.parser, storico)", legacy_extract, pages, args.repeats)
+
+    seen = set()
+    for backend in (BACKEND_HTML_PARSER, BACKEND_LXML, BACKEND_SELECTOLAX):
+        effective = available_backend(backend)
+        if effective in seen:
+            print(f"  {backend:<28} non installato, salto")
+            continue
+        seen.add(effective)
+        result = measure(
+            f"dopo ({effective})",
+            lambda html, b=effective: single_pass_extract(html, b),
+            pages,
+            args.repeats
+        )
+        print(f"  {'':<28} speedup x{result / baseline:.2f}" if baseline else "")
+
+if __name__ == "__main__":
+    main()
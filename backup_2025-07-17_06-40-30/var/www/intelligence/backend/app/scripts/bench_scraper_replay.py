@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark dello scraper su un sito registrato (replay offline)
+
+Avvia un ReplayServer locale sull'archivio e misura pagine/s, latenza
+p95 e accuratezza di estrazione per IntelligenceWebScrapingEngine e
+per ScrapingService (v2). L'accuratezza usa expected.json nell'archivio:
+
+    {
+      "company": {"email": "...", "phone": "...", "address_city": "..."},
+      "titles": {"/": "Titolo home", "/contatti": "Contatti"}
+    }
+
+Uso:
+    python bench_scraper_replay.py /data/replay/example --latency-ms 80 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.services.web_scraping.metrics import percentile
+from app.services.web_scraping.models.scraped_data import ScrapedWebsiteModel
+from app.services.web_scraping.replay import ReplayServer, SiteArchive, archive_path
+from app.services.web_scraping.scraping_engine import IntelligenceWebScrapingEngine
+from app.services.web_scraping_v2.scraping_service import ScrapingService
+
+def normalize(value) -> str:
+    return ' '.join(str(value or '').lower().split())
+
+def accuracy(matches: int, total: int) -> str:
+    return f"{matches}/{total} ({matches / total:.0%})" if total else "n/d (nessun expected.json)"
+
+def company_matches(expected: dict, company) -> tuple:
+    if not expected:
+        return 0, 0
+    found = company.dict() if company else {}
+    matches = sum(1 for field, value in expected.items() if normalize(found.get(field)) == normalize(value))
+    return matches, len(expected)
+
+def title_matches(expected: dict, titles: dict) -> tuple:
+    matches = sum(1 for path, title in expected.items() if normalize(titles.get(path)) == normalize(title))
+    return matches, len(expected)
+
+async def bench_engine(server: ReplayServer, archive: SiteArchive, args) -> None:
+    website = ScrapedWebsiteModel(
+        url=f"{server.base_url}/",
+        max_depth=args.max_depth,
+        max_pages=len(archive.page_paths())
+    )
+    async with IntelligenceWebScrapingEngine(
+        rate_limit_delay=args.delay,
+        max_concurrent=args.concurrency,
+        render_mode="http"
+    ) as engine:
+        results = await engine.scrape_website(website)
+
+    expected = archive.expected()
+    companies = results['companies_found']
+    company = max(companies, key=lambda c: c.confidence_score) if companies else None
+    titles = {archive_path(page['url']): page['title'] for page in results['pages']}
+    company_ok, company_total = company_matches(expected.get('company', {}), company)
+    title_ok, title_total = title_matches(expected.get('titles', {}), titles)
+
+    print("🕷️ IntelligenceWebScrapingEngine")
+    print(f"  pagine            {results['pages_scraped']} in {results['duration_seconds']}s "
+          f"({results['pages_per_second']} pagine/s)")
+    print(f"  latenza fetch     p50 {results['metrics']['fetch_latency_p50_ms']} ms, "
+          f"p95 {results['metrics']['fetch_latency_p95_ms']} ms")
+    print(f"  status            {results['metrics']['statuses']}")
+    print(f"  accuratezza       azienda {accuracy(company_ok, company_total)}, "
+          f"titoli {accuracy(title_ok, title_total)}")
+
+def bench_scraping_service(server: ReplayServer, archive: SiteArchive, args) -> None:
+    service = ScrapingService()
+    paths = archive.page_paths()
+
+    def scrape(path):
+        started = time.perf_counter()
+        result = service.scrape_url(f"{server.base_url}{path}")
+        return path, result, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(scrape, paths))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, _, latency in outcomes]
+    succeeded = [(path, result) for path, result, _ in outcomes if result['success']]
+    titles = {path: result['data']['title'] for path, result in succeeded}
+    title_ok, title_total = title_matches(archive.expected().get('titles', {}), titles)
+
+    print("🧰 ScrapingService (v2)")
+    print(f"  pagine            {len(succeeded)}/{len(paths)} in {elapsed:.3f}s "
+          f"({len(succeeded) / elapsed if elapsed else 0:.2f} pagine/s)")
+    print(f"  latenza           p50 {percentile(latencies, 0.5):.2f} ms, p95 {percentile(latencies, 0.95):.2f} ms")
+    print(f"  accuratezza       titoli {accuracy(title_ok, title_total)}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper su replay offline")
+    parser.add_argument("archive_dir", help="Archivio creato con record_site.py")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latenza per risposta")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Latenza casuale aggiuntiva")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Frazione di errori iniettati")
+    parser.add_argument("--concurrency", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.0, help="rate_limit_delay del motore")
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    archive = SiteArchive.load(args.archive_dir)
+    if not archive.page_paths():
+        print(f"❌ Nessuna pagina registrata in {args.archive_dir}")
+        sys.exit(1)
+
+    print(f"🚀 Replay di {archive.origin}: {len(archive.page_paths())} pagine, "
+          f"latenza {args.latency_ms}+{args.jitter_ms} ms, errori {args.error_rate:.0%}\n")
+
+    async with ReplayServer(archive, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                            error_rate=args.error_rate, seed=args.seed) as server:
+        await bench_engine(server, archive, args)
+        print()
+        # ScrapingService e' sincrono (requests): gira in thread mentre il server serve sul loop
+        await asyncio.to_thread(bench_scraping_service, server, archive, args)
+        print(f"\n📼 Server: {server.stats}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Costruisce i vettori riassuntivi per documento (indice di primo livello
+della ricerca gerarchica) a partire da knowledge_documents.
+
+Usa gli embedding dei chunk gia' salvati in document_chunks.embedding_blob;
+solo i documenti senza embedding in cache vengono riassunti con una
+singola chiamata OpenAI sull'inizio del testo estratto.
+"""
+import asyncio
+import sys
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.modules.rag_engine.vector_codec import decode_vector
+from app.modules.rag_engine.vector_service import VectorRAGService
+
+SUMMARY_TEXT_CHARS = 8000
+
+async def build_summaries():
+    vector_service = VectorRAGService()
+    conn = vector_service._get_db_connection()
+    cursor = conn.cursor()
+
+    print("🚀 Costruzione sommari documento...")
+
+    cursor.execute("SELECT id, filename, extracted_text FROM knowledge_documents ORDER BY id")
+    documents = cursor.fetchall()
+
+    from_cache = 0
+    embedded = 0
+
+    for document_id, filename, extracted_text in documents:
+        cursor.execute(
+            "SELECT embedding_blob FROM document_chunks WHERE document_id = %s AND embedding_blob IS NOT NULL",
+            (document_id,)
+        )
+        blobs = [row[0] for row in cursor.fetchall()]
+
+        if blobs:
+            vectors = [decode_vector(blob) for blob in blobs]
+            from_cache += 1
+        elif extracted_text and len(extracted_text.strip()) >= 50:
+            vectors = [await vector_service.generate_embeddings(extracted_text[:SUMMARY_TEXT_CHARS])]
+            embedded += 1
+        else:
+            print(f"⚠️ Nessun contenuto: {filename}")
+            continue
+
+        vector_service.upsert_document_summary(
+            str(document_id), vectors, filename=filename, chunks_count=len(blobs)
+        )
+
+    conn.close()
+
+    print(f"\n📊 RISULTATI SOMMARI:")
+    print(f"✅ Da cache embedding: {from_cache}")
+    print(f"✅ Con nuovo embedding: {embedded}")
+
+if __name__ == "__main__":
+    asyncio.run(build_summaries())
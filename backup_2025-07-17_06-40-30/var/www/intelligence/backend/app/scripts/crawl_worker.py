@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Worker della frontiera di crawl distribuita
+
+Si possono avviare piu' processi, anche su host diversi, contro lo stesso DB.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.services.web_scraping.distributed_frontier import run_worker
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker della frontiera di crawl")
+    parser.add_argument("--domains", type=int, default=4, help="Domini lavorati in parallelo")
+    parser.add_argument("--batch-size", type=int, default=10, help="URL presi per lease di dominio")
+    parser.add_argument("--worker-id", default=None, help="Identificativo nei lease (default host:pid)")
+    parser.add_argument("--until-idle", action="store_true", help="Esce quando la frontiera e' vuota")
+    parser.add_argument("--no-vectorize", action="store_true", help="Non vettorizzare i documenti creati")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print("🗂️ Avvio crawl worker...")
+    asyncio.run(run_worker(
+        domains=args.domains,
+        batch_size=args.batch_size,
+        vectorize=not args.no_vectorize,
+        until_idle=args.until_idle,
+        worker_id=args.worker_id
+    ))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Arricchimento massivo delle aziende del CRM dal loro sito web
+
+Ripristinabile: rilanciando lo script vengono saltate le aziende
+gia' scrappate negli ultimi --days giorni.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.services.web_scraping.company_enrichment import run_enrichment
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arricchimento aziende da sito web")
+    parser.add_argument("--concurrency", type=int, default=8, help="Aziende in parallelo")
+    parser.add_argument("--per-domain", type=int, default=1, help="Aziende in parallelo sullo stesso dominio")
+    parser.add_argument("--batch-size", type=int, default=50, help="Righe per UPDATE batch")
+    parser.add_argument("--days", type=int, default=30, help="Riscrappa aziende piu' vecchie di N giorni")
+    parser.add_argument("--start-after-id", type=int, default=0, help="Riparti dopo questo id azienda")
+    parser.add_argument("--limit", type=int, default=None, help="Numero massimo di aziende")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print("🏭 Avvio arricchimento aziende...")
+    summary = asyncio.run(run_enrichment(
+        concurrency=args.concurrency,
+        per_domain=args.per_domain,
+        batch_size=args.batch_size,
+        rescrape_after_days=args.days,
+        start_after_id=args.start_after_id,
+        limit=args.limit
+    ))
+    print(f"✅ Completato: {summary['processed']} aziende, {summary['enriched']} arricchite, "
+          f"{summary['errors']} errori (ultimo id {summary['last_company_id']})")
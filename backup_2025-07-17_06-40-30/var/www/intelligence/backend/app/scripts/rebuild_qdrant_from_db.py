@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Ricostruisce la collection Qdrant dagli embedding salvati in PostgreSQL
+(document_chunks.embedding_blob) senza ri-generarli con OpenAI
+"""
+import sys
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.modules.rag_engine.vector_service import VectorRAGService
+
+def rebuild():
+    vector_service = VectorRAGService()
+
+    print("🚀 Ricostruzione Qdrant dalla cache embedding PostgreSQL...")
+    result = vector_service.rebuild_collection_from_database()
+
+    if result['success']:
+        print(f"✅ Punti ripristinati: {result['restored_points']}")
+        print(f"✅ Sommari documento: {result['restored_summaries']}")
+    else:
+        print(f"❌ Errore dopo {result['restored_points']} punti: {result['error']}")
+
+    stats = vector_service.get_stats()
+    print(f"📈 Total points in Qdrant: {stats.get('total_points')}")
+
+if __name__ == "__main__":
+    rebuild()
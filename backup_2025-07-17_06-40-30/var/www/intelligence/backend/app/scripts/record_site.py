@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Registra il crawl reale di un sito in un archivio locale per il replay
+
+Uso:
+    python record_site.py https://www.example.it /data/replay/example --max-pages 30
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.services.web_scraping.models.scraped_data import ScrapedWebsiteModel
+from app.services.web_scraping.replay import record_site
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registrazione di un sito per il replay offline")
+    parser.add_argument("url", help="URL iniziale del sito")
+    parser.add_argument("archive_dir", help="Directory dell'archivio")
+    parser.add_argument("--max-pages", type=int, default=30)
+    parser.add_argument("--max-depth", type=int, default=2)
+    parser.add_argument("--render-mode", default="auto", choices=["auto", "http", "playwright"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    website = ScrapedWebsiteModel(url=args.url, max_pages=args.max_pages, max_depth=args.max_depth)
+    archive = asyncio.run(record_site(website, args.archive_dir, render_mode=args.render_mode))
+    print(f"📼 {len(archive.page_paths())} pagine registrate in {args.archive_dir}")
+    print("   Aggiungi expected.json (company / titles) per misurare l'accuratezza")
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Re-scraping periodico dei siti con scraping_frequency diversa da on_demand
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+# Add backend to path
+sys.path.append('/var/www/intelligence/backend')
+
+from app.services.web_scraping.rescrape_scheduler import run_scheduler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-scraping periodico dei siti")
+    parser.add_argument("--interval", type=int, default=300, help="Secondi tra due giri")
+    parser.add_argument("--limit", type=int, default=10, help="Siti per giro")
+    parser.add_argument("--once", action="store_true", help="Un solo giro")
+    parser.add_argument("--no-vectorize", action="store_true", help="Non re-indicizzare i documenti cambiati")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print("⏰ Avvio scheduler re-scraping...")
+    asyncio.run(run_scheduler(
+        interval_seconds=args.interval,
+        limit=args.limit,
+        vectorize=not args.no_vectorize,
+        iterations=1 if args.once else None
+    ))
@@ -3,10 +3,23 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
 import psycopg2
+from psycopg2.extras import Json
 import os
 import logging
 from pathlib import Path
+from urllib.parse import urlparse
+
+from app.modules.rag_engine.kb_counters import bump_counters, read_counters
+from app.modules.rag_engine.vectorization_worker import get_vectorization_worker
+from app.services.web_scraping.html_extraction import extract_title_and_text
+from app.services.web_scraping.shared_resources import (
+    get_http_session,
+    pooled_connection,
+    run_in_parse_pool
+)
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -25,6 +38,29 @@ class ScrapeResponse(BaseModel):
     message: str
     filename: str = None
 
+class CrawlSiteRequest(BaseModel):
+    url: str
+    max_depth: int = 2
+    max_pages: int = 50
+    follow_external_links: bool = False
+    scraping_frequency: str = "on_demand"
+    company_id: int = None
+
+class CrawlSiteResponse(BaseModel):
+    success: bool
+    message: str
+    pages_scraped: int = 0
+    documents_created: int = 0
+    bytes_downloaded: int = 0
+    pages_per_second: float = 0.0
+    metrics: Optional[Dict[str, Any]] = None
+    errors: List[str] = []
+
+class CrawlJobResponse(BaseModel):
+    success: bool
+    message: str
+    job_id: Optional[int] = None
+
 # Database connection - SINGOLA DEFINIZIONE
 def get_db_connection():
     try:
@@ -41,23 +77,16 @@ def get_db_connection():
 
 @router.get("/knowledge-stats")
 async def get_knowledge_stats():
-    """Statistiche knowledge base REALI dal database - FIXED"""
+    """Statistiche knowledge base dai contatori materializzati (O(1))"""
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Query corrette senza errori sintassi
-        cursor.execute("SELECT COUNT(*) FROM knowledge_documents WHERE filename LIKE %s", ('%scraped_%',))
-        scraped_docs = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM knowledge_documents")
-        total_docs = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM document_chunks")
-        total_chunks = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM scraped_websites")
-        scraped_sites = cursor.fetchone()[0]
+        counters = read_counters(cursor)
+        scraped_docs = counters["scraped_documents"]
+        total_docs = counters["total_documents"]
+        total_chunks = counters["total_chunks"]
+        scraped_sites = counters["scraped_sites"]
         
         conn.close()
         
@@ -71,7 +100,7 @@ async def get_knowledge_stats():
             "scraped_sites": scraped_sites,
             "status": status,
             "last_update": datetime.utcnow().isoformat(),
-            "integration_status": "database_real_fixed",
+            "integration_status": "database_counters",
             "database_type": "postgresql"
         }
         
@@ -134,14 +163,23 @@ async def delete_scraped_url(request: dict):
         sites_deleted = cursor.rowcount
         
         # 2. Elimina TUTTI i documenti scraped (approccio semplice)
-        cursor.execute("SELECT id FROM knowledge_documents WHERE filename LIKE 'scraped_%'")
-        docs = cursor.fetchall()
-        docs_deleted = 0
-        
-        for (doc_id,) in docs:
-            cursor.execute("DELETE FROM document_chunks WHERE document_id = %s", (doc_id,))
-            cursor.execute("DELETE FROM knowledge_documents WHERE id = %s", (doc_id,))
-            docs_deleted += 1
+        cursor.execute("""
+            DELETE FROM document_chunks
+            WHERE document_id IN (SELECT id FROM knowledge_documents WHERE filename LIKE 'scraped_%')
+        """)
+        chunks_deleted = cursor.rowcount
+        
+        cursor.execute("DELETE FROM knowledge_documents WHERE filename LIKE 'scraped_%'")
+        docs_deleted = cursor.rowcount
+        
+        # 3. Contatori nella stessa transazione
+        bump_counters(
+            cursor,
+            scraped_sites=-sites_deleted,
+            total_documents=-docs_deleted,
+            scraped_documents=-docs_deleted,
+            total_chunks=-chunks_deleted
+        )
         
         conn.commit()
         conn.close()
@@ -156,36 +194,12 @@ async def delete_scraped_url(request: dict):
         logger.error(f"Delete error: {e}")
         return {"success": False, "message": f"Errore: {str(e)}"}
 
-@router.post("/scrape-url", response_model=ScrapeResponse)
-async def scrape_url(request: ScrapeUrlRequest):
-    """Scraping con vettorizzazione automatica"""
-    try:
-        import requests
-        from bs4 import BeautifulSoup
-        from datetime import datetime
-        from urllib.parse import urlparse
-        
-        # Scraping
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        response = requests.get(request.url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        title = soup.find('title').get_text().strip() if soup.find('title') else "No title"
-        
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        clean_text = soup.get_text()
-        lines = (line.strip() for line in clean_text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        clean_content = ' '.join(chunk for chunk in chunks if chunk)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"scraped_{timestamp}.html"
-        
-        # Salva database
-        conn = get_db_connection()
+def store_scraped_page(url: str, title: str, clean_content: str) -> tuple:
+    """Salva pagina e sito in una transazione (connessione dal pool, sincrono)"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    filename = f"scraped_{timestamp}.html"
+    
+    with pooled_connection() as conn:
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -195,43 +209,200 @@ async def scrape_url(request: ScrapeUrlRequest):
         
         doc_id = cursor.fetchone()[0]
         
-        parsed_url = urlparse(request.url)
         cursor.execute("""
             INSERT INTO scraped_websites (url, domain, title, status, last_scraped, created_at, updated_at)
             VALUES (%s, %s, %s, %s, NOW(), NOW(), NOW())
-        """, (request.url, parsed_url.netloc, title, "completed"))
+        """, (url, urlparse(url).netloc, title, "completed"))
         
-        conn.commit()
-        conn.close()
+        bump_counters(cursor, total_documents=1, scraped_documents=1, scraped_sites=1)
+    
+    return doc_id, filename
+
+@router.post("/scrape-url", response_model=ScrapeResponse)
+async def scrape_url(request: ScrapeUrlRequest):
+    """Scraping con vettorizzazione automatica (fetch, parsing e DB fuori dall'event loop)"""
+    try:
+        # Scraping
+        session = await get_http_session()
+        async with session.get(request.url) as response:
+            response.raise_for_status()
+            html = await response.text(errors='replace')
         
-        # VETTORIZZAZIONE AUTOMATICA
-        try:
-            import subprocess
-            subprocess.run([
-                "python", "/var/www/intelligence/backend/app/scripts/vectorize_html_from_db.py"
-            ], cwd="/var/www/intelligence/backend", timeout=60)
-        except Exception as e:
-            logger.warning(f"Vectorization failed: {e}")
+        title, clean_content = await run_in_parse_pool(extract_title_and_text, html)
+        
+        # Salva database
+        doc_id, filename = await asyncio.to_thread(store_scraped_page, request.url, title, clean_content)
+        await asyncio.to_thread(update_company_scraping_status, request.company_id, "completed")
+        
+        # VETTORIZZAZIONE AUTOMATICA: solo il nuovo documento, in background
+        if request.auto_rag:
+            await get_vectorization_worker().enqueue(doc_id)
         
         return ScrapeResponse(
             success=True,
-            message=f"Scraping + vettorizzazione completati: {title}",
+            message=f"Scraping completato, vettorizzazione in coda: {title}",
             filename=filename
         )
         
     except Exception as e:
         logger.error(f"Scraping error: {e}")
+        await asyncio.to_thread(update_company_scraping_status, request.company_id, "error")
         return ScrapeResponse(success=False, message=f"Errore: {str(e)}")
 
 def update_company_scraping_status(company_id: int, status: str):
     """Update company scraping status"""
     if company_id:
         try:
-            from app.core.database import get_db
-            from sqlalchemy import text
-            db = next(get_db())
-            db.execute(text("UPDATE companies SET scraping_status = :status WHERE id = :id"), 
-                      {"status": status, "id": company_id})
-            db.commit()
+            from app.services.web_scraping.shared_resources import pooled_connection
+            with pooled_connection() as conn:
+                conn.cursor().execute(
+                    "UPDATE companies SET scraping_status = %s WHERE id = %s",
+                    (status, company_id)
+                )
         except Exception as e:
             print(f"Error updating company status: {e}")
+
+@router.get("/vectorization-status")
+async def get_vectorization_status():
+    """Stato della coda di vettorizzazione in-process"""
+    return get_vectorization_worker().status()
+
+def store_crawled_site(url: str, website, results: Dict[str, Any]) -> tuple:
+    """
+    Salva pagine, sito e stati pagina di un crawl in una transazione
+    (connessione dal pool, sincrono: rollback e rilascio anche in caso di errore)
+    
+    Returns:
+        (documenti creati, id dei documenti)
+    """
+    from app.services.web_scraping.change_detection import PageStateStore, next_scrape_time
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    created_ids = []
+    states_by_url = {state.url: state for state in results['page_states']}
+    
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        
+        for index, page in enumerate(results['pages']):
+            if not page['text'] or len(page['text'].strip()) < 50:
+                continue
+            
+            cursor.execute("""
+                INSERT INTO knowledge_documents (filename, extracted_text, created_at, updated_at)
+                VALUES (%s, %s, NOW(), NOW()) RETURNING id
+            """, (f"scraped_{timestamp}_{index:03d}.html", page['text']))
+            document_id = cursor.fetchone()[0]
+            created_ids.append(document_id)
+            
+            if page['url'] in states_by_url:
+                states_by_url[page['url']].knowledge_document_id = document_id
+        
+        home_title = results['pages'][0]['title'] if results['pages'] else None
+        cursor.execute("""
+            INSERT INTO scraped_websites (url, domain, title, status, scraping_frequency,
+                                          next_scrape_scheduled, boilerplate_template,
+                                          last_scraped, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW())
+            RETURNING id
+        """, (
+            url, urlparse(url).netloc, home_title, "completed",
+            website.scraping_frequency.value, next_scrape_time(website.scraping_frequency),
+            Json(results['site_template'].to_dict()) if results['site_template'] else None
+        ))
+        website_id = cursor.fetchone()[0]
+        
+        # Stato pagine (ETag/Last-Modified/hash) per i re-scraping condizionali
+        PageStateStore.save(cursor, website_id, states_by_url.values())
+        
+        bump_counters(
+            cursor,
+            total_documents=len(created_ids),
+            scraped_documents=len(created_ids),
+            scraped_sites=1
+        )
+    
+    return len(created_ids), created_ids
+
+@router.post("/crawl-site", response_model=CrawlSiteResponse)
+async def crawl_site(request: CrawlSiteRequest):
+    """Crawling multi-pagina di un sito in un unico job"""
+    try:
+        from app.services.web_scraping.models.scraped_data import ScrapedWebsiteModel, ScrapingStatus
+        from app.services.web_scraping.scraping_engine import IntelligenceWebScrapingEngine
+        
+        website = ScrapedWebsiteModel(
+            url=request.url,
+            max_depth=request.max_depth,
+            max_pages=request.max_pages,
+            follow_external_links=request.follow_external_links,
+            scraping_frequency=request.scraping_frequency
+        )
+        
+        await asyncio.to_thread(update_company_scraping_status, request.company_id, "running")
+        async with IntelligenceWebScrapingEngine() as engine:
+            results = await engine.scrape_website(website)
+        
+        if results['status'] != ScrapingStatus.COMPLETED:
+            await asyncio.to_thread(update_company_scraping_status, request.company_id, "error")
+            return CrawlSiteResponse(
+                success=False,
+                message=f"Crawl fallito: {request.url}",
+                errors=results['errors']
+            )
+        
+        # Salva database: una transazione per tutto il sito, fuori dall'event loop
+        documents_created, created_ids = await asyncio.to_thread(store_crawled_site, request.url, website, results)
+        await asyncio.to_thread(update_company_scraping_status, request.company_id, "completed")
+        
+        worker = get_vectorization_worker()
+        for document_id in created_ids:
+            await worker.enqueue(document_id)
+        
+        return CrawlSiteResponse(
+            success=True,
+            message=f"Crawl completato: {results['pages_scraped']} pagine da {request.url}",
+            pages_scraped=results['pages_scraped'],
+            documents_created=documents_created,
+            bytes_downloaded=results['bytes_downloaded'],
+            pages_per_second=results['pages_per_second'],
+            metrics=results['metrics'],
+            errors=results['errors']
+        )
+        
+    except Exception as e:
+        logger.error(f"Crawl error: {e}")
+        await asyncio.to_thread(update_company_scraping_status, request.company_id, "error")
+        return CrawlSiteResponse(success=False, message=f"Errore: {str(e)}")
+
+@router.post("/crawl-jobs", response_model=CrawlJobResponse)
+async def create_crawl_job(request: CrawlSiteRequest):
+    """Accoda un crawl per i worker della frontiera distribuita (scripts/crawl_worker.py)"""
+    try:
+        from app.services.web_scraping.distributed_frontier import CrawlFrontierStore
+        
+        store = CrawlFrontierStore(get_db_connection)
+        job_id = await asyncio.to_thread(
+            store.create_job,
+            request.url,
+            max_depth=request.max_depth,
+            max_pages=request.max_pages,
+            follow_external_links=request.follow_external_links,
+            scraping_frequency=request.scraping_frequency,
+            company_id=request.company_id
+        )
+        return CrawlJobResponse(success=True, message=f"Crawl accodato: {request.url}", job_id=job_id)
+        
+    except Exception as e:
+        logger.error(f"Crawl job error: {e}")
+        return CrawlJobResponse(success=False, message=f"Errore: {str(e)}")
+
+@router.get("/crawl-jobs/{job_id}")
+async def get_crawl_job(job_id: int):
+    """Stato di un crawl accodato (pagine per stato della frontiera)"""
+    from app.services.web_scraping.distributed_frontier import CrawlFrontierStore
+    
+    status = await asyncio.to_thread(CrawlFrontierStore(get_db_connection).job_status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Crawl job non trovato")
+    return status
@@ -0,0 +1,162 @@
+"""
+🗜️ Blob store per l'HTML grezzo, indirizzato per contenuto
+
+L'HTML delle pagine non sta piu' nelle righe PostgreSQL: viene compresso
+(zstd, zlib se zstandard non e' installato) e salvato su disco locale in
+directory a due livelli, con chiave SHA-256 del contenuto. Il DB tiene
+solo l'hash. Pagine identiche condividono lo stesso file; un contatore
+di riferimenti decide quando il file puo' essere cancellato.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOB_DIR = os.getenv("SCRAPING_BLOB_DIR", "/var/www/intelligence/backend/data/html_blobs")
+CODEC_ZSTD = ".zst"
+CODEC_ZLIB = ".zlib"
+
+class BlobStore:
+    """
+    Blob compressi su disco con reference counting
+
+    Layout: <root>/<ab>/<cd>/<sha256><codec> e <sha256>.ref con il numero
+    di riferimenti. Le modifiche a un blob sono serializzate da un flock
+    sulla directory di shard (sicuro tra thread e processi).
+    """
+
+    def __init__(self, root: str = DEFAULT_BLOB_DIR, level: int = 3):
+        self.root = Path(root)
+        self.level = level
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+    # Compressione ---------------------------------------------------------
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Blob compresso con zstd ma zstandard non e' installato")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    # Percorsi -------------------------------------------------------------
+
+    def _shard(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4]
+
+    def _blob_path(self, key: str) -> Optional[Path]:
+        shard = self._shard(key)
+        for codec in (CODEC_ZSTD, CODEC_ZLIB):
+            path = shard / f"{key}{codec}"
+            if path.exists():
+                return path
+        return None
+
+    @contextmanager
+    def _locked(self, key: str):
+        shard = self._shard(key)
+        shard.mkdir(parents=True, exist_ok=True)
+        with open(shard / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield shard
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_refs(ref_path: Path) -> int:
+        try:
+            return int(ref_path.read_text().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # API ------------------------------------------------------------------
+
+    @staticmethod
+    def key_for(data: Union[str, bytes]) -> str:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def put(self, data: Union[str, bytes]) -> str:
+        """Salva il contenuto (se nuovo), aggiunge un riferimento e ritorna l'hash"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        key = self.key_for(data)
+
+        with self._locked(key) as shard:
+            if self._blob_path(key) is None:
+                self._write_atomic(shard / f"{key}{self.codec}", self._compress(data))
+            ref_path = shard / f"{key}.ref"
+            self._write_atomic(ref_path, str(self._read_refs(ref_path) + 1).encode())
+        return key
+
+    def get(self, key: str) -> Optional[str]:
+        """HTML decompresso, None se il blob non esiste"""
+        path = self._blob_path(key)
+        if path is None:
+            return None
+        return self._decompress(path.read_bytes(), path.suffix).decode("utf-8")
+
+    def release(self, key: str) -> bool:
+        """Toglie un riferimento; cancella il blob all'ultimo. True se cancellato"""
+        with self._locked(key) as shard:
+            ref_path = shard / f"{key}.ref"
+            refs = self._read_refs(ref_path) - 1
+            if refs > 0:
+                self._write_atomic(ref_path, str(refs).encode())
+                return False
+
+            path = self._blob_path(key)
+            if path is not None:
+                path.unlink()
+            ref_path.unlink(missing_ok=True)
+            return True
+
+    def references(self, key: str) -> int:
+        return self._read_refs(self._shard(key) / f"{key}.ref")
+
+    def stats(self) -> Dict[str, int]:
+        """Numero di blob e byte compressi su disco"""
+        blobs, size = 0, 0
+        for codec in (CODEC_ZSTD, CODEC_ZLIB):
+            for path in self.root.glob(f"*/*/*{codec}"):
+                blobs += 1
+                size += path.stat().st_size
+        return {'blobs': blobs, 'compressed_bytes': size}
+
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """Blob store condiviso del processo"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
@@ -0,0 +1,116 @@
+"""
+🧽 Rimozione del boilerplate di sito
+
+Menu, footer e banner cookie si ripetono su ogni pagina di un sito e
+finivano salvati e vettorizzati ogni volta. SiteTemplate conta in quante
+pagine del sito compare ogni segmento di testo (ParsedPage.segments):
+i segmenti presenti nella maggior parte delle pagine sono il template
+del sito e vengono tolti prima del salvataggio e del chunking.
+"""
+
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+MIN_PAGES = 3
+DEFAULT_RATIO = 0.6
+MAX_SAVED_FINGERPRINTS = 5000
+MAX_SAVED_URLS = 5000
+
+def segment_fingerprint(segment: str) -> str:
+    """Impronta di un segmento (minuscole, spazi compattati)"""
+    normalized = ' '.join(segment.lower().split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+class SiteTemplate:
+    """
+    Template di un sito: frequenza dei segmenti sulle pagine osservate
+
+    Un segmento e' boilerplate quando il sito ha almeno min_pages pagine
+    osservate e il segmento compare in almeno ratio di esse. Ogni URL conta
+    una volta sola: ri-scrapare la stessa pagina non trasforma il suo
+    contenuto in template.
+    """
+
+    def __init__(self, min_pages: int = MIN_PAGES, ratio: float = DEFAULT_RATIO,
+                 pages: int = 0, counts: Optional[Dict[str, int]] = None,
+                 urls: Optional[Iterable[str]] = None):
+        self.min_pages = min_pages
+        self.ratio = ratio
+        self.pages = pages
+        self.counts: Counter = Counter(counts or {})
+        self.urls = set(urls or ())
+
+    def observe(self, segments: Iterable[str], url: Optional[str] = None) -> bool:
+        """
+        Registra una pagina (ogni segmento contato una volta per pagina)
+
+        Returns:
+            False se l'URL era gia' stato osservato (pagina non contata)
+        """
+        if url:
+            url_key = segment_fingerprint(url)
+            if url_key in self.urls:
+                return False
+            self.urls.add(url_key)
+        self.counts.update({segment_fingerprint(segment) for segment in segments})
+        self.pages += 1
+        return True
+
+    def is_boilerplate(self, fingerprint: str) -> bool:
+        if self.pages < self.min_pages:
+            return False
+        return self.counts.get(fingerprint, 0) >= max(2, self.ratio * self.pages)
+
+    def clean(self, segments: List[str]) -> str:
+        """
+        Testo della pagina senza i segmenti di template
+
+        Se la pagina e' fatta solo di template resta il testo completo:
+        il contenuto non viene mai perso del tutto.
+        """
+        kept = [segment for segment in segments if not self.is_boilerplate(segment_fingerprint(segment))]
+        return ' '.join(kept or segments)
+
+    def boilerplate_count(self) -> int:
+        return sum(1 for fingerprint in self.counts if self.is_boilerplate(fingerprint))
+
+    def to_dict(self, max_entries: int = MAX_SAVED_FINGERPRINTS) -> Dict[str, Any]:
+        """Forma serializzabile (JSONB): solo i segmenti visti su piu' pagine"""
+        repeated = [(fingerprint, count) for fingerprint, count in self.counts.most_common(max_entries) if count > 1]
+        return {'pages': self.pages, 'counts': dict(repeated), 'urls': sorted(self.urls)[:MAX_SAVED_URLS]}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], **kwargs) -> "SiteTemplate":
+        data = data or {}
+        return cls(pages=data.get('pages', 0), counts=data.get('counts'), urls=data.get('urls'), **kwargs)
+
+class SiteTemplateRegistry:
+    """
+    Template per dominio in memoria, per gli scraping pagina-per-pagina
+
+    Il template si costruisce man mano: le prime pagine di un dominio
+    restano intere finche' non ne sono state viste min_pages.
+    """
+
+    def __init__(self, max_sites: int = 500):
+        self.max_sites = max_sites
+        self._templates: "OrderedDict[str, SiteTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def template(self, domain: str) -> SiteTemplate:
+        with self._lock:
+            template = self._templates.pop(domain, None) or SiteTemplate()
+            self._templates[domain] = template
+            while len(self._templates) > self.max_sites:
+                self._templates.popitem(last=False)
+            return template
+
+    def clean_page(self, domain: str, segments: List[str], url: Optional[str] = None) -> str:
+        template = self.template(domain)
+        with self._lock:
+            template.observe(segments, url)
+            return template.clean(segments)
+
+site_templates = SiteTemplateRegistry()
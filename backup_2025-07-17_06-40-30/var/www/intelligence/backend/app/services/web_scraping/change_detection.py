@@ -0,0 +1,144 @@
+"""
+🔁 Change detection per il re-scraping periodico
+
+- Stato per pagina (ETag, Last-Modified, hash del contenuto normalizzato)
+- Header per richieste condizionali (If-None-Match / If-Modified-Since)
+- Hash del testo visibile normalizzato: markup, script e spazi non contano
+- Calcolo del prossimo scraping da ScrapingFrequency
+"""
+
+import hashlib
+import html as html_lib
+import logging
+import re
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from psycopg2.extras import execute_values
+
+from app.services.web_scraping.fetching import visible_text
+from app.services.web_scraping.models.scraped_data import ScrapingFrequency
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_INTERVALS = {
+    ScrapingFrequency.DAILY: timedelta(days=1),
+    ScrapingFrequency.WEEKLY: timedelta(days=7),
+    ScrapingFrequency.MONTHLY: timedelta(days=30),
+}
+
+# Token volatili che cambiano a ogni richiesta senza cambiare il contenuto
+_VOLATILE_RE = re.compile(
+    r'\b[0-9a-f]{32,}\b'                     # token/nonce esadecimali
+    r'|©\s*\d{4}(?:\s*-\s*\d{4})?',          # anno nel copyright
+    re.I
+)
+
+def normalize_content(html: str) -> str:
+    """Testo visibile normalizzato (minuscolo, spazi compattati, token volatili rimossi)"""
+    text = html_lib.unescape(visible_text(html or ''))
+    text = _VOLATILE_RE.sub(' ', text.lower())
+    return ' '.join(text.split())
+
+def content_hash(html: str) -> str:
+    """SHA-256 del contenuto normalizzato"""
+    return hashlib.sha256(normalize_content(html).encode('utf-8')).hexdigest()
+
+def next_scrape_time(frequency: str, from_time: Optional[datetime] = None) -> Optional[datetime]:
+    """Prossimo scraping previsto; None per ON_DEMAND"""
+    try:
+        interval = FREQUENCY_INTERVALS.get(ScrapingFrequency(frequency))
+    except ValueError:
+        interval = None
+    if not interval:
+        return None
+    return (from_time or datetime.now()) + interval
+
+@dataclass
+class PageState:
+    """Ultimo stato noto di una pagina scrappata"""
+    url: str
+    depth: int = 1
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    knowledge_document_id: Optional[int] = None
+    last_checked_at: Optional[datetime] = None
+    last_changed_at: Optional[datetime] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Header per una GET condizionale"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def refreshed(self, etag: Optional[str], last_modified: Optional[str],
+                  new_hash: Optional[str] = None, depth: Optional[int] = None) -> 'PageState':
+        """Nuovo stato dopo un fetch; last_changed_at si aggiorna solo se l'hash cambia"""
+        now = datetime.now()
+        changed = new_hash is not None and new_hash != self.content_hash
+        return replace(
+            self,
+            depth=depth or self.depth,
+            etag=etag or self.etag,
+            last_modified=last_modified or self.last_modified,
+            content_hash=new_hash or self.content_hash,
+            last_checked_at=now,
+            last_changed_at=now if changed else self.last_changed_at
+        )
+
+class PageStateStore:
+    """Persistenza degli stati pagina in scraped_page_states"""
+
+    def __init__(self, connection_factory: Callable):
+        self._connect = connection_factory
+
+    def load_site(self, website_id: int) -> Dict[str, PageState]:
+        """Stati noti delle pagine di un sito, per URL"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT url, depth, etag, last_modified, content_hash,
+                       knowledge_document_id, last_checked_at, last_changed_at
+                FROM scraped_page_states
+                WHERE website_id = %s
+            """, (website_id,))
+            return {row[0]: PageState(*row) for row in cursor.fetchall()}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def save(cursor, website_id: int, states: Iterable[PageState]) -> int:
+        """Upsert degli stati con il cursore del chiamante (stessa transazione dei documenti)"""
+        rows = [
+            (
+                website_id, state.url, state.depth, state.etag, state.last_modified,
+                state.content_hash, state.knowledge_document_id,
+                state.last_checked_at or datetime.now(), state.last_changed_at
+            )
+            for state in states
+        ]
+        if not rows:
+            return 0
+
+        execute_values(cursor, """
+            INSERT INTO scraped_page_states (
+                website_id, url, depth, etag, last_modified, content_hash,
+                knowledge_document_id, last_checked_at, last_changed_at
+            ) VALUES %s
+            ON CONFLICT (website_id, url) DO UPDATE SET
+                depth = EXCLUDED.depth,
+                etag = EXCLUDED.etag,
+                last_modified = EXCLUDED.last_modified,
+                content_hash = EXCLUDED.content_hash,
+                knowledge_document_id = COALESCE(EXCLUDED.knowledge_document_id,
+                                                 scraped_page_states.knowledge_document_id),
+                last_checked_at = EXCLUDED.last_checked_at,
+                last_changed_at = EXCLUDED.last_changed_at
+        """, rows)
+        return len(rows)
@@ -0,0 +1,317 @@
+"""
+🏭 Arricchimento massivo delle aziende dal sito web
+
+- Seleziona le aziende con sito_web mai scrappato o scaduto (keyset su id)
+- Crawl concorrente con un unico motore: limite globale + limite per dominio
+- Scrittura dei risultati con UPDATE batch (execute_values)
+- Ripristinabile: le aziende gia' aggiornate escono dal filtro "da scrappare"
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from psycopg2.extras import execute_values
+
+from app.services.web_scraping.crawler import site_key
+from app.services.web_scraping.models.scraped_data import ScrapedWebsiteModel, ScrapingStatus
+
+logger = logging.getLogger(__name__)
+
+STATUS_COMPLETED = "completed"
+STATUS_NO_DATA = "no_data"
+STATUS_ERROR = "error"
+
+@dataclass
+class EnrichmentProgress:
+    """Avanzamento del job"""
+    total: int = 0
+    processed: int = 0
+    enriched: int = 0
+    no_data: int = 0
+    errors: int = 0
+    last_company_id: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.rate
+        return (self.total - self.processed) / rate if rate and self.total else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'processed': self.processed,
+            'enriched': self.enriched,
+            'no_data': self.no_data,
+            'errors': self.errors,
+            'last_company_id': self.last_company_id,
+            'companies_per_second': round(self.rate, 3),
+            'eta_seconds': round(self.eta_seconds) if self.eta_seconds is not None else None
+        }
+
+def normalize_website(sito_web: str) -> Optional[str]:
+    """sito_web del CRM -> URL http(s) valido"""
+    value = (sito_web or '').strip()
+    if not value:
+        return None
+    if '://' not in value:
+        value = f"https://{value}"
+    parsed = urlparse(value)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname or '.' not in parsed.hostname:
+        return None
+    return value
+
+class CompanyEnrichmentJob:
+    """
+    Job di arricchimento del parco aziende
+
+    Args:
+        connection_factory: funzione che ritorna una connessione psycopg2
+        engine_factory: crea il motore di scraping (context manager asincrono),
+            chiamato con max_concurrent=concurrency
+        concurrency: aziende in lavorazione contemporaneamente
+        per_domain: aziende contemporanee sullo stesso dominio
+        batch_size: righe per UPDATE batch
+        rescrape_after_days: aziende scrappate da meno giorni vengono saltate
+        max_pages: pagine per sito (home + contatti/chi siamo)
+    """
+
+    PAGE_SIZE = 500
+
+    def __init__(self, connection_factory: Callable, engine_factory: Callable,
+                 concurrency: int = 8, per_domain: int = 1, batch_size: int = 50,
+                 rescrape_after_days: int = 30, max_depth: int = 2, max_pages: int = 5,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 progress_every: int = 25):
+        self._connect = connection_factory
+        self._engine_factory = engine_factory
+        self.concurrency = concurrency
+        self.per_domain = per_domain
+        self.batch_size = batch_size
+        self.rescrape_after_days = rescrape_after_days
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.progress_callback = progress_callback
+        self.progress_every = progress_every
+
+        self.progress = EnrichmentProgress()
+        self._pending_updates: List[Tuple] = []
+        self._flush_lock = asyncio.Lock()
+        self._domain_slots: Dict[str, asyncio.Semaphore] = {}
+
+    # Selezione ------------------------------------------------------------
+
+    _DUE_CONDITION = """
+        sito_web IS NOT NULL AND sito_web <> ''
+        AND (last_scraped_at IS NULL OR last_scraped_at < NOW() - make_interval(days => %s))
+    """
+
+    def count_due(self, after_id: int = 0) -> int:
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT COUNT(*) FROM companies WHERE id > %s AND {self._DUE_CONDITION}",
+                (after_id, self.rescrape_after_days)
+            )
+            return cursor.fetchone()[0]
+        finally:
+            conn.close()
+
+    def due_companies(self, after_id: int, limit: int) -> List[Tuple[int, str, str]]:
+        """Pagina keyset di aziende da arricchire: (id, name, sito_web)"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, name, sito_web
+                FROM companies
+                WHERE id > %s AND {self._DUE_CONDITION}
+                ORDER BY id
+                LIMIT %s
+            """, (after_id, self.rescrape_after_days, limit))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    # Scrittura batch ------------------------------------------------------
+
+    def _write_updates(self, rows: List[Tuple]) -> int:
+        """
+        UPDATE batch: i campi di contatto vengono riempiti solo se vuoti nel CRM
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                UPDATE companies AS c SET
+                    email = COALESCE(NULLIF(c.email, ''), v.email),
+                    telefono = COALESCE(NULLIF(c.telefono, ''), v.telefono),
+                    indirizzo = COALESCE(NULLIF(c.indirizzo, ''), v.indirizzo),
+                    citta = COALESCE(NULLIF(c.citta, ''), v.citta),
+                    cap = COALESCE(NULLIF(c.cap, ''), v.cap),
+                    scraping_status = v.status,
+                    last_scraped_at = NOW()
+                FROM (VALUES %s) AS v(id, email, telefono, indirizzo, citta, cap, status)
+                WHERE c.id = v.id
+            """, rows, template="(%s::bigint, %s::text, %s::text, %s::text, %s::text, %s::text, %s::text)")
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    async def _queue_update(self, row: Tuple):
+        self._pending_updates.append(row)
+        if len(self._pending_updates) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Scrive gli aggiornamenti accumulati"""
+        async with self._flush_lock:
+            rows, self._pending_updates = self._pending_updates, []
+            if rows:
+                await asyncio.to_thread(self._write_updates, rows)
+
+    # Crawl ----------------------------------------------------------------
+
+    def _domain_slot(self, url: str) -> asyncio.Semaphore:
+        return self._domain_slots.setdefault(site_key(url), asyncio.Semaphore(self.per_domain))
+
+    @staticmethod
+    def _best_company(results: Dict[str, Any]):
+        companies = results.get('companies_found') or []
+        return max(companies, key=lambda company: company.confidence_score) if companies else None
+
+    async def _enrich_company(self, engine, company_id: int, name: str, sito_web: str) -> Tuple:
+        url = normalize_website(sito_web)
+        if not url:
+            logger.warning(f"⚠️ Invalid website for company {company_id} ({name}): {sito_web!r}")
+            return (company_id, None, None, None, None, None, STATUS_ERROR)
+
+        website = ScrapedWebsiteModel(
+            url=url,
+            company_name=name,
+            max_depth=self.max_depth,
+            max_pages=self.max_pages
+        )
+
+        async with self._domain_slot(url):
+            results = await engine.scrape_website(website)
+
+        if results['status'] != ScrapingStatus.COMPLETED:
+            return (company_id, None, None, None, None, None, STATUS_ERROR)
+
+        company = self._best_company(results)
+        if not company:
+            return (company_id, None, None, None, None, None, STATUS_NO_DATA)
+
+        return (
+            company_id,
+            company.email,
+            company.phone,
+            company.address_street,
+            company.address_city,
+            company.address_zip,
+            STATUS_COMPLETED
+        )
+
+    def _record(self, row: Tuple):
+        status = row[-1]
+        self.progress.processed += 1
+        if status == STATUS_COMPLETED:
+            self.progress.enriched += 1
+        elif status == STATUS_NO_DATA:
+            self.progress.no_data += 1
+        else:
+            self.progress.errors += 1
+
+        if self.progress.processed % self.progress_every == 0 or self.progress.processed == self.progress.total:
+            snapshot = self.progress.as_dict()
+            logger.info(
+                f"🏭 Enrichment {snapshot['processed']}/{snapshot['total']} "
+                f"({snapshot['enriched']} enriched, {snapshot['errors']} errors, "
+                f"{snapshot['companies_per_second']}/s, ETA {snapshot['eta_seconds']}s)"
+            )
+            if self.progress_callback:
+                self.progress_callback(snapshot)
+
+    async def run(self, start_after_id: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Esegue il job fino a esaurimento (o limit aziende)
+
+        Ripresa: rilanciare il job salta le aziende gia' aggiornate;
+        start_after_id permette di ripartire da un id preciso.
+        """
+        total = await asyncio.to_thread(self.count_due, start_after_id)
+        self.progress = EnrichmentProgress(total=min(total, limit) if limit else total)
+        logger.info(f"🏭 Company enrichment: {self.progress.total} companies due")
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def producer():
+            after_id, queued = start_after_id, 0
+            while limit is None or queued < limit:
+                page_size = self.PAGE_SIZE if limit is None else min(self.PAGE_SIZE, limit - queued)
+                rows = await asyncio.to_thread(self.due_companies, after_id, page_size)
+                if not rows:
+                    break
+                for row in rows:
+                    await queue.put(row)
+                queued += len(rows)
+                after_id = rows[-1][0]
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def worker(engine):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                company_id, name, sito_web = item
+                try:
+                    row = await self._enrich_company(engine, company_id, name, sito_web)
+                except Exception as e:
+                    logger.error(f"❌ Enrichment failed for company {company_id}: {e}")
+                    row = (company_id, None, None, None, None, None, STATUS_ERROR)
+                self.progress.last_company_id = max(self.progress.last_company_id, company_id)
+                self._record(row)
+                await self._queue_update(row)
+
+        async with self._engine_factory(max_concurrent=self.concurrency) as engine:
+            try:
+                await asyncio.gather(producer(), *(worker(engine) for _ in range(self.concurrency)))
+            finally:
+                await self.flush()
+
+        summary = self.progress.as_dict()
+        logger.info(f"✅ Company enrichment completed: {summary}")
+        return summary
+
+async def run_enrichment(concurrency: int = 8, per_domain: int = 1, batch_size: int = 50,
+                         rescrape_after_days: int = 30, start_after_id: int = 0,
+                         limit: Optional[int] = None) -> Dict[str, Any]:
+    """Entry point del job con connessioni e motore di default"""
+    from app.services.web_scraping.api_routes_working import get_db_connection
+    from app.services.web_scraping.scraping_engine import IntelligenceWebScrapingEngine
+
+    job = CompanyEnrichmentJob(
+        get_db_connection,
+        IntelligenceWebScrapingEngine,
+        concurrency=concurrency,
+        per_domain=per_domain,
+        batch_size=batch_size,
+        rescrape_after_days=rescrape_after_days
+    )
+    return await job.run(start_after_id=start_after_id, limit=limit)
@@ -0,0 +1,206 @@
+"""
+🚧 Filtro dei contenuti prima dell'embedding
+
+Controlli locali ed economici (niente modelli, niente rete) sul testo
+delle pagine scrappate, prima di chunking ed embedding:
+- lingua: stopword per lingua, solo le lingue ammesse passano
+- pagine a basso valore: errori (404, 403, 5xx), cookie wall, login,
+  "abilita JavaScript" / captcha
+- densita' informativa: varieta' lessicale, parole vere, righe ripetute
+
+Ogni scarto ha un motivo, da loggare: il gate e' conservativo e nel dubbio
+lascia passare.
+"""
+
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+ALLOWED_LANGUAGES = tuple(
+    code.strip() for code in os.getenv("RAG_ALLOWED_LANGUAGES", "it,en").split(",") if code.strip()
+)
+
+STOPWORDS: Dict[str, frozenset] = {
+    'it': frozenset("il lo la i gli le di da in con su per tra fra un una uno del della dei delle degli "
+                    "al alla ai alle nel nella nei sono che non e è anche come più questo questa siamo "
+                    "nostro nostra nostri vostro ci si ha hanno essere".split()),
+    'en': frozenset("the of and to in is that for it with as was on be by this are from or an at "
+                    "which have has not we our you your they their will can all more about".split()),
+    'de': frozenset("der die das und ist nicht ein eine zu den von mit sich des auf für im dem "
+                    "auch es an werden aus er sie wir ihre unsere oder bei".split()),
+    'fr': frozenset("le la les de des du et est un une que qui pour dans en sur pas au aux avec "
+                    "ce cette nous vous sont plus par ou leur notre votre".split()),
+    'es': frozenset("el la los las de del y que en un una es por con para no se su al lo como "
+                    "más pero sus nuestro nuestra somos este esta".split()),
+    'pt': frozenset("o a os as de do da dos das e que em um uma é por com para não se seu sua "
+                    "ao mais como nosso nossa somos este esta".split()),
+    'nl': frozenset("de het een en van in is dat op te voor met zijn niet aan er ook als bij "
+                    "door wij onze uw ze".split()),
+}
+
+# Pagine d'errore: nel titolo bastano, nel testo solo se la pagina e' corta
+ERROR_PATTERNS = re.compile(
+    r"\b(?:404|403|500|502|503)\b.{0,40}\b(?:not found|non trovat[ao]|forbidden|error|errore|unavailable)\b"
+    r"|pagina non trovata|page not found|pagina inesistente|nessun risultato trovato"
+    r"|access denied|accesso negato|service unavailable|servizio non disponibile"
+    r"|la pagina che stai cercando|the page you (?:are|were) looking for",
+    re.IGNORECASE
+)
+COOKIE_PATTERNS = re.compile(
+    r"cookie|accetta tutt[io]|accept all|rifiuta tutt[io]|reject all|consenso|consent|gdpr|preferenze",
+    re.IGNORECASE
+)
+# Prove di un form di login: gruppi di termini distinti, non parole singole
+# ("accedi", "password" compaiono anche nei footer delle pagine contatti)
+LOGIN_TERMS = (
+    re.compile(r"\bpassword\b", re.IGNORECASE),
+    re.compile(r"\b(?:username|nome utente|user ?name)\b", re.IGNORECASE),
+    re.compile(r"\b(?:ricordami|remember me|resta collegato|keep me signed in)\b", re.IGNORECASE),
+    re.compile(r"\b(?:password dimenticata|hai dimenticato la password|forgot (?:your )?password)\b", re.IGNORECASE),
+    re.compile(r"\b(?:login|log in|sign in|accedi)\b", re.IGNORECASE),
+    # "registrati" da solo e' anche participio ("clienti registrati")
+    re.compile(r"\b(?:registrati (?:ora|subito|gratis)|non hai (?:ancora )?un account|sign up"
+               r"|crea (?:un )?account|create (?:an )?account)\b", re.IGNORECASE),
+)
+# Il titolo da solo non basta: serve anche un termine del form nel testo
+LOGIN_TITLE_RE = re.compile(r"\b(?:login|log in|sign in|accedi|area riservata)\b", re.IGNORECASE)
+LOGIN_MIN_TERMS = 4
+BLOCKED_PATTERNS = re.compile(
+    r"enable javascript|abilita(?:re)? javascript|javascript (?:is )?(?:required|disabled)"
+    r"|checking your browser|verify you are (?:a )?human|captcha|ddos protection|attention required",
+    re.IGNORECASE
+)
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?", re.UNICODE)
+_TOKEN_RE = re.compile(r"\S+")
+
+SHORT_PAGE_WORDS = 150
+
+@dataclass
+class GateDecision:
+    accepted: bool
+    reason: Optional[str] = None
+    language: Optional[str] = None
+    language_confidence: float = 0.0
+    density: float = 0.0
+
+def detect_language(text: str, sample_words: int = 2000) -> Tuple[Optional[str], float]:
+    """
+    Lingua per conteggio di stopword
+
+    Returns:
+        (codice, confidenza 0..1); (None, 0.0) se il testo e' troppo corto
+        o senza stopword riconosciute
+    """
+    words = [word.lower() for word in _WORD_RE.findall(text[:sample_words * 12])][:sample_words]
+    if len(words) < 20:
+        return None, 0.0
+
+    hits = Counter()
+    for word in words:
+        for language, stopwords in STOPWORDS.items():
+            if word in stopwords:
+                hits[language] += 1
+
+    if not hits:
+        return None, 0.0
+    language, count = hits.most_common(1)[0]
+    # Share tra le lingue (le stopword comuni come "de", "la" pesano su piu' lingue)
+    confidence = count / sum(hits.values())
+    # Troppo poche stopword per la lunghezza: elenchi, codici, nomi propri
+    if count / len(words) < 0.05:
+        return None, 0.0
+    return language, round(confidence, 3)
+
+def information_density(text: str) -> float:
+    """
+    Densita' informativa 0..1
+
+    Media di: varieta' lessicale (sui primi 1000 vocaboli), quota di parole
+    vere tra i token e quota di righe non ripetute.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return 0.0
+
+    words = [word.lower() for word in _WORD_RE.findall(text)]
+    sample = words[:1000]
+    variety = len(set(sample)) / len(sample) if sample else 0.0
+    # Un testo normale ha varieta' ~0.4-0.7: oltre 0.5 e' pieno punteggio
+    variety = min(variety / 0.5, 1.0)
+
+    wordiness = min(len(words) / len(tokens), 1.0)
+
+    lines = [line.strip().lower() for line in text.splitlines() if line.strip()]
+    unique_lines = len(set(lines)) / len(lines) if lines else 1.0
+
+    return round((variety + wordiness + unique_lines) / 3, 3)
+
+def _pattern_share(pattern: re.Pattern, text: str, words: int) -> float:
+    return len(pattern.findall(text)) / max(words, 1)
+
+def classify_low_value(text: str, title: Optional[str] = None) -> Optional[str]:
+    """Motivo di scarto per pagine d'errore / cookie wall / login / bloccate, None se ok"""
+    title = title or ''
+    words = len(_WORD_RE.findall(text))
+
+    if ERROR_PATTERNS.search(title):
+        return "error_page"
+    if BLOCKED_PATTERNS.search(title) or (words < SHORT_PAGE_WORDS and BLOCKED_PATTERNS.search(text)):
+        return "blocked_or_js_required"
+
+    if words < SHORT_PAGE_WORDS:
+        if ERROR_PATTERNS.search(text):
+            return "error_page"
+        # Pagina corta fatta soprattutto di banner cookie / form di login
+        if _pattern_share(COOKIE_PATTERNS, text, words) > 0.05:
+            return "cookie_wall"
+        login_terms = sum(1 for term in LOGIN_TERMS if term.search(text))
+        if login_terms >= LOGIN_MIN_TERMS or (login_terms and LOGIN_TITLE_RE.search(title)):
+            return "login_form"
+    return None
+
+class ContentGate:
+    """
+    Args:
+        allowed_languages: lingue ammesse (testo di lingua non riconosciuta passa)
+        min_words: parole minime
+        min_density: densita' informativa minima
+        min_language_confidence: sotto questa soglia la lingua non basta a scartare
+    """
+
+    def __init__(self, allowed_languages: Iterable[str] = ALLOWED_LANGUAGES, min_words: int = 30,
+                 min_density: float = 0.45, min_language_confidence: float = 0.5):
+        self.allowed_languages = set(allowed_languages)
+        self.min_words = min_words
+        self.min_density = min_density
+        self.min_language_confidence = min_language_confidence
+
+    def evaluate(self, text: Optional[str], title: Optional[str] = None) -> GateDecision:
+        if not text or not text.strip():
+            return GateDecision(False, "empty")
+
+        words = len(_WORD_RE.findall(text))
+        if words < self.min_words:
+            return GateDecision(False, f"too_few_words ({words})")
+
+        reason = classify_low_value(text, title)
+        if reason:
+            return GateDecision(False, reason)
+
+        language, confidence = detect_language(text)
+        density = information_density(text)
+        decision = GateDecision(True, None, language, confidence, density)
+
+        if (language and self.allowed_languages and language not in self.allowed_languages
+                and confidence >= self.min_language_confidence):
+            decision.accepted = False
+            decision.reason = f"language_{language}"
+        elif density < self.min_density:
+            decision.accepted = False
+            decision.reason = f"low_density ({density})"
+        return decision
+
+content_gate = ContentGate()
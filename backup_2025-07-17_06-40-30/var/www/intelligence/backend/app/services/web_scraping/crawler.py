@@ -0,0 +1,148 @@
+"""
+🧭 Crawl frontier per lo scraping multi-pagina
+
+- Normalizzazione URL (schema/host minuscoli, niente fragment, porte di
+  default e parametri di tracking rimossi, query ordinata)
+- Seen-set per non visitare due volte la stessa pagina
+- Profondita' e limite pagine per sito
+- Coda a priorita': pagine aziendali (contatti, chi siamo...) prima,
+  anche se scoperte piu' in profondita' (sitemaps.url_priority)
+
+La politeness per dominio e' in rate_control.AdaptiveRateController.
+"""
+
+import heapq
+import itertools
+from typing import Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from app.services.web_scraping.sitemaps import url_priority
+
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', '_ga', 'ref'}
+
+SKIPPED_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.bmp',
+    '.css', '.js', '.json', '.xml', '.rss', '.zip', '.rar', '.gz', '.7z',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.woff', '.woff2', '.ttf', '.eot',
+    '.exe', '.dmg', '.iso'
+)
+
+def normalize_url(url: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Normalizza un URL (eventualmente relativo a base_url)
+
+    Returns:
+        URL canonico oppure None se non e' una pagina http(s) da visitare
+    """
+    if not url:
+        return None
+
+    url = url.strip()
+    if url.startswith(('mailto:', 'tel:', 'javascript:', 'data:', '#')):
+        return None
+
+    if base_url:
+        url = urljoin(base_url, url)
+
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    if scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+
+    host = parsed.hostname.lower()
+    port = parsed.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+
+    path = parsed.path or '/'
+    if path.lower().endswith(SKIPPED_EXTENSIONS):
+        return None
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ))
+
+    return urlunparse((scheme, host, path, '', query, ''))
+
+def site_key(url: str) -> str:
+    """Host senza 'www.' per confrontare pagine dello stesso sito"""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+class CrawlFrontier:
+    """
+    Frontiera a priorita' di un singolo crawl
+
+    La profondita' parte da 1 (pagina iniziale), coerente con
+    ScrapedWebsiteModel.max_depth: max_depth=1 visita solo l'URL iniziale.
+    L'ordine e' priorita' - profondita': a parita' di punteggio resta una
+    BFS, ma /contatti a profondita' 3 passa davanti a un articolo a 2.
+    """
+
+    def __init__(self, start_url: str, max_depth: int = 1, max_pages: int = 50,
+                 follow_external_links: bool = False):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.follow_external_links = follow_external_links
+        self.start_url = normalize_url(start_url) or start_url
+        self.site = site_key(self.start_url)
+
+        self.seen = set()
+        self._queue: list = []
+        self._order = itertools.count()
+        self.enqueued = 0
+
+        self.add(self.start_url, 1, priority=float('inf'))
+
+    def allows(self, url: str) -> bool:
+        """True se l'URL e' nello scope del crawl"""
+        return self.follow_external_links or site_key(url) == self.site
+
+    def add(self, url: str, depth: int, base_url: Optional[str] = None,
+            priority: Optional[float] = None) -> bool:
+        """
+        Aggiunge un URL se nuovo, nello scope e dentro i limiti
+
+        Args:
+            priority: punteggio della pagina; None = url_priority(url)
+        """
+        if depth > self.max_depth or self.enqueued >= self.max_pages:
+            return False
+
+        normalized = normalize_url(url, base_url)
+        if not normalized or normalized in self.seen or not self.allows(normalized):
+            return False
+
+        if priority is None:
+            priority = url_priority(normalized)
+        self.seen.add(normalized)
+        heapq.heappush(self._queue, (depth - priority, next(self._order), normalized, depth))
+        self.enqueued += 1
+        return True
+
+    def add_links(self, links: Iterable[str], parent_url: str, parent_depth: int) -> int:
+        """
+        Aggiunge i link trovati su una pagina; ritorna quanti sono nuovi
+
+        I link sono ordinati per priorita' prima di entrare: se max_pages
+        taglia, restano fuori i meno utili e non gli ultimi della pagina.
+        """
+        if parent_depth >= self.max_depth:
+            return 0
+        ranked = sorted(
+            ((url, url_priority(url)) for url in (normalize_url(link, parent_url) for link in links) if url),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return sum(1 for url, priority in ranked if self.add(url, parent_depth + 1, priority=priority))
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Prossimo (url, depth) da visitare"""
+        if not self._queue:
+            return None
+        _, _, url, depth = heapq.heappop(self._queue)
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self._queue)
@@ -0,0 +1,718 @@
+"""
+🗂️ Frontiera di crawl distribuita su PostgreSQL
+
+I crawl non girano nel processo API: /crawl-jobs accoda un job e N processi
+crawl_worker (anche su host diversi) consumano la frontiera.
+
+- crawl_jobs: un job per sito, con i limiti di profondita' e pagine
+- crawl_frontier: un URL per riga, preso con FOR UPDATE SKIP LOCKED
+- crawl_domain_leases: un solo worker alla volta per dominio (site_key:
+  www.example.it ed example.it sono lo stesso host); alla
+  consegna resta l'intervallo AIMD, cosi' il worker successivo non
+  riparte da zero
+
+Lease scaduti (worker morto) rimettono gli URL in coda; i fetch falliti
+per errori transitori (rete, 429, 5xx) sono ritentati con backoff.
+Il worker che chiude un job toglie il boilerplate e salva documenti e
+stato del sito in una transazione.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from psycopg2.extras import Json, execute_values
+
+from app.modules.rag_engine.kb_counters import bump_counters
+from app.services.web_scraping.boilerplate import SiteTemplate
+from app.services.web_scraping.change_detection import PageState, PageStateStore, next_scrape_time
+from app.services.web_scraping.crawler import normalize_url, site_key
+from app.services.web_scraping.models.scraped_data import ScrapedWebsiteModel, ScrapingFrequency
+from app.services.web_scraping.sitemaps import url_priority
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = int(os.getenv("CRAWL_LEASE_SECONDS", "120"))
+MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = 30
+MIN_TEXT_LENGTH = 50
+
+def is_retryable(status) -> bool:
+    """Errori transitori: rete/timeout, 429, 5xx"""
+    return not isinstance(status, int) or status == 429 or status >= 500
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+@dataclass
+class CrawlJob:
+    id: int
+    url: str
+    max_depth: int
+    max_pages: int
+    follow_external_links: bool = False
+    respect_robots_txt: bool = True
+    scraping_frequency: str = ScrapingFrequency.ON_DEMAND.value
+    company_id: Optional[int] = None
+
+    def website(self) -> ScrapedWebsiteModel:
+        return ScrapedWebsiteModel(
+            url=self.url,
+            max_depth=self.max_depth,
+            max_pages=self.max_pages,
+            follow_external_links=self.follow_external_links,
+            respect_robots_txt=self.respect_robots_txt,
+            scraping_frequency=self.scraping_frequency
+        )
+
+@dataclass
+class FrontierItem:
+    id: int
+    url: str
+    depth: int
+    attempts: int
+    job: CrawlJob
+
+class CrawlFrontierStore:
+    """
+    Operazioni sulla frontiera (sincrone, da chiamare con asyncio.to_thread)
+
+    Args:
+        connection_factory: funzione che ritorna una connessione psycopg2
+        worker_id: identificativo del worker nei lease
+    """
+
+    def __init__(self, connection_factory: Callable, worker_id: Optional[str] = None,
+                 lease_seconds: int = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self._connect = connection_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # Job ------------------------------------------------------------------
+
+    def create_job(self, url: str, max_depth: int = 2, max_pages: int = 50,
+                   follow_external_links: bool = False, respect_robots_txt: bool = True,
+                   scraping_frequency: str = ScrapingFrequency.ON_DEMAND.value,
+                   company_id: Optional[int] = None) -> int:
+        """Accoda un crawl: job + URL iniziale nella frontiera (e azienda in 'running')"""
+        start_url = normalize_url(url) or url
+        with self._transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO crawl_jobs (url, max_depth, max_pages, follow_external_links,
+                                        respect_robots_txt, scraping_frequency, company_id, status,
+                                        pages_enqueued, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, 'running', 1, NOW(), NOW())
+                RETURNING id
+            """, (start_url, max_depth, max_pages, follow_external_links,
+                  respect_robots_txt, scraping_frequency, company_id))
+            job_id = cursor.fetchone()[0]
+            if company_id:
+                cursor.execute("UPDATE companies SET scraping_status = 'running' WHERE id = %s", (company_id,))
+            cursor.execute("""
+                INSERT INTO crawl_frontier (job_id, url, domain, depth, status, available_at, created_at, updated_at)
+                VALUES (%s, %s, %s, 1, 'pending', NOW(), NOW(), NOW())
+            """, (job_id, start_url, site_key(start_url)))
+        logger.info(f"🗂️ Crawl job {job_id} queued: {start_url}")
+        return job_id
+
+    def job_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._transaction() as cursor:
+            cursor.execute("""
+                SELECT url, status, pages_enqueued, website_id, created_at, completed_at, last_error
+                FROM crawl_jobs WHERE id = %s
+            """, (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("""
+                SELECT status, COUNT(*) FROM crawl_frontier WHERE job_id = %s GROUP BY status
+            """, (job_id,))
+            pages = dict(cursor.fetchall())
+
+        return {
+            'job_id': job_id,
+            'url': row[0],
+            'status': row[1],
+            'pages_enqueued': row[2],
+            'website_id': row[3],
+            'created_at': row[4],
+            'completed_at': row[5],
+            'error': row[6],
+            'pages': pages
+        }
+
+    def is_idle(self) -> bool:
+        """Nessun URL in coda o in lavorazione e nessun job da chiudere"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                SELECT EXISTS (SELECT 1 FROM crawl_frontier WHERE status IN ('pending', 'in_progress'))
+                    OR EXISTS (SELECT 1 FROM crawl_jobs WHERE status IN ('running', 'finalizing'))
+            """)
+            return not cursor.fetchone()[0]
+
+    # Lease per dominio ----------------------------------------------------
+
+    def claim_domain(self, attempts: int = 5) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Prende il lease di un dominio con URL pronti
+
+        Returns:
+            (dominio, intervallo lasciato dal worker precedente) oppure None
+        """
+        tried: List[str] = []
+        for _ in range(attempts):
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    SELECT f.domain
+                    FROM crawl_frontier f
+                    LEFT JOIN crawl_domain_leases l ON l.domain = f.domain
+                    WHERE f.status = 'pending'
+                      AND f.available_at <= NOW()
+                      AND (l.domain IS NULL OR l.lease_expires_at <= NOW())
+                      AND NOT (f.domain = ANY(%s))
+                    ORDER BY f.available_at, f.id
+                    LIMIT 1
+                    FOR UPDATE OF f SKIP LOCKED
+                """, (tried,))
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                domain = row[0]
+
+                # Due worker sullo stesso dominio: l'upsert condizionale ne fa vincere uno
+                cursor.execute("""
+                    INSERT INTO crawl_domain_leases (domain, owner, lease_expires_at)
+                    VALUES (%s, %s, NOW() + make_interval(secs => %s))
+                    ON CONFLICT (domain) DO UPDATE
+                        SET owner = EXCLUDED.owner, lease_expires_at = EXCLUDED.lease_expires_at
+                        WHERE crawl_domain_leases.lease_expires_at <= NOW()
+                    RETURNING interval_seconds
+                """, (domain, self.worker_id, self.lease_seconds))
+                lease = cursor.fetchone()
+            if lease is not None:
+                return domain, lease[0]
+            tried.append(domain)
+        return None
+
+    def renew_domain(self, domain: str) -> bool:
+        """Estende il lease del dominio e dei suoi URL in lavorazione; False se perso"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_domain_leases
+                SET lease_expires_at = NOW() + make_interval(secs => %s)
+                WHERE domain = %s AND owner = %s
+            """, (self.lease_seconds, domain, self.worker_id))
+            if cursor.rowcount == 0:
+                return False
+            cursor.execute("""
+                UPDATE crawl_frontier
+                SET lease_expires_at = NOW() + make_interval(secs => %s)
+                WHERE domain = %s AND lease_owner = %s AND status = 'in_progress'
+            """, (self.lease_seconds, domain, self.worker_id))
+            return True
+
+    def release_domain(self, domain: str, interval_seconds: float):
+        """Rilascia il dominio: il prossimo worker aspetta l'intervallo corrente"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_domain_leases
+                SET owner = NULL,
+                    lease_expires_at = NOW() + make_interval(secs => %s),
+                    interval_seconds = %s
+                WHERE domain = %s AND owner = %s
+            """, (interval_seconds, interval_seconds, domain, self.worker_id))
+
+    # URL ------------------------------------------------------------------
+
+    def claim_urls(self, domain: str, limit: int = 10) -> List[FrontierItem]:
+        """URL pronti del dominio (il lease del dominio deve essere nostro)"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_frontier f
+                SET status = 'in_progress',
+                    lease_owner = %s,
+                    lease_expires_at = NOW() + make_interval(secs => %s),
+                    attempts = f.attempts + 1,
+                    updated_at = NOW()
+                FROM crawl_jobs j
+                WHERE j.id = f.job_id
+                  AND f.id IN (
+                    SELECT id FROM crawl_frontier
+                    WHERE domain = %s AND status = 'pending' AND available_at <= NOW()
+                    ORDER BY depth, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                  )
+                RETURNING f.id, f.url, f.depth, f.attempts,
+                          j.id, j.url, j.max_depth, j.max_pages, j.follow_external_links,
+                          j.respect_robots_txt, j.scraping_frequency
+            """, (self.worker_id, self.lease_seconds, domain, limit))
+            rows = cursor.fetchall()
+
+        return sorted(
+            (FrontierItem(row[0], row[1], row[2], row[3], CrawlJob(*row[4:])) for row in rows),
+            key=lambda item: (item.depth, item.id)
+        )
+
+    def requeue(self, item_ids: List[int]):
+        """Rimette in coda URL presi ma non lavorati (lease del dominio perso)"""
+        if not item_ids:
+            return
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_frontier
+                SET status = 'pending', attempts = GREATEST(attempts - 1, 0),
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = NOW()
+                WHERE id = ANY(%s) AND lease_owner = %s AND status = 'in_progress'
+            """, (item_ids, self.worker_id))
+
+    def complete(self, item: FrontierItem, page: Optional[Dict[str, Any]], links: List[str]) -> int:
+        """
+        Chiude un URL e accoda i link nuovi nei limiti del job
+
+        Returns:
+            numero di URL aggiunti alla frontiera
+        """
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_frontier
+                SET status = 'done', result = %s, lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = NULL, updated_at = NOW()
+                WHERE id = %s AND lease_owner = %s AND status = 'in_progress'
+            """, (Json(page) if page else None, item.id, self.worker_id))
+            # Lease scaduto e URL ripreso da un altro worker: il suo risultato vale
+            if cursor.rowcount == 0:
+                logger.warning(f"🗂️ Lease lost on {item.url}, result discarded")
+                return 0
+
+            if not links or item.depth >= item.job.max_depth:
+                return 0
+            return self._enqueue_links(cursor, item, links)
+
+    def _enqueue_links(self, cursor, item: FrontierItem, links: List[str]) -> int:
+        # Il lock sul job serializza i conteggi di pages_enqueued tra i worker
+        cursor.execute("SELECT pages_enqueued FROM crawl_jobs WHERE id = %s FOR UPDATE", (item.job.id,))
+        remaining = item.job.max_pages - cursor.fetchone()[0]
+        if remaining <= 0:
+            return 0
+
+        site = site_key(item.job.url)
+        candidates = []
+        for link in links:
+            url = normalize_url(link, item.url)
+            if url and url not in candidates and (item.job.follow_external_links or site_key(url) == site):
+                candidates.append(url)
+        if not candidates:
+            return 0
+        # Le piu' utili entrano per prime (id piu' bassi) e non vengono tagliate da max_pages
+        candidates.sort(key=url_priority, reverse=True)
+
+        cursor.execute(
+            "SELECT url FROM crawl_frontier WHERE job_id = %s AND url = ANY(%s)",
+            (item.job.id, candidates)
+        )
+        known = {row[0] for row in cursor.fetchall()}
+        new_urls = [url for url in candidates if url not in known][:remaining]
+        if not new_urls:
+            return 0
+
+        execute_values(cursor, """
+            INSERT INTO crawl_frontier (job_id, url, domain, depth, status, available_at, created_at, updated_at)
+            VALUES %s
+            ON CONFLICT (job_id, url) DO NOTHING
+        """, [(item.job.id, url, site_key(url), item.depth + 1) for url in new_urls],
+            template="(%s, %s, %s, %s, 'pending', NOW(), NOW(), NOW())")
+        cursor.execute(
+            "UPDATE crawl_jobs SET pages_enqueued = pages_enqueued + %s, updated_at = NOW() WHERE id = %s",
+            (len(new_urls), item.job.id)
+        )
+        return len(new_urls)
+
+    def fail(self, item: FrontierItem, error: str, retry: bool):
+        """URL fallito: nuovo tentativo con backoff esponenziale o failed definitivo"""
+        final = not retry or item.attempts >= self.max_attempts
+        delay = RETRY_BASE_SECONDS * 2 ** (item.attempts - 1)
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_frontier
+                SET status = %s, available_at = NOW() + make_interval(secs => %s),
+                    lease_owner = NULL, lease_expires_at = NULL, last_error = %s, updated_at = NOW()
+                WHERE id = %s AND lease_owner = %s AND status = 'in_progress'
+            """, ('failed' if final else 'pending', 0 if final else delay, error[:1000], item.id, self.worker_id))
+
+    def requeue_expired(self) -> int:
+        """URL e job rimasti a worker morti tornano disponibili"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_frontier
+                SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                    last_error = CASE WHEN attempts >= %s THEN 'lease expired' ELSE last_error END,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = NOW()
+                WHERE status = 'in_progress' AND lease_expires_at < NOW()
+            """, (self.max_attempts, self.max_attempts))
+            requeued = cursor.rowcount
+            # Chiusura rimasta a un worker morto (il lease del job non e' piu' rinnovato)
+            cursor.execute("""
+                UPDATE crawl_jobs
+                SET status = 'running', lease_owner = NULL, lease_expires_at = NULL, updated_at = NOW()
+                WHERE status = 'finalizing'
+                  AND (lease_expires_at < NOW()
+                       OR (lease_expires_at IS NULL AND updated_at < NOW() - make_interval(secs => %s)))
+            """, (self.lease_seconds,))
+        if requeued:
+            logger.warning(f"🗂️ {requeued} expired frontier leases requeued")
+        return requeued
+
+    # Chiusura job ---------------------------------------------------------
+
+    def finishable_jobs(self) -> List[int]:
+        """Job in corso senza URL aperti"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                SELECT j.id FROM crawl_jobs j
+                WHERE j.status = 'running'
+                  AND NOT EXISTS (
+                    SELECT 1 FROM crawl_frontier f
+                    WHERE f.job_id = j.id AND f.status IN ('pending', 'in_progress')
+                  )
+            """)
+            return [row[0] for row in cursor.fetchall()]
+
+    def begin_finalize(self, job_id: int) -> Optional[Tuple[CrawlJob, List[Dict[str, Any]]]]:
+        """Un solo worker chiude il job: ritorna job e pagine scaricate, None se non tocca a noi"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_jobs j
+                SET status = 'finalizing', lease_owner = %s,
+                    lease_expires_at = NOW() + make_interval(secs => %s), updated_at = NOW()
+                WHERE j.id = %s AND j.status = 'running'
+                  AND NOT EXISTS (
+                    SELECT 1 FROM crawl_frontier f
+                    WHERE f.job_id = j.id AND f.status IN ('pending', 'in_progress')
+                  )
+                RETURNING j.id, j.url, j.max_depth, j.max_pages, j.follow_external_links,
+                          j.respect_robots_txt, j.scraping_frequency, j.company_id
+            """, (self.worker_id, self.lease_seconds, job_id))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("""
+                SELECT result FROM crawl_frontier
+                WHERE job_id = %s AND status = 'done' AND result IS NOT NULL
+                ORDER BY depth, id
+            """, (job_id,))
+            pages = [result[0] for result in cursor.fetchall()]
+        return CrawlJob(*row), pages
+
+    def renew_job(self, job_id: int) -> bool:
+        """Estende il lease di chiusura del job; False se perso"""
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_jobs SET lease_expires_at = NOW() + make_interval(secs => %s)
+                WHERE id = %s AND status = 'finalizing' AND lease_owner = %s
+            """, (self.lease_seconds, job_id, self.worker_id))
+            return cursor.rowcount > 0
+
+    def store_site(self, job: CrawlJob, pages: List[Dict[str, Any]],
+                   template: Optional[SiteTemplate]) -> List[int]:
+        """
+        Documenti, sito e stati pagina in un'unica transazione (come /crawl-site)
+
+        Returns:
+            id dei knowledge_documents creati
+        """
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        created_ids = []
+        states = []
+
+        with self._transaction() as cursor:
+            # Prima di tutto: se il job e' passato a un altro worker si annulla la transazione
+            cursor.execute(
+                "SELECT 1 FROM crawl_jobs WHERE id = %s AND status = 'finalizing' AND lease_owner = %s FOR UPDATE",
+                (job.id, self.worker_id)
+            )
+            if cursor.fetchone() is None:
+                raise RuntimeError(f"finalize lease lost for crawl job {job.id}")
+
+            for index, page in enumerate(pages):
+                document_id = None
+                if page['text'] and len(page['text'].strip()) >= MIN_TEXT_LENGTH:
+                    cursor.execute("""
+                        INSERT INTO knowledge_documents (filename, extracted_text, created_at, updated_at)
+                        VALUES (%s, %s, NOW(), NOW()) RETURNING id
+                    """, (f"scraped_{timestamp}_{index:03d}.html", page['text']))
+                    document_id = cursor.fetchone()[0]
+                    created_ids.append(document_id)
+
+                states.append(PageState(
+                    url=page['url'], depth=page['depth'], etag=page.get('etag'),
+                    last_modified=page.get('last_modified'), content_hash=page.get('content_hash'),
+                    knowledge_document_id=document_id, last_checked_at=datetime.now(),
+                    last_changed_at=datetime.now()
+                ))
+
+            cursor.execute("""
+                INSERT INTO scraped_websites (url, domain, title, status, scraping_frequency,
+                                              next_scrape_scheduled, boilerplate_template,
+                                              last_scraped, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), NOW())
+                RETURNING id
+            """, (
+                job.url, urlparse(job.url).netloc, pages[0]['title'] if pages else None, "completed",
+                job.scraping_frequency, next_scrape_time(job.scraping_frequency),
+                Json(template.to_dict()) if template else None
+            ))
+            website_id = cursor.fetchone()[0]
+
+            PageStateStore.save(cursor, website_id, states)
+            bump_counters(
+                cursor,
+                total_documents=len(created_ids),
+                scraped_documents=len(created_ids),
+                scraped_sites=1
+            )
+
+            # Il testo ora sta nei documenti: la frontiera resta leggera
+            cursor.execute("UPDATE crawl_frontier SET result = NULL WHERE job_id = %s", (job.id,))
+            cursor.execute("""
+                UPDATE crawl_jobs
+                SET status = 'completed', website_id = %s, lease_owner = NULL, lease_expires_at = NULL,
+                    completed_at = NOW(), updated_at = NOW()
+                WHERE id = %s
+            """, (website_id, job.id))
+            if job.company_id:
+                cursor.execute("UPDATE companies SET scraping_status = 'completed' WHERE id = %s", (job.company_id,))
+
+        return created_ids
+
+    def mark_job_failed(self, job_id: int, error: str):
+        with self._transaction() as cursor:
+            cursor.execute("""
+                UPDATE crawl_jobs
+                SET status = 'failed', last_error = %s, lease_owner = NULL, lease_expires_at = NULL,
+                    completed_at = NOW(), updated_at = NOW()
+                WHERE id = %s AND status = 'finalizing' AND lease_owner = %s
+                RETURNING company_id
+            """, (error[:1000], job_id, self.worker_id))
+            row = cursor.fetchone()
+            if row and row[0]:
+                cursor.execute("UPDATE companies SET scraping_status = 'error' WHERE id = %s", (row[0],))
+
+class CrawlWorker:
+    """
+    Processo worker: `domains` domini in parallelo, un URL alla volta per dominio
+
+    Args:
+        store: CrawlFrontierStore
+        engine_factory: crea il motore di scraping (context manager asincrono)
+        domains: lease di dominio tenuti contemporaneamente
+        batch_size: URL presi per ogni lease
+        vectorize: accoda i documenti creati alla vettorizzazione
+    """
+
+    def __init__(self, store: CrawlFrontierStore, engine_factory: Callable, domains: int = 4,
+                 batch_size: int = 10, poll_interval: float = 2.0, vectorize: bool = True):
+        self.store = store
+        self._engine_factory = engine_factory
+        self.domains = domains
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.vectorize = vectorize
+        self._stopping = asyncio.Event()
+        self.stats = {'pages': 0, 'failed': 0, 'retried': 0, 'links_enqueued': 0, 'jobs_completed': 0}
+
+    def stop(self):
+        """Arresto pulito: i lease in corso finiscono la pagina corrente"""
+        self._stopping.set()
+
+    async def run(self, until_idle: bool = False):
+        async with self._engine_factory() as engine:
+            slots = [asyncio.create_task(self._slot(engine, until_idle)) for _ in range(self.domains)]
+            maintenance = asyncio.create_task(self._maintenance())
+            try:
+                await asyncio.gather(*slots)
+            finally:
+                maintenance.cancel()
+                await asyncio.gather(maintenance, return_exceptions=True)
+            # Job chiusi solo dopo l'ultima pagina
+            await self._finalize_ready_jobs()
+
+        if self.vectorize:
+            from app.modules.rag_engine.vectorization_worker import get_vectorization_worker
+            await get_vectorization_worker().join()
+
+        logger.info(f"🗂️ Crawl worker {self.store.worker_id} stopped: {self.stats}")
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _slot(self, engine, until_idle: bool):
+        while not self._stopping.is_set():
+            claimed = await asyncio.to_thread(self.store.claim_domain)
+            if claimed is None:
+                if until_idle and await asyncio.to_thread(self.store.is_idle):
+                    return
+                await self._finalize_ready_jobs()
+                await self._sleep(self.poll_interval)
+                continue
+
+            domain, interval = claimed
+            if interval:
+                engine.rate_control.set_interval(domain, interval)
+            try:
+                await self._crawl_domain(engine, domain)
+            except Exception as e:
+                logger.error(f"Crawl worker error on {domain}: {e}")
+            finally:
+                await asyncio.to_thread(self.store.release_domain, domain, engine.rate_control.interval(domain))
+
+    async def _crawl_domain(self, engine, domain: str):
+        items = await asyncio.to_thread(self.store.claim_urls, domain, self.batch_size)
+        for index, item in enumerate(items):
+            if self._stopping.is_set() or not await asyncio.to_thread(self.store.renew_domain, domain):
+                await asyncio.to_thread(self.store.requeue, [rest.id for rest in items[index:]])
+                return
+            await self._process(engine, item)
+
+        for job_id in {item.job.id for item in items}:
+            await self._finalize(job_id)
+
+    async def _process(self, engine, item: FrontierItem):
+        website = item.job.website()
+        try:
+            results, links = await engine.crawl_page(item.url, item.depth, website)
+        except Exception as e:
+            logger.error(f"Crawl page failed for {item.url}: {e}")
+            self.stats['retried'] += 1
+            await asyncio.to_thread(self.store.fail, item, str(e), True)
+            return
+
+        if results['failed_fetches']:
+            status = results['failed_fetches'][0]['status']
+            retry = is_retryable(status)
+            self.stats['retried' if retry else 'failed'] += 1
+            await asyncio.to_thread(self.store.fail, item, f"Fetch failed ({status})", retry)
+            return
+
+        page = None
+        if results['pages']:
+            page = results['pages'][0]
+            state = results['page_states'][0]
+            page = {
+                'url': page['url'],
+                'depth': page['depth'],
+                'title': page['title'],
+                'text': page['text'],
+                'segments': page['segments'],
+                'content_hash': page['content_hash'],
+                'etag': state.etag,
+                'last_modified': state.last_modified
+            }
+            self.stats['pages'] += 1
+
+        if item.depth == 1 and engine.use_sitemaps and website.max_depth > 1:
+            # Anche le pagine delle sitemap entrano nella frontiera condivisa
+            links = [url for url, _ in await engine.sitemap_seeds(website)] + list(links)
+
+        added = await asyncio.to_thread(self.store.complete, item, page, links)
+        self.stats['links_enqueued'] += added
+
+    async def _finalize(self, job_id: int):
+        claimed = await asyncio.to_thread(self.store.begin_finalize, job_id)
+        if claimed is None:
+            return
+        job, pages = claimed
+
+        try:
+            template = SiteTemplate()
+            for page in pages:
+                template.observe(page['segments'], page['url'])
+            for page in pages:
+                page['text'] = template.clean(page.pop('segments'))
+
+            # Heartbeat sul lease del job: store_site su siti grandi puo' superare lease_seconds
+            heartbeat = asyncio.create_task(self._renew_job(job_id))
+            try:
+                document_ids = await asyncio.to_thread(self.store.store_site, job, pages, template)
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+        except Exception as e:
+            logger.error(f"Crawl job {job_id} finalize failed: {e}")
+            await asyncio.to_thread(self.store.mark_job_failed, job_id, str(e))
+            return
+
+        self.stats['jobs_completed'] += 1
+        logger.info(f"🗂️ Crawl job {job_id} completed: {len(pages)} pages, {len(document_ids)} documents")
+
+        if self.vectorize:
+            from app.modules.rag_engine.vectorization_worker import get_vectorization_worker
+            worker = get_vectorization_worker()
+            for document_id in document_ids:
+                await worker.enqueue(document_id)
+
+    async def _renew_job(self, job_id: int):
+        while True:
+            await asyncio.sleep(max(self.store.lease_seconds / 3, 1))
+            if not await asyncio.to_thread(self.store.renew_job, job_id):
+                logger.warning(f"🗂️ Finalize lease lost for crawl job {job_id}")
+                return
+
+    async def _finalize_ready_jobs(self):
+        for job_id in await asyncio.to_thread(self.store.finishable_jobs):
+            await self._finalize(job_id)
+
+    async def _maintenance(self):
+        """Recupero periodico dei lease scaduti"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.to_thread(self.store.requeue_expired)
+            except Exception as e:
+                logger.warning(f"Frontier maintenance failed: {e}")
+            await self._sleep(max(self.store.lease_seconds / 2, 5))
+
+async def run_worker(domains: int = 4, batch_size: int = 10, vectorize: bool = True,
+                     until_idle: bool = False, worker_id: Optional[str] = None):
+    """Entry point di un processo worker (SIGTERM/SIGINT: arresto pulito)"""
+    import signal
+    from app.services.web_scraping.api_routes_working import get_db_connection
+    from app.services.web_scraping.scraping_engine import IntelligenceWebScrapingEngine
+
+    store = CrawlFrontierStore(get_db_connection, worker_id)
+    worker = CrawlWorker(
+        store,
+        lambda: IntelligenceWebScrapingEngine(max_concurrent=domains),
+        domains=domains,
+        batch_size=batch_size,
+        vectorize=vectorize
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    logger.info(f"🗂️ Crawl worker {store.worker_id} started ({domains} domains)")
+    await worker.run(until_idle=until_idle)
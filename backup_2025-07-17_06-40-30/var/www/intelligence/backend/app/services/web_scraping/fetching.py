@@ -0,0 +1,184 @@
+"""
+🌐 Fetch delle pagine: HTTP diretto con escalation a Playwright
+
+- FetchedPage: risultato uniforme di un fetch (HTTP o browser)
+- needs_js_rendering: euristica per riconoscere pagine renderizzate via JS
+- BrowserContextPool: context Playwright riutilizzabili con blocco di
+  immagini, font e media
+"""
+
+import asyncio
+import logging
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RENDER_MODE_HTTP = "http"
+RENDER_MODE_BROWSER = "playwright"
+
+@dataclass
+class FetchedPage:
+    """Risultato di un fetch"""
+    url: str
+    status: int
+    html: Optional[str]
+    render_mode: str
+    elapsed_ms: float = 0.0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300 and bool(self.html)
+
+    @property
+    def not_modified(self) -> bool:
+        """304 su richiesta condizionale: contenuto invariato, nessun body"""
+        return self.status == 304
+
+    def header(self, name: str) -> Optional[str]:
+        """Header di risposta, case-insensitive (aiohttp vs Playwright)"""
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.html.encode('utf-8')) if self.html else 0
+
+# Euristica JS: regex precompilate, nessun parsing DOM
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style|noscript|template)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_SCRIPT_TAG_RE = re.compile(r'<script\b', re.I)
+_SPA_ROOT_RE = re.compile(
+    r'id=["\'](?:root|app|__next|__nuxt|svelte)["\']|data-reactroot|ng-app|ng-version|window\.__NUXT__|__NEXT_DATA__',
+    re.I
+)
+_NOSCRIPT_JS_RE = re.compile(
+    r'<noscript\b[^>]*>[^<]*(?:enable|abilita|attiva)[^<]*javascript', re.I
+)
+
+MIN_VISIBLE_TEXT = 200
+
+def visible_text(html: str) -> str:
+    """Testo visibile approssimato (senza script/style e tag)"""
+    text = _SCRIPT_STYLE_RE.sub(' ', html)
+    text = _TAG_RE.sub(' ', text)
+    return _WS_RE.sub(' ', text).strip()
+
+def visible_text_length(html: str) -> int:
+    """Lunghezza approssimata del testo visibile"""
+    return len(visible_text(html))
+
+def needs_js_rendering(html: Optional[str]) -> bool:
+    """
+    True se la pagina sembra renderizzata lato client
+
+    Segnali: poco testo visibile insieme a root SPA o molti script,
+    oppure un <noscript> che chiede di abilitare JavaScript.
+    """
+    if not html:
+        return True
+
+    text_length = visible_text_length(html)
+    if text_length >= MIN_VISIBLE_TEXT * 5:
+        return False
+
+    if _NOSCRIPT_JS_RE.search(html) and text_length < MIN_VISIBLE_TEXT * 2:
+        return True
+
+    if text_length < MIN_VISIBLE_TEXT:
+        return bool(_SPA_ROOT_RE.search(html)) or len(_SCRIPT_TAG_RE.findall(html)) >= 3
+
+    return False
+
+class BrowserContextPool:
+    """
+    Pool di BrowserContext Playwright riutilizzabili
+
+    - Al massimo `size` context aperti (limite memoria Chromium)
+    - Immagini, font e media bloccati a livello di route
+    - Ogni context viene riciclato dopo `max_uses` pagine
+    """
+
+    BLOCKED_RESOURCE_TYPES = {'image', 'font', 'media'}
+
+    def __init__(self, browser_factory: Callable[[], Awaitable[Any]], size: int = 3,
+                 max_uses: int = 50, user_agent_factory: Optional[Callable[[], str]] = None):
+        self._browser_factory = browser_factory
+        self.size = size
+        self.max_uses = max_uses
+        self._user_agent_factory = user_agent_factory
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+        self._uses: Dict[int, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def _block_resources(self, route):
+        if route.request.resource_type in self.BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _create_context(self):
+        browser = await self._browser_factory()
+        options = {}
+        if self._user_agent_factory:
+            options['user_agent'] = self._user_agent_factory()
+        context = await browser.new_context(**options)
+        await context.route("**/*", self._block_resources)
+        self._uses[id(context)] = 0
+        return context
+
+    async def _acquire(self):
+        if self._idle.empty():
+            async with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    try:
+                        return await self._create_context()
+                    except Exception:
+                        self._created -= 1
+                        raise
+        return await self._idle.get()
+
+    async def _release(self, context):
+        self._uses[id(context)] = self._uses.get(id(context), 0) + 1
+        if self._uses[id(context)] >= self.max_uses:
+            # Ricicla il context per liberare memoria
+            self._uses.pop(id(context), None)
+            await context.close()
+            try:
+                context = await self._create_context()
+            except Exception as e:
+                logger.warning(f"Could not recreate browser context: {e}")
+                self._created -= 1
+                return
+        self._idle.put_nowait(context)
+
+    @asynccontextmanager
+    async def page(self):
+        """Pagina su un context del pool"""
+        context = await self._acquire()
+        page = None
+        try:
+            page = await context.new_page()
+            yield page
+        finally:
+            if page:
+                await page.close()
+            await self._release(context)
+
+    async def close(self):
+        """Chiude tutti i context inattivi"""
+        while not self._idle.empty():
+            context = self._idle.get_nowait()
+            await context.close()
+        self._uses.clear()
+        self._created = 0
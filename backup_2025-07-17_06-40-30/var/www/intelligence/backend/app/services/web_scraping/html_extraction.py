@@ -0,0 +1,518 @@
+"""
+🧹 Estrazione da HTML in un solo passaggio
+
+- ParsedPage: un solo parsing (selectolax, lxml o html.parser); titolo,
+  testo, link, meta e blocchi calcolati una volta e riutilizzati da tutti
+  gli estrattori
+- Pattern (email, telefono, CAP) precompilati a livello di modulo
+- Segmenti di testo per blocco (per la rimozione del boilerplate di sito)
+- Funzioni pure e top-level: possono girare in un ProcessPoolExecutor
+  senza bloccare l'event loop delle API
+"""
+
+import re
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString
+
+from app.services.web_scraping.structured_data import extract_structured_company
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _FastHTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _FastHTMLParser
+    except ImportError:
+        _FastHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    _BS4_PARSER = 'lxml'
+except ImportError:
+    _BS4_PARSER = 'html.parser'
+
+BACKEND_SELECTOLAX = "selectolax"
+BACKEND_LXML = "lxml"
+BACKEND_HTML_PARSER = "html.parser"
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+# Pattern telefono italiano, in ordine di priorita'
+PHONE_RES = (
+    re.compile(r'\+39\s?\d{2,3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}'),
+    re.compile(r'0\d{1,3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}'),
+    re.compile(r'\d{3}[\s.-]?\d{3}[\s.-]?\d{4}'),
+)
+CAP_RE = re.compile(r'\d{5}')
+
+GENERIC_EMAIL_MARKERS = ('example', 'test', 'dummy', 'noreply')
+CONTACT_SECTION_KEYWORDS = ('team', 'staff', 'contact', 'chi-siamo', 'about')
+POSITION_KEYWORDS = (
+    'ceo', 'cto', 'cmo', 'direttore', 'manager', 'responsabile',
+    'coordinatore', 'amministratore', 'presidente', 'vicepresidente',
+    'founder', 'co-founder', 'partner', 'senior', 'junior', 'lead'
+)
+
+SKIPPED_TAGS = ['script', 'style', 'noscript', 'template']
+BLOCK_TAGS = [
+    'p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'td', 'th',
+    'dd', 'dt', 'blockquote', 'pre', 'address', 'figcaption'
+]
+_BLOCK_SELECTOR = ', '.join(BLOCK_TAGS)
+# Contenitori che separano i segmenti di testo (menu, footer, banner, paragrafi...)
+SEGMENT_TAGS = frozenset(BLOCK_TAGS + [
+    'div', 'section', 'article', 'main', 'nav', 'header', 'footer', 'aside',
+    'ul', 'ol', 'dl', 'table', 'tr', 'form', 'body'
+])
+# Selettori semplici serviti dall'indice costruito nell'unica visita del DOM
+_SIMPLE_SELECTOR_RE = re.compile(
+    r'^(?:(?P<tag>[a-z][a-z0-9]*)|\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+))?'
+    r'(?:\[(?P<attr>[\w-]+)(?:="(?P<value>[^"]*)")?\])?$'
+)
+_JSON_LD_SELECTOR = 'script[type="application/ld+json"]'
+
+def available_backend(backend: str = "auto") -> str:
+    """Backend effettivo: selectolax se installato, poi lxml, poi html.parser"""
+    if backend == BACKEND_SELECTOLAX and _FastHTMLParser is None:
+        backend = "auto"
+    if backend == BACKEND_LXML and _BS4_PARSER != 'lxml':
+        backend = "auto"
+    if backend == "auto":
+        return BACKEND_SELECTOLAX if _FastHTMLParser is not None else _BS4_PARSER
+    return backend
+
+def collapse_text(text: str) -> str:
+    """Spazi multipli e righe vuote compattati (stessa regola del testo pulito storico)"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+def _group_segments(pieces) -> List[str]:
+    """(contenitore, testo) in ordine di documento -> un segmento per contenitore consecutivo"""
+    segments, current, owner = [], [], None
+    for piece_owner, text in pieces:
+        if piece_owner != owner and current:
+            segments.append(' '.join(''.join(current).split()))
+            current = []
+        owner = piece_owner
+        current.append(text)
+    if current:
+        segments.append(' '.join(''.join(current).split()))
+    return [segment for segment in segments if segment]
+
+def _soup_owner(node) -> int:
+    parent = node.parent
+    while parent is not None and parent.name not in SEGMENT_TAGS:
+        parent = parent.parent
+    return id(parent)
+
+def _lexbor_owner(node) -> int:
+    parent = node.parent
+    while parent is not None and parent.tag not in SEGMENT_TAGS:
+        parent = parent.parent
+    return parent.mem_id if parent is not None else 0
+
+def soup_segments(soup: BeautifulSoup) -> List[str]:
+    """Segmenti di testo di un albero BeautifulSoup (script/style gia' rimossi)"""
+    return _group_segments(
+        (_soup_owner(node), str(node))
+        for node in soup.descendants
+        if type(node) is NavigableString
+    )
+
+class ElementView:
+    """Vista minima di un elemento, indipendente dal backend (testo calcolato solo se letto)"""
+
+    __slots__ = ('_node', '_is_soup', 'tag', 'attrs', '_text')
+
+    def __init__(self, node, is_soup: bool):
+        self._node = node
+        self._is_soup = is_soup
+        self._text = None
+        if is_soup:
+            self.tag = node.name
+            self.attrs = {
+                key: ' '.join(value) if isinstance(value, list) else value
+                for key, value in node.attrs.items()
+            }
+        else:
+            self.tag = node.tag
+            self.attrs = {key: value or '' for key, value in node.attributes.items()}
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._node.get_text() if self._is_soup else self._node.text(separator='')
+        return self._text
+
+    def get(self, name: str, default: str = '') -> str:
+        return self.attrs.get(name) or default
+
+    @property
+    def key(self):
+        """Identita' del nodo (i wrapper selectolax cambiano a ogni accesso)"""
+        return id(self._node) if self._is_soup else self._node.mem_id
+
+    def item_scope(self) -> Optional['ElementView']:
+        """Antenato itemscope piu' vicino (microdata), escluso l'elemento stesso"""
+        parent = self._node.parent
+        while parent is not None:
+            attrs = getattr(parent, 'attrs' if self._is_soup else 'attributes', None) or {}
+            if 'itemscope' in attrs or 'itemtype' in attrs:
+                return ElementView(parent, self._is_soup)
+            parent = parent.parent
+        return None
+
+class ParsedPage:
+    """
+    Pagina parsata una sola volta
+
+    Script/style vengono rimossi subito dopo aver salvato i blocchi JSON-LD;
+    raw_text e text sono calcolati una volta sola.
+    """
+
+    def __init__(self, html: str, backend: str = "auto"):
+        self.backend = available_backend(backend)
+
+        if self.backend == BACKEND_SELECTOLAX:
+            self._tree = _FastHTMLParser(html or '')
+            self._soup = None
+            self.json_ld = [node.text() for node in self._tree.css(_JSON_LD_SELECTOR)]
+            self._tree.strip_tags(SKIPPED_TAGS)
+            root = self._tree.root
+            self.raw_text = root.text(separator='') if root is not None else ''
+        else:
+            self._tree = None
+            self._soup = BeautifulSoup(html or '', self.backend)
+            self.json_ld = []
+            for tag in self._soup(SKIPPED_TAGS):
+                if tag.name == 'script' and tag.get('type') == 'application/ld+json':
+                    self.json_ld.append(tag.get_text())
+                tag.decompose()
+            self._build_index()
+            self.raw_text = self._soup.get_text()
+
+        self.text = collapse_text(self.raw_text)
+
+    # Selettori -----------------------------------------------------------
+
+    def _build_index(self):
+        """Unica visita del DOM BeautifulSoup: elementi per tag, classe e id"""
+        self._by_tag: Dict[str, list] = {}
+        self._by_class: Dict[str, list] = {}
+        self._by_id: Dict[str, list] = {}
+        self._order: Dict[int, int] = {}
+
+        for position, node in enumerate(self._soup.find_all(True)):
+            self._order[id(node)] = position
+            self._by_tag.setdefault(node.name, []).append(node)
+            for css_class in node.get('class') or ():
+                self._by_class.setdefault(css_class, []).append(node)
+            node_id = node.get('id')
+            if node_id:
+                self._by_id.setdefault(node_id, []).append(node)
+
+    def _indexed_select(self, selector: str) -> Optional[list]:
+        """Nodi per un selettore semplice dall'indice; None se serve soupsieve"""
+        nodes = []
+        parts = selector.split(',')
+        needs_sort = len(parts) > 1
+        for part in parts:
+            match = _SIMPLE_SELECTOR_RE.match(part.strip())
+            if not match or not any(match.group(name) for name in ('tag', 'cls', 'id', 'attr')):
+                return None
+
+            if match.group('tag'):
+                candidates = self._by_tag.get(match.group('tag'), [])
+            elif match.group('cls'):
+                candidates = self._by_class.get(match.group('cls'), [])
+            elif match.group('id'):
+                candidates = self._by_id.get(match.group('id'), [])
+            else:
+                candidates = [node for group in self._by_tag.values() for node in group]
+                needs_sort = True
+
+            attr, value = match.group('attr'), match.group('value')
+            if attr:
+                candidates = [
+                    node for node in candidates
+                    if node.has_attr(attr) and (value is None or node.get(attr) == value)
+                ]
+            nodes.extend(candidates)
+
+        if needs_sort:
+            # Ordine del documento, senza duplicati
+            nodes = sorted({id(node): node for node in nodes}.values(), key=lambda node: self._order[id(node)])
+        return nodes
+
+    def _view(self, node) -> ElementView:
+        return ElementView(node, self._soup is not None)
+
+    def select(self, selector: str) -> List[ElementView]:
+        if self._soup is None:
+            nodes = self._tree.css(selector)
+        else:
+            nodes = self._indexed_select(selector)
+            if nodes is None:
+                nodes = self._soup.select(selector)
+        return [self._view(node) for node in nodes]
+
+    def select_one(self, selector: str) -> Optional[ElementView]:
+        if self._soup is None:
+            node = self._tree.css_first(selector)
+            return self._view(node) if node is not None else None
+
+        nodes = self._indexed_select(selector)
+        if nodes is None:
+            node = self._soup.select_one(selector)
+            return self._view(node) if node is not None else None
+        return self._view(nodes[0]) if nodes else None
+
+    # Campi calcolati una volta -------------------------------------------
+
+    @cached_property
+    def title(self) -> Optional[str]:
+        element = self.select_one('title')
+        return element.text.strip() if element else None
+
+    @cached_property
+    def links(self) -> List[str]:
+        return [element.get('href') for element in self.select('a[href]') if element.get('href')]
+
+    @cached_property
+    def meta(self) -> Dict[str, str]:
+        values = {}
+        for element in self.select('meta[content]'):
+            key = element.get('name') or element.get('property')
+            if key and key.lower() not in values:
+                values[key.lower()] = element.get('content').strip()
+        return values
+
+    @cached_property
+    def blocks(self) -> List[str]:
+        """Testo dei blocchi foglia (paragrafi, voci di lista, titoli, celle)"""
+        blocks = []
+        if self._soup is not None:
+            nodes = (node for node in self._soup.find_all(BLOCK_TAGS) if node.find(BLOCK_TAGS) is None)
+            texts = (node.get_text(' ', strip=True) for node in nodes)
+        else:
+            # In selectolax css() include il nodo stesso
+            nodes = (node for node in self._tree.css(_BLOCK_SELECTOR) if len(node.css(_BLOCK_SELECTOR)) == 1)
+            texts = (node.text(separator=' ', strip=True) for node in nodes)
+
+        for text in texts:
+            text = ' '.join(text.split())
+            if text and (not blocks or blocks[-1] != text):
+                blocks.append(text)
+        return blocks
+
+    @cached_property
+    def segments(self) -> List[str]:
+        """Tutto il testo della pagina, diviso per contenitore (nav, footer, paragrafi...)"""
+        if self._soup is not None:
+            return soup_segments(self._soup)
+        root = self._tree.root
+        if root is None:
+            return []
+        return _group_segments(
+            (_lexbor_owner(node), node.text_content or '')
+            for node in root.traverse(include_text=True)
+            if node.tag == '-text'
+        )
+
+    @cached_property
+    def emails(self) -> List[str]:
+        return EMAIL_RE.findall(self.raw_text)
+
+def parse_page(html: str, backend: str = "auto") -> ParsedPage:
+    return ParsedPage(html, backend)
+
+# Estrattori --------------------------------------------------------------
+
+COMPANY_NAME_SELECTORS = (
+    'h1', 'title', '.company-name', '#company-name', '[itemprop="name"]',
+    '.logo img[alt]', '.brand', '.site-title'
+)
+DESCRIPTION_SELECTORS = (
+    '.about', '#about', '.company-description',
+    '.chi-siamo', '.about-us', '.company-info'
+)
+ADDRESS_SELECTORS = (
+    '.address', '.indirizzo', '.contact-info',
+    '[itemprop="address"]', '.location'
+)
+
+def extract_company_name(page: ParsedPage) -> Optional[str]:
+    """Nome azienda (strategie multiple, in ordine)"""
+    for selector in COMPANY_NAME_SELECTORS:
+        for element in page.select(selector):
+            if element.tag == 'img':
+                text = element.get('alt').strip()
+            elif element.tag == 'title':
+                # Pulisci titolo pagina
+                text = element.text.strip().split('|')[0].split('-')[0].strip()
+            else:
+                text = element.text.strip()
+
+            if text and 2 < len(text) < 100:
+                return text
+    return None
+
+def extract_company_description(page: ParsedPage) -> Optional[str]:
+    """Meta description oppure sezioni about/chi siamo"""
+    if 'description' in page.meta:
+        return page.meta['description']
+
+    for selector in DESCRIPTION_SELECTORS:
+        element = page.select_one(selector)
+        if element:
+            text = element.text.strip()
+            if len(text) > 50:
+                return text[:500]
+    return None
+
+def extract_company_email(page: ParsedPage) -> Optional[str]:
+    """Prima email non generica della pagina"""
+    for email in page.emails:
+        if not any(marker in email.lower() for marker in GENERIC_EMAIL_MARKERS):
+            return email
+    return None
+
+def extract_company_phone(page: ParsedPage) -> Optional[str]:
+    """Primo telefono secondo i pattern in ordine di priorita'"""
+    for pattern in PHONE_RES:
+        match = pattern.search(page.raw_text)
+        if match:
+            return match.group(0)
+    return None
+
+def extract_company_address(page: ParsedPage) -> Dict[str, str]:
+    """Via, CAP e citta' dalla prima sezione indirizzo trovata"""
+    address_data = {}
+
+    for selector in ADDRESS_SELECTORS:
+        element = page.select_one(selector)
+        if not element:
+            continue
+
+        lines = [line.strip() for line in element.text.strip().split('\n') if line.strip()]
+        if lines:
+            address_data['address_street'] = lines[0]
+
+            for line in lines:
+                if CAP_RE.search(line):
+                    parts = line.split()
+                    for i, part in enumerate(parts):
+                        if CAP_RE.match(part):
+                            address_data['address_zip'] = part
+                            if i + 1 < len(parts):
+                                address_data['address_city'] = ' '.join(parts[i + 1:])
+                            break
+        break
+
+    return address_data
+
+def extract_company_fields(page: ParsedPage, url: str) -> Dict[str, Any]:
+    """
+    Campi azienda grezzi (senza confidence); vuoto se manca il nome
+
+    Prima i dati strutturati (JSON-LD, microdata, OpenGraph), poi le
+    euristiche solo per i campi mancanti. '_structured_fields' elenca i
+    campi arrivati dai dati strutturati.
+    """
+    data: Dict[str, Any] = extract_structured_company(page)
+    data.setdefault('_structured_fields', [])
+
+    company_name = data.get('company_name') or extract_company_name(page)
+    if not company_name:
+        return {}
+    data['company_name'] = company_name
+
+    if 'description' not in data:
+        description = extract_company_description(page)
+        if description:
+            data['description'] = description
+
+    if 'email' not in data:
+        email = extract_company_email(page)
+        if email:
+            data['email'] = email
+
+    if 'phone' not in data:
+        phone = extract_company_phone(page)
+        if phone:
+            data['phone'] = phone
+
+    if not any(key in data for key in ('address_street', 'address_city', 'address_zip')):
+        data.update(extract_company_address(page))
+    data['website'] = url
+    return data
+
+def find_name_near_email(text: str, email: str) -> Optional[str]:
+    """Due parole con iniziale maiuscola subito prima dell'email"""
+    email_pos = text.find(email)
+    if email_pos <= 0:
+        return None
+
+    words = text[:email_pos].strip().split()
+    potential_names = [word for word in words[-10:] if word.istitle() and len(word) > 2]
+    if len(potential_names) >= 2:
+        return ' '.join(potential_names[-2:])
+    return None
+
+def find_position(text: str) -> Optional[str]:
+    """Ruolo (ceo, direttore, ...) citato nella sezione"""
+    lowered = text.lower()
+    for keyword in POSITION_KEYWORDS:
+        index = lowered.find(keyword)
+        if index < 0:
+            continue
+
+        context = lowered[max(0, index - 50):index + 50]
+        words = context.split()
+        for i, word in enumerate(words):
+            if keyword in word:
+                return ' '.join(words[max(0, i - 1):i + 3]).strip().title()
+    return None
+
+def extract_contact_fields(page: ParsedPage) -> List[Dict[str, Any]]:
+    """Contatti grezzi (email, nome, ruolo) dalle sezioni team/contatti"""
+    contacts = []
+
+    for section in page.select('div[class], section[class]'):
+        css_class = section.get('class').lower()
+        if not any(keyword in css_class for keyword in CONTACT_SECTION_KEYWORDS):
+            continue
+
+        emails = EMAIL_RE.findall(section.text)
+        if not emails:
+            continue
+
+        position = find_position(section.text)
+        for email in emails:
+            contact_data: Dict[str, Any] = {'email': email}
+
+            name = find_name_near_email(section.text, email)
+            if name:
+                contact_data['full_name'] = name
+                parts = name.split()
+                if len(parts) >= 2:
+                    contact_data['first_name'] = parts[0]
+                    contact_data['last_name'] = ' '.join(parts[1:])
+
+            if position:
+                contact_data['position'] = position
+
+            contacts.append(contact_data)
+
+    return contacts
+
+def extract_title_and_text(html: str) -> Tuple[str, str]:
+    """
+    Titolo e testo pulito di una pagina
+
+    Returns:
+        (titolo, testo con spazi compattati)
+    """
+    page = ParsedPage(html)
+    return page.title or "No title", page.text
@@ -5,12 +5,19 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
 from models.scraped_data import ScrapedContentModel, ScrapedWebsiteModel
+from app.modules.rag_engine.kb_counters import bump_counters, bump_document_chunks
+from app.services.web_scraping.content_gate import content_gate
 
 logger = logging.getLogger(__name__)
 
+# Pagine per transazione e righe per statement degli INSERT multi-riga
+PAGE_BATCH_SIZE = 20
+DOCUMENT_PAGE_SIZE = 100
+CHUNK_PAGE_SIZE = 500
+
 class KnowledgeBaseIntegration:
     """
     🔗 Integrazione Web Scraping → Knowledge Base
@@ -45,6 +52,98 @@ class KnowledgeBaseIntegration:
         if self.connection:
             self.connection.close()
     
+    def _document_row(
+        self,
+        scraped_content: ScrapedContentModel,
+        website: ScrapedWebsiteModel,
+        company_id: Optional[int],
+        uploaded_by: str,
+        chunks_count: int = 0
+    ) -> tuple:
+        """Riga knowledge_documents (UUID generato qui, serve subito per i chunk)"""
+        url = str(scraped_content.page_url)
+        domain = url.split('/')[2] if '//' in url else 'unknown'
+        
+        filename = f"scraped_{domain}_{scraped_content.content_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+        
+        # Metadata completi per scraping
+        metadata = {
+            "source_type": "web_scraping",
+            "source_url": url,
+            "website_id": website.id,
+            "scraped_content_id": scraped_content.id,
+            "page_title": scraped_content.page_title,
+            "content_type": scraped_content.content_type,
+            "extraction_method": scraped_content.extraction_method,
+            "confidence_score": scraped_content.confidence_score,
+            "language": scraped_content.language,
+            "scraped_at": scraped_content.scraped_at.isoformat() if scraped_content.scraped_at else None,
+            "company_name": website.company_name,
+            "partita_iva": website.partita_iva,
+            "sector": website.sector,
+            "scraping_frequency": website.scraping_frequency,
+            "structured_data": scraped_content.structured_data
+        }
+        
+        return (
+            str(uuid.uuid4()),
+            filename,
+            'text/html',
+            len(scraped_content.cleaned_text or ''),
+            scraped_content.content_hash,
+            scraped_content.cleaned_text,
+            json.dumps(metadata),
+            company_id,
+            uploaded_by,
+            chunks_count
+        )
+    
+    @staticmethod
+    def _chunk_rows(document_id: str, content: str, chunk_size: int = 1000,
+                    chunk_overlap: int = 200) -> List[tuple]:
+        """Righe document_chunks di un documento (chunk sotto i 50 caratteri scartati)"""
+        rows = []
+        start = 0
+        chunk_index = 0
+        
+        while start < len(content):
+            end = min(start + chunk_size, len(content))
+            chunk_text = content[start:end].strip()
+            
+            if len(chunk_text) > 50:  # Minimo 50 caratteri
+                chunk_metadata = {
+                    "chunk_index": chunk_index,
+                    "start_pos": start,
+                    "end_pos": end,
+                    "length": len(chunk_text),
+                    "created_at": datetime.now().isoformat()
+                }
+                rows.append((str(uuid.uuid4()), document_id, chunk_index, chunk_text, json.dumps(chunk_metadata)))
+                chunk_index += 1
+            
+            if end >= len(content):
+                break
+            start = end - chunk_overlap
+        
+        return rows
+    
+    @staticmethod
+    def _insert_documents(cursor, rows: List[tuple]):
+        execute_values(cursor, """
+            INSERT INTO knowledge_documents (
+                id, filename, content_type, file_size, content_hash,
+                extracted_text, metadata, company_id, uploaded_by, chunks_count
+            ) VALUES %s
+        """, rows, page_size=DOCUMENT_PAGE_SIZE)
+    
+    @staticmethod
+    def _insert_chunks(cursor, rows: List[tuple]):
+        execute_values(cursor, """
+            INSERT INTO document_chunks (
+                id, document_id, chunk_index, content_chunk, metadata
+            ) VALUES %s
+        """, rows, page_size=CHUNK_PAGE_SIZE)
+    
     async def create_knowledge_document_from_scraping(
         self, 
         scraped_content: ScrapedContentModel,
@@ -59,61 +158,16 @@ class KnowledgeBaseIntegration:
             UUID del documento creato
         """
         try:
-            # Genera UUID per documento
-            doc_id = str(uuid.uuid4())
-            
-            # Prepara dati documento
-            url = str(scraped_content.page_url)
-            domain = url.split('/')[2] if '//' in url else 'unknown'
-            
-            filename = f"scraped_{domain}_{scraped_content.content_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-            
-            # Metadata completi per scraping
-            metadata = {
-                "source_type": "web_scraping",
-                "source_url": url,
-                "website_id": website.id,
-                "scraped_content_id": scraped_content.id,
-                "page_title": scraped_content.page_title,
-                "content_type": scraped_content.content_type,
-                "extraction_method": scraped_content.extraction_method,
-                "confidence_score": scraped_content.confidence_score,
-                "language": scraped_content.language,
-                "scraped_at": scraped_content.scraped_at.isoformat() if scraped_content.scraped_at else None,
-                "company_name": website.company_name,
-                "partita_iva": website.partita_iva,
-                "sector": website.sector,
-                "scraping_frequency": website.scraping_frequency,
-                "structured_data": scraped_content.structured_data
-            }
+            row = self._document_row(scraped_content, website, company_id, uploaded_by)
             
-            # Insert knowledge document
             with self.connection.cursor() as cursor:
-                query = """
-                INSERT INTO knowledge_documents (
-                    id, filename, content_type, file_size, content_hash,
-                    extracted_text, metadata, company_id, uploaded_by
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s
-                );
-                """
-                
-                cursor.execute(query, (
-                    doc_id,
-                    filename,
-                    'text/html',
-                    len(scraped_content.cleaned_text or ''),
-                    scraped_content.content_hash,
-                    scraped_content.cleaned_text,
-                    json.dumps(metadata),
-                    company_id,
-                    uploaded_by
-                ))
-                
-                self.connection.commit()
+                self._insert_documents(cursor, [row])
+                bump_counters(cursor, total_documents=1, scraped_documents=1)
             
-            logger.info(f"Knowledge document created: {doc_id}")
-            return doc_id
+            self.connection.commit()
+            
+            logger.info(f"Knowledge document created: {row[0]}")
+            return row[0]
             
         except Exception as e:
             self.connection.rollback()
@@ -128,88 +182,90 @@ class KnowledgeBaseIntegration:
         chunk_overlap: int = 200
     ) -> List[str]:
         """
-        Crea chunks per documento
+        Crea chunks per documento (un solo INSERT multi-riga)
         
         Returns:
             Lista di chunk IDs creati
         """
         try:
-            chunks = []
-            chunk_ids = []
-            
-            # Chunking intelligente
-            start = 0
-            chunk_index = 0
-            
-            while start < len(content):
-                end = min(start + chunk_size, len(content))
-                chunk_text = content[start:end].strip()
-                
-                if len(chunk_text) > 50:  # Minimo 50 caratteri
-                    chunk_id = str(uuid.uuid4())
-                    
-                    # Metadata chunk
-                    chunk_metadata = {
-                        "chunk_index": chunk_index,
-                        "start_pos": start,
-                        "end_pos": end,
-                        "length": len(chunk_text),
-                        "created_at": datetime.now().isoformat()
-                    }
-                    
-                    chunks.append({
-                        "id": chunk_id,
-                        "document_id": document_id,
-                        "chunk_index": chunk_index,
-                        "content_chunk": chunk_text,
-                        "metadata": chunk_metadata
-                    })
-                    
-                    chunk_ids.append(chunk_id)
-                    chunk_index += 1
-                
-                start = end - chunk_overlap
+            rows = self._chunk_rows(document_id, content, chunk_size, chunk_overlap)
             
-            # Insert chunks in batch
-            if chunks:
+            if rows:
                 with self.connection.cursor() as cursor:
-                    query = """
-                    INSERT INTO document_chunks (
-                        id, document_id, chunk_index, content_chunk, metadata
-                    ) VALUES (
-                        %s, %s, %s, %s, %s
-                    );
-                    """
-                    
-                    for chunk in chunks:
-                        cursor.execute(query, (
-                            chunk["id"],
-                            chunk["document_id"],
-                            chunk["chunk_index"],
-                            chunk["content_chunk"],
-                            json.dumps(chunk["metadata"])
-                        ))
-                    
-                    self.connection.commit()
+                    self._insert_chunks(cursor, rows)
+                    bump_document_chunks(cursor, document_id, len(rows))
+                
+                self.connection.commit()
             
-            logger.info(f"Created {len(chunks)} chunks for document {document_id}")
-            return chunk_ids
+            logger.info(f"Created {len(rows)} chunks for document {document_id}")
+            return [row[0] for row in rows]
             
         except Exception as e:
             self.connection.rollback()
             logger.error(f"Failed to create chunks: {str(e)}")
             raise
     
+    def _store_batch(
+        self,
+        contents: List[ScrapedContentModel],
+        website: ScrapedWebsiteModel,
+        company_id: Optional[int],
+        uploaded_by: str
+    ) -> List[tuple]:
+        """
+        Documenti, chunk e link scraped_content di piu' pagine in una transazione
+        
+        Returns:
+            (content, doc_id, numero chunk) per ogni pagina salvata
+        """
+        documents, chunks, links, stored = [], [], [], []
+        for content in contents:
+            row = self._document_row(content, website, company_id, uploaded_by)
+            doc_chunks = self._chunk_rows(row[0], content.cleaned_text or '')
+            # chunks_count gia' nella riga: niente UPDATE per documento
+            documents.append(row[:-1] + (len(doc_chunks),))
+            chunks.extend(doc_chunks)
+            if content.id is not None:
+                links.append((content.id, row[0]))
+            stored.append((content, row[0], len(doc_chunks)))
+        
+        with self.connection.cursor() as cursor:
+            self._insert_documents(cursor, documents)
+            if chunks:
+                self._insert_chunks(cursor, chunks)
+            if links:
+                execute_values(cursor, """
+                    UPDATE scraped_content AS sc
+                    SET knowledge_document_id = v.doc_id, rag_processed = true,
+                        rag_processing_status = 'completed'
+                    FROM (VALUES %s) AS v(id, doc_id)
+                    WHERE sc.id = v.id
+                """, links)
+            bump_counters(
+                cursor,
+                total_documents=len(documents),
+                scraped_documents=len(documents),
+                total_chunks=len(chunks)
+            )
+        
+        self.connection.commit()
+        return stored
+    
     async def process_scraped_content_to_knowledge_base(
         self,
         scraped_contents: List[ScrapedContentModel],
         website: ScrapedWebsiteModel,
         company_id: Optional[int] = None,
-        uploaded_by: str = "web_scraping_engine"
+        uploaded_by: str = "web_scraping_engine",
+        batch_size: int = PAGE_BATCH_SIZE
     ) -> Dict[str, Any]:
         """
         Processa lista contenuti scrapati → Knowledge Base
         
+        batch_size pagine per transazione; se un batch fallisce le sue
+        pagine vengono ritentate una per volta, cosi' l'errore resta
+        confinato alla pagina che lo causa.
+        
         Returns:
             Risultati processing completi
         """
@@ -221,34 +277,30 @@ class KnowledgeBaseIntegration:
             "errors": []
         }
         
-        for content in scraped_contents:
+        # Verifica se contenuto è adatto
+        suitable = [content for content in scraped_contents if self._is_suitable_for_knowledge_base(content)]
+        
+        for start in range(0, len(suitable), batch_size):
+            batch = suitable[start:start + batch_size]
             try:
-                # Verifica se contenuto è adatto
-                if not self._is_suitable_for_knowledge_base(content):
-                    continue
-                
-                # Crea knowledge document
-                doc_id = await self.create_knowledge_document_from_scraping(
-                    content, website, company_id, uploaded_by
-                )
-                
+                stored = self._store_batch(batch, website, company_id, uploaded_by)
+            except Exception as e:
+                self.connection.rollback()
+                logger.warning(f"Knowledge base batch failed, retrying page by page: {str(e)}")
+                stored = []
+                for content in batch:
+                    try:
+                        stored.extend(self._store_batch([content], website, company_id, uploaded_by))
+                    except Exception as e:
+                        self.connection.rollback()
+                        results["failed_processing"] += 1
+                        results["errors"].append(f"Content {content.id}: {str(e)}")
+                        logger.error(f"Failed to process content {content.id}: {str(e)}")
+            
+            for content, doc_id, chunks_count in stored:
                 results["document_ids"].append(doc_id)
                 results["documents_created"] += 1
-                
-                # Crea chunks se c'è testo
-                if content.cleaned_text:
-                    chunk_ids = await self.create_document_chunks(
-                        doc_id, content.cleaned_text
-                    )
-                    results["chunks_created"] += len(chunk_ids)
-                
-                # Aggiorna scraped_content con knowledge_document_id
-                await self._update_scraped_content_with_doc_id(content.id, doc_id)
-                
-            except Exception as e:
-                results["failed_processing"] += 1
-                results["errors"].append(f"Content {content.id}: {str(e)}")
-                logger.error(f"Failed to process content {content.id}: {str(e)}")
+                results["chunks_created"] += chunks_count
         
         return results
     
@@ -267,6 +319,12 @@ class KnowledgeBaseIntegration:
         if content.content_type not in suitable_types:
             return False
         
+        # Lingua, pagine d'errore / cookie wall / login, densita' informativa
+        decision = content_gate.evaluate(content.cleaned_text, content.page_title)
+        if not decision.accepted:
+            logger.info(f"🚧 Skipping {content.page_url} before embedding: {decision.reason}")
+            return False
+        
         return True
     
     async def _update_scraped_content_with_doc_id(self, content_id: int, doc_id: str):
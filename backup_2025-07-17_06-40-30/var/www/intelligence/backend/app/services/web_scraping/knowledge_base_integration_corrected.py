@@ -5,12 +5,17 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
 from models.scraped_data import ScrapedContentModel, ScrapedWebsiteModel
 
 logger = logging.getLogger(__name__)
 
+# Pagine per transazione e righe per statement degli INSERT multi-riga
+PAGE_BATCH_SIZE = 20
+DOCUMENT_PAGE_SIZE = 100
+CHUNK_PAGE_SIZE = 500
+
 class KnowledgeBaseIntegration:
     """
     🔗 Integrazione Web Scraping → Knowledge Base
@@ -42,6 +47,88 @@ class KnowledgeBaseIntegration:
         if self.connection:
             self.connection.close()
     
+    def _document_values(
+        self,
+        scraped_content: ScrapedContentModel,
+        website: ScrapedWebsiteModel,
+        company_id: Optional[int],
+        uploaded_by_uuid: Optional[str]
+    ) -> tuple:
+        """Valori knowledge_documents (senza id)"""
+        url = str(scraped_content.page_url)
+        domain = url.split('/')[2] if '//' in url else 'unknown'
+        
+        filename = f"scraped_{domain}_{scraped_content.content_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+        
+        # Metadata completi
+        metadata = {
+            "source_type": "web_scraping",
+            "source_url": url,
+            "website_id": website.id,
+            "scraped_content_id": scraped_content.id,
+            "page_title": scraped_content.page_title,
+            "content_type": scraped_content.content_type,
+            "extraction_method": scraped_content.extraction_method,
+            "confidence_score": scraped_content.confidence_score,
+            "language": scraped_content.language,
+            "scraped_at": scraped_content.scraped_at.isoformat() if scraped_content.scraped_at else None,
+            "company_name": website.company_name,
+            "partita_iva": website.partita_iva,
+            "sector": website.sector
+        }
+        
+        # UUID per uploaded_by (usa quello fornito o sistema default)
+        return (
+            filename,
+            'text/html',
+            len(scraped_content.cleaned_text or ''),
+            scraped_content.content_hash,
+            scraped_content.cleaned_text,
+            json.dumps(metadata),
+            company_id,
+            uploaded_by_uuid or self.system_user_uuid
+        )
+    
+    @staticmethod
+    def _chunk_values(content: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> List[tuple]:
+        """(chunk_index, testo, metadata) dei chunk di un documento"""
+        values = []
+        start = 0
+        chunk_index = 0
+        
+        while start < len(content):
+            end = min(start + chunk_size, len(content))
+            chunk_text = content[start:end].strip()
+            
+            if len(chunk_text) > 50:
+                # Metadata chunk
+                chunk_metadata = {
+                    "chunk_index": chunk_index,
+                    "start_pos": start,
+                    "end_pos": end,
+                    "length": len(chunk_text),
+                    "created_at": datetime.now().isoformat()
+                }
+                values.append((chunk_index, chunk_text, json.dumps(chunk_metadata)))
+                chunk_index += 1
+            
+            if end >= len(content):
+                break
+            start = end - chunk_overlap
+        
+        return values
+    
+    @staticmethod
+    def _insert_chunks(cursor, rows: List[tuple]) -> List[str]:
+        """INSERT multi-riga di (document_id, chunk_index, testo, metadata)"""
+        inserted = execute_values(cursor, """
+            INSERT INTO document_chunks (
+                document_id, chunk_index, content_chunk, metadata
+            ) VALUES %s
+            RETURNING id
+        """, rows, template="(%s::uuid, %s, %s, %s)", page_size=CHUNK_PAGE_SIZE, fetch=True)
+        return [str(row[0]) for row in inserted]
+    
     async def create_knowledge_document_from_scraping(
         self, 
         scraped_content: ScrapedContentModel,
@@ -53,32 +140,6 @@ class KnowledgeBaseIntegration:
         Crea knowledge document - FIXED per UUID schema
         """
         try:
-            # Prepara dati documento
-            url = str(scraped_content.page_url)
-            domain = url.split('/')[2] if '//' in url else 'unknown'
-            
-            filename = f"scraped_{domain}_{scraped_content.content_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-            
-            # Metadata completi
-            metadata = {
-                "source_type": "web_scraping",
-                "source_url": url,
-                "website_id": website.id,
-                "scraped_content_id": scraped_content.id,
-                "page_title": scraped_content.page_title,
-                "content_type": scraped_content.content_type,
-                "extraction_method": scraped_content.extraction_method,
-                "confidence_score": scraped_content.confidence_score,
-                "language": scraped_content.language,
-                "scraped_at": scraped_content.scraped_at.isoformat() if scraped_content.scraped_at else None,
-                "company_name": website.company_name,
-                "partita_iva": website.partita_iva,
-                "sector": website.sector
-            }
-            
-            # UUID per uploaded_by (usa quello fornito o sistema default)
-            uploaded_by = uploaded_by_uuid or self.system_user_uuid
-            
             # Insert knowledge document - SCHEMA CORRETTO
             with self.connection.cursor() as cursor:
                 query = """
@@ -90,16 +151,7 @@ class KnowledgeBaseIntegration:
                 ) RETURNING id;
                 """
                 
-                cursor.execute(query, (
-                    filename,
-                    'text/html',
-                    len(scraped_content.cleaned_text or ''),
-                    scraped_content.content_hash,
-                    scraped_content.cleaned_text,
-                    json.dumps(metadata),
-                    company_id,
-                    uploaded_by
-                ))
+                cursor.execute(query, self._document_values(scraped_content, website, company_id, uploaded_by_uuid))
                 
                 doc_id = cursor.fetchone()[0]
                 self.connection.commit()
@@ -119,50 +171,13 @@ class KnowledgeBaseIntegration:
         chunk_size: int = 1000,
         chunk_overlap: int = 200
     ) -> List[str]:
-        """Crea chunks per documento"""
+        """Crea chunks per documento (un solo INSERT multi-riga, un commit)"""
         try:
+            rows = [(document_id,) + values for values in self._chunk_values(content, chunk_size, chunk_overlap)]
             chunk_ids = []
-            
-            # Chunking
-            start = 0
-            chunk_index = 0
-            
-            while start < len(content):
-                end = min(start + chunk_size, len(content))
-                chunk_text = content[start:end].strip()
-                
-                if len(chunk_text) > 50:
-                    # Metadata chunk
-                    chunk_metadata = {
-                        "chunk_index": chunk_index,
-                        "start_pos": start,
-                        "end_pos": end,
-                        "length": len(chunk_text),
-                        "created_at": datetime.now().isoformat()
-                    }
-                    
-                    # Insert chunk
-                    with self.connection.cursor() as cursor:
-                        query = """
-                        INSERT INTO document_chunks (
-                            document_id, chunk_index, content_chunk, metadata
-                        ) VALUES (
-                            %s::uuid, %s, %s, %s
-                        ) RETURNING id;
-                        """
-                        
-                        cursor.execute(query, (
-                            document_id,
-                            chunk_index,
-                            chunk_text,
-                            json.dumps(chunk_metadata)
-                        ))
-                        
-                        chunk_id = cursor.fetchone()[0]
-                        chunk_ids.append(str(chunk_id))
-                        chunk_index += 1
-                
-                start = end - chunk_overlap
+            if rows:
+                with self.connection.cursor() as cursor:
+                    chunk_ids = self._insert_chunks(cursor, rows)
                 self.connection.commit()
             
             logger.info(f"Created {len(chunk_ids)} chunks for document {document_id}")
@@ -173,14 +188,68 @@ class KnowledgeBaseIntegration:
             logger.error(f"Failed to create chunks: {str(e)}")
             raise
     
+    def _store_batch(
+        self,
+        contents: List[ScrapedContentModel],
+        website: ScrapedWebsiteModel,
+        company_id: Optional[int],
+        uploaded_by_uuid: Optional[str]
+    ) -> List[tuple]:
+        """
+        Documenti, chunk e link scraped_content di piu' pagine in una transazione
+        
+        Gli id dei documenti sono generati qui: i chunk li referenziano nello
+        stesso batch senza dover rileggere il RETURNING riga per riga.
+        
+        Returns:
+            (content, doc_id, numero chunk) per ogni pagina salvata
+        """
+        documents, chunks, links, stored = [], [], [], []
+        for content in contents:
+            doc_id = str(uuid.uuid4())
+            documents.append((doc_id,) + self._document_values(content, website, company_id, uploaded_by_uuid))
+            doc_chunks = [(doc_id,) + values for values in self._chunk_values(content.cleaned_text or '')]
+            chunks.extend(doc_chunks)
+            if content.id is not None:
+                links.append((content.id, doc_id))
+            stored.append((content, doc_id, len(doc_chunks)))
+        
+        with self.connection.cursor() as cursor:
+            execute_values(cursor, """
+                INSERT INTO knowledge_documents (
+                    id, filename, content_type, file_size, content_hash,
+                    extracted_text, metadata, company_id, uploaded_by
+                ) VALUES %s
+            """, documents, template="(%s::uuid, %s, %s, %s, %s, %s, %s, %s, %s::uuid)",
+                page_size=DOCUMENT_PAGE_SIZE)
+            if chunks:
+                self._insert_chunks(cursor, chunks)
+            if links:
+                execute_values(cursor, """
+                    UPDATE scraped_content AS sc
+                    SET knowledge_document_id = v.doc_id, rag_processed = true,
+                        rag_processing_status = 'completed'
+                    FROM (VALUES %s) AS v(id, doc_id)
+                    WHERE sc.id = v.id
+                """, links, template="(%s, %s::uuid)")
+        
+        self.connection.commit()
+        return stored
+    
     async def process_scraped_content_to_knowledge_base(
         self,
         scraped_contents: List[ScrapedContentModel],
         website: ScrapedWebsiteModel,
         company_id: Optional[int] = None,
-        uploaded_by_uuid: Optional[str] = None
+        uploaded_by_uuid: Optional[str] = None,
+        batch_size: int = PAGE_BATCH_SIZE
     ) -> Dict[str, Any]:
-        """Processa lista contenuti → Knowledge Base"""
+        """
+        Processa lista contenuti → Knowledge Base
+        
+        batch_size pagine per transazione; un batch fallito viene ritentato
+        pagina per pagina per isolare il contenuto che causa l'errore.
+        """
         results = {
             "documents_created": 0,
             "chunks_created": 0,
@@ -189,34 +258,30 @@ class KnowledgeBaseIntegration:
             "errors": []
         }
         
-        for content in scraped_contents:
+        # Verifica idoneità
+        suitable = [content for content in scraped_contents if self._is_suitable_for_knowledge_base(content)]
+        
+        for start in range(0, len(suitable), batch_size):
+            batch = suitable[start:start + batch_size]
             try:
-                # Verifica idoneità
-                if not self._is_suitable_for_knowledge_base(content):
-                    continue
-                
-                # Crea knowledge document
-                doc_id = await self.create_knowledge_document_from_scraping(
-                    content, website, company_id, uploaded_by_uuid
-                )
-                
+                stored = self._store_batch(batch, website, company_id, uploaded_by_uuid)
+            except Exception as e:
+                self.connection.rollback()
+                logger.warning(f"Knowledge base batch failed, retrying page by page: {str(e)}")
+                stored = []
+                for content in batch:
+                    try:
+                        stored.extend(self._store_batch([content], website, company_id, uploaded_by_uuid))
+                    except Exception as e:
+                        self.connection.rollback()
+                        results["failed_processing"] += 1
+                        results["errors"].append(f"Content {content.id}: {str(e)}")
+                        logger.error(f"Failed to process content {content.id}: {str(e)}")
+            
+            for content, doc_id, chunks_count in stored:
                 results["document_ids"].append(doc_id)
                 results["documents_created"] += 1
-                
-                # Crea chunks
-                if content.cleaned_text:
-                    chunk_ids = await self.create_document_chunks(
-                        doc_id, content.cleaned_text
-                    )
-                    results["chunks_created"] += len(chunk_ids)
-                
-                # Aggiorna scraped_content
-                await self._update_scraped_content_with_doc_id(content.id, doc_id)
-                
-            except Exception as e:
-                results["failed_processing"] += 1
-                results["errors"].append(f"Content {content.id}: {str(e)}")
-                logger.error(f"Failed to process content {content.id}: {str(e)}")
+                results["chunks_created"] += chunks_count
         
         return results
     
@@ -0,0 +1,195 @@
+"""
+📊 Metriche di scraping per dominio
+
+- ScrapingMetrics: registro di processo (istogrammi e contatori per
+  dominio), esportato in formato testo Prometheus su /metrics
+- CrawlMetrics: riepilogo di un singolo crawl, in results['metrics']
+
+Nessuna dipendenza esterna: il formato di esposizione Prometheus e'
+generato direttamente.
+"""
+
+import bisect
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Oltre questo numero di domini le nuove serie finiscono in "other"
+MAX_DOMAINS = 1000
+OTHER_DOMAIN = "other"
+
+class Histogram:
+    """Istogramma cumulativo in stile Prometheus"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            rows.append((_format_number(bound), total))
+        rows.append(("+Inf", self.count))
+        return rows
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+class ScrapingMetrics:
+    """Registro delle metriche di scraping del processo"""
+
+    HISTOGRAMS = {
+        'scraping_fetch_latency_seconds': (('domain', 'render_mode'), LATENCY_BUCKETS,
+                                           "Latenza di fetch per pagina"),
+        'scraping_page_bytes': (('domain',), BYTES_BUCKETS, "Dimensione delle pagine scaricate"),
+        'scraping_parse_seconds': (('domain',), PARSE_BUCKETS, "Tempo di parsing ed estrazione per pagina"),
+    }
+    COUNTERS = {
+        'scraping_responses_total': (('domain', 'status', 'render_mode'), "Risposte per codice HTTP"),
+        'scraping_items_extracted_total': (('domain', 'kind'), "Elementi estratti (contenuti, contatti, aziende)"),
+    }
+
+    def __init__(self, max_domains: int = MAX_DOMAINS):
+        self.max_domains = max_domains
+        self._lock = threading.Lock()
+        self._domains = set()
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = defaultdict(dict)
+        self._counters: Dict[str, Counter] = defaultdict(Counter)
+
+    def _domain(self, domain: str) -> str:
+        if domain in self._domains:
+            return domain
+        if len(self._domains) >= self.max_domains:
+            return OTHER_DOMAIN
+        self._domains.add(domain)
+        return domain
+
+    def _observe(self, name: str, labels: Tuple, value: float):
+        series = self._histograms[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = Histogram(self.HISTOGRAMS[name][1])
+        histogram.observe(value)
+
+    def observe_fetch(self, domain: str, seconds: float, size_bytes: int, status, render_mode: str):
+        with self._lock:
+            domain = self._domain(domain)
+            self._observe('scraping_fetch_latency_seconds', (domain, render_mode), seconds)
+            if size_bytes:
+                self._observe('scraping_page_bytes', (domain,), size_bytes)
+            self._counters['scraping_responses_total'][(domain, str(status), render_mode)] += 1
+
+    def observe_parse(self, domain: str, seconds: float):
+        with self._lock:
+            self._observe('scraping_parse_seconds', (self._domain(domain),), seconds)
+
+    def observe_items(self, domain: str, kind: str, count: int):
+        if count:
+            with self._lock:
+                self._counters['scraping_items_extracted_total'][(self._domain(domain), kind)] += count
+
+    def render_prometheus(self) -> str:
+        """Formato di esposizione testuale Prometheus 0.0.4"""
+        lines = []
+        with self._lock:
+            for name, (label_names, _, help_text) in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    for bound, count in histogram.cumulative():
+                        bucket_labels = _labels(label_names, labels, 'le="%s"' % bound)
+                        lines.append(f"{name}_bucket{bucket_labels} {count}")
+                    lines.append(f"{name}_sum{_labels(label_names, labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(label_names, labels)} {histogram.count}")
+
+            for name, (label_names, help_text) in self.COUNTERS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_labels(label_names, labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._domains.clear()
+            self._histograms.clear()
+            self._counters.clear()
+
+class CrawlMetrics:
+    """Metriche di un solo crawl, riassunte a fine job"""
+
+    def __init__(self, registry: Optional[ScrapingMetrics] = None):
+        self.registry = registry
+        self.latencies: List[float] = []
+        self.parse_times: List[float] = []
+        self.bytes = 0
+        self.statuses: Counter = Counter()
+        self.render_modes: Counter = Counter()
+        self.items: Counter = Counter()
+
+    def fetch(self, domain: str, seconds: float, size_bytes: int, status, render_mode: str):
+        self.latencies.append(seconds)
+        self.bytes += size_bytes or 0
+        self.statuses[str(status)] += 1
+        self.render_modes[render_mode] += 1
+        if self.registry:
+            self.registry.observe_fetch(domain, seconds, size_bytes, status, render_mode)
+
+    def parse(self, domain: str, seconds: float):
+        self.parse_times.append(seconds)
+        if self.registry:
+            self.registry.observe_parse(domain, seconds)
+
+    def extracted(self, domain: str, kind: str, count: int):
+        self.items[kind] += count
+        if self.registry:
+            self.registry.observe_items(domain, kind, count)
+
+    def summary(self) -> Dict:
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            'fetches': len(self.latencies),
+            'bytes': self.bytes,
+            'statuses': dict(self.statuses),
+            'render_modes': dict(self.render_modes),
+            'fetch_latency_p50_ms': ms(percentile(self.latencies, 0.5)),
+            'fetch_latency_p95_ms': ms(percentile(self.latencies, 0.95)),
+            'parse_total_ms': ms(sum(self.parse_times)),
+            'parse_p95_ms': ms(percentile(self.parse_times, 0.95)),
+            'items_extracted': dict(self.items)
+        }
+
+scraping_metrics = ScrapingMetrics()
@@ -23,6 +23,8 @@ class ScrapedWebsite(ScrapingBase):
     status = Column(String(50), default="pending")
     last_scraped = Column(DateTime)
     scraping_frequency = Column(String(50), default="on_demand")
+    next_scrape_scheduled = Column(DateTime, index=True)
+    boilerplate_template = Column(JSONB)
     robots_txt_compliant = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -60,6 +60,7 @@ class ScrapedWebsiteModel(BaseModel):
     # Configurazione
     scraping_frequency: ScrapingFrequency = ScrapingFrequency.WEEKLY
     max_depth: int = Field(default=1, ge=1, le=5)
+    max_pages: int = Field(default=50, ge=1, le=500)
     follow_external_links: bool = False
     respect_robots_txt: bool = True
     
@@ -101,7 +102,7 @@ class ScrapedContentModel(BaseModel):
     """Modello per contenuti estratti"""
     
     id: Optional[int] = None
-    website_id: int
+    website_id: Optional[int] = None  # None per siti non ancora salvati (crawl-site, enrichment)
     
     # Identificazione
     page_url: HttpUrl
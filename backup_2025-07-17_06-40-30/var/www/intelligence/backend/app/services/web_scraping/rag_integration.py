@@ -1,7 +1,9 @@
 import asyncio
 import logging
+import time
 import uuid
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
 
@@ -11,9 +13,34 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from models.scraped_data import ScrapedContentModel, RAGProcessingStatus
+from app.services.web_scraping.content_gate import content_gate
 
 logger = logging.getLogger(__name__)
 
+PIPELINE_STAGES = ('persist', 'chunk', 'embed', 'upsert')
+
+@dataclass
+class _BulkRun:
+    """Stato di un bulk processing: code tra gli stage, risultati e tempi"""
+    contents: List[ScrapedContentModel]
+    queue_size: int
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    timings: Dict[str, Dict[str, float]] = field(
+        default_factory=lambda: {stage: {'seconds': 0.0, 'items': 0, 'calls': 0} for stage in PIPELINE_STAGES}
+    )
+
+    def __post_init__(self):
+        self.to_persist: asyncio.Queue = asyncio.Queue()
+        self.to_chunk: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self.to_embed: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self.to_upsert: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+    def record(self, stage: str, started: float, items: int):
+        timing = self.timings[stage]
+        timing['seconds'] += time.perf_counter() - started
+        timing['items'] += items
+        timing['calls'] += 1
+
 class WebScrapingRAGIntegration:
     """
     🔗 Integrazione Web Scraping con RAG esistente
@@ -31,11 +58,21 @@ class WebScrapingRAGIntegration:
         self.chunk_overlap = 200
         self.min_content_length = 100
         
+        # Pipeline del bulk processing: documenti creati in parallelo,
+        # embedding e upsert a batch; code limitate = backpressure
+        self.persist_concurrency = 8
+        self.embed_batch_size = 64
+        self.embed_concurrency = 4
+        self.upsert_batch_size = 128
+        self.batch_wait = 0.5
+        self.queue_size = 256
+        
         # Statistiche
         self.stats = {
             'documents_processed': 0,
             'embeddings_created': 0,
             'rag_integrations': 0,
+            'rejected_by_gate': 0,
             'errors': 0
         }
     
@@ -60,9 +97,10 @@ class WebScrapingRAGIntegration:
         
         try:
             # Verifica se contenuto è adatto per RAG
-            if not self._is_content_suitable_for_rag(content):
+            reason = self._rag_rejection_reason(content)
+            if reason:
                 result['processing_status'] = RAGProcessingStatus.SKIPPED
-                result['errors'].append("Content not suitable for RAG processing")
+                result['errors'].append(f"Content not suitable for RAG processing: {reason}")
                 return result
             
             # Prepara documento per knowledge_documents
@@ -113,23 +151,55 @@ class WebScrapingRAGIntegration:
         """
         Processamento bulk di contenuti scrapati
         
+        Pipeline a stage collegati da code limitate:
+        persist (persist_concurrency documenti insieme) → chunk →
+        embed (batch di embed_batch_size chunk, embed_concurrency chiamate
+        in volo) → upsert (batch di upsert_batch_size punti).
+        Se l'embedding rallenta le code si riempiono e gli stage a monte
+        si fermano, senza accumulare chunk in memoria.
+        
         Args:
             contents: Lista contenuti da processare
             
         Returns:
-            Dict con risultati bulk processing
+            Dict con risultati bulk processing e tempi per stage
+            (secondi sommati sui task dello stage, possono superare il wall time)
         """
+        started = time.perf_counter()
+        run = _BulkRun(contents=contents, queue_size=self.queue_size)
+        
+        for index, content in enumerate(contents):
+            run.results.append({
+                'content_id': content.id,
+                'processing_status': RAGProcessingStatus.PROCESSING,
+                'knowledge_document_id': None,
+                'embeddings_created': 0,
+                'chunks_created': 0,
+                'errors': []
+            })
+            run.to_persist.put_nowait(index)
+        
+        await asyncio.gather(
+            self._persist_stage(run),
+            self._chunk_stage(run),
+            self._embed_stage(run),
+            self._upsert_stage(run)
+        )
+        
         results = {
             'total_processed': 0,
             'successful': 0,
             'failed': 0,
             'skipped': 0,
-            'individual_results': []
+            'individual_results': run.results,
+            'timings': {
+                stage: {**timing, 'seconds': round(timing['seconds'], 3)}
+                for stage, timing in run.timings.items()
+            }
         }
         
-        for content in contents:
-            result = await self.process_scraped_content_for_rag(content)
-            results['individual_results'].append(result)
+        for result in run.results:
+            self._finalize_result(result)
             results['total_processed'] += 1
             
             if result['processing_status'] == RAGProcessingStatus.COMPLETED:
@@ -139,25 +209,191 @@ class WebScrapingRAGIntegration:
             elif result['processing_status'] == RAGProcessingStatus.SKIPPED:
                 results['skipped'] += 1
         
+        results['timings']['wall_seconds'] = round(time.perf_counter() - started, 3)
+        stage_times = ', '.join(f"{stage} {results['timings'][stage]['seconds']}s" for stage in PIPELINE_STAGES)
+        logger.info(
+            f"📚 RAG bulk: {results['successful']}/{results['total_processed']} contents in "
+            f"{results['timings']['wall_seconds']}s ({stage_times})"
+        )
         return results
     
+    async def _persist_stage(self, run: _BulkRun):
+        """Filtro + creazione knowledge document, persist_concurrency task"""
+        
+        async def worker():
+            while not run.to_persist.empty():
+                index = run.to_persist.get_nowait()
+                content, result = run.contents[index], run.results[index]
+                stage_start = time.perf_counter()
+                try:
+                    reason = self._rag_rejection_reason(content)
+                    if reason:
+                        result['processing_status'] = RAGProcessingStatus.SKIPPED
+                        result['errors'].append(f"Content not suitable for RAG processing: {reason}")
+                        continue
+                    
+                    knowledge_doc_id = await self._create_knowledge_document(self._prepare_document_data(content))
+                    if not knowledge_doc_id:
+                        result['processing_status'] = RAGProcessingStatus.FAILED
+                        result['errors'].append("Failed to create knowledge document")
+                        continue
+                    result['knowledge_document_id'] = knowledge_doc_id
+                except Exception as e:
+                    logger.error(f"RAG processing failed for content {content.id}: {str(e)}")
+                    result['processing_status'] = RAGProcessingStatus.FAILED
+                    result['errors'].append(f"Processing error: {str(e)}")
+                    self.stats['errors'] += 1
+                    continue
+                finally:
+                    run.record('persist', stage_start, 1)
+                
+                await run.to_chunk.put(index)
+        
+        await asyncio.gather(*(worker() for _ in range(max(self.persist_concurrency, 1))))
+        await run.to_chunk.put(None)
+    
+    async def _chunk_stage(self, run: _BulkRun):
+        """Chunking dei documenti creati; i chunk proseguono con l'indice del contenuto"""
+        while (index := await run.to_chunk.get()) is not None:
+            content, result = run.contents[index], run.results[index]
+            stage_start = time.perf_counter()
+            chunks = await self._create_content_chunks(content)
+            run.record('chunk', stage_start, len(chunks))
+            
+            self.stats['documents_processed'] += 1
+            if not chunks:
+                result['processing_status'] = RAGProcessingStatus.FAILED
+                result['errors'].append("No chunks created from content")
+                continue
+            
+            for chunk in chunks:
+                await run.to_embed.put((index, chunk))
+        
+        await run.to_embed.put(None)
+    
+    async def _collect_batch(self, queue: asyncio.Queue, size: int) -> Tuple[List[Any], bool]:
+        """
+        Fino a size elementi dalla coda; un batch incompleto parte dopo
+        batch_wait secondi senza nuovi elementi
+        
+        Returns:
+            (batch, True se lo stage a monte ha finito)
+        """
+        batch = []
+        item = await queue.get()
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= size:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=self.batch_wait)
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True
+    
+    async def _embed_stage(self, run: _BulkRun):
+        """Embedding a batch con al massimo embed_concurrency chiamate in volo"""
+        slots = asyncio.Semaphore(max(self.embed_concurrency, 1))
+        tasks = set()
+        
+        async def embed(batch):
+            stage_start = time.perf_counter()
+            try:
+                embeddings = await self._embed_chunk_batch(
+                    [chunk for _, chunk in batch],
+                    [run.results[index]['knowledge_document_id'] for index, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"Embedding batch failed ({len(batch)} chunks): {str(e)}")
+                embeddings = [None] * len(batch)
+            finally:
+                run.record('embed', stage_start, len(batch))
+                slots.release()
+            
+            points = []
+            for (index, chunk), embedding in zip(batch, embeddings):
+                if embedding and embedding.get('success'):
+                    points.append((index, chunk, embedding))
+                else:
+                    run.results[index]['errors'].append(f"Failed to create embedding for chunk {chunk['chunk_id']}")
+            for point in points:
+                await run.to_upsert.put(point)
+        
+        finished = False
+        while not finished:
+            batch, finished = await self._collect_batch(run.to_embed, self.embed_batch_size)
+            if not batch:
+                continue
+            # Con tutte le chiamate in volo lo stage non legge: la coda a monte si riempie
+            await slots.acquire()
+            task = asyncio.create_task(embed(batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        
+        await asyncio.gather(*tasks)
+        await run.to_upsert.put(None)
+    
+    async def _upsert_stage(self, run: _BulkRun):
+        """Scrittura dei vettori a batch di upsert_batch_size"""
+        finished = False
+        while not finished:
+            batch, finished = await self._collect_batch(run.to_upsert, self.upsert_batch_size)
+            if not batch:
+                continue
+            stage_start = time.perf_counter()
+            try:
+                await self._upsert_embeddings([embedding for _, _, embedding in batch])
+            except Exception as e:
+                logger.error(f"Vector upsert failed ({len(batch)} points): {str(e)}")
+                for index, chunk, _ in batch:
+                    run.results[index]['errors'].append(f"Error storing chunk {chunk['chunk_id']}: {str(e)}")
+                continue
+            finally:
+                run.record('upsert', stage_start, len(batch))
+            
+            for index, _, _ in batch:
+                run.results[index]['embeddings_created'] += 1
+                run.results[index]['chunks_created'] += 1
+            self.stats['embeddings_created'] += len(batch)
+    
+    def _finalize_result(self, result: Dict[str, Any]):
+        """Stato finale di un contenuto arrivato in fondo alla pipeline"""
+        if result['processing_status'] != RAGProcessingStatus.PROCESSING:
+            return
+        if result['embeddings_created'] > 0:
+            result['processing_status'] = RAGProcessingStatus.COMPLETED
+            self.stats['rag_integrations'] += 1
+        else:
+            result['processing_status'] = RAGProcessingStatus.FAILED
+    
     def _is_content_suitable_for_rag(self, content: ScrapedContentModel) -> bool:
         """Verifica se contenuto è adatto per RAG"""
+        return self._rag_rejection_reason(content) is None
+    
+    def _rag_rejection_reason(self, content: ScrapedContentModel) -> Optional[str]:
+        """Motivo per cui il contenuto non va in RAG, None se adatto"""
         
         # Verifica lunghezza minima
         if content.cleaned_text and len(content.cleaned_text) < self.min_content_length:
-            return False
+            return "too_short"
         
         # Verifica confidence score
         if content.confidence_score < 0.3:
-            return False
+            return "low_confidence"
         
         # Verifica tipo contenuto
         suitable_types = ['company_info', 'document', 'service', 'product']
         if content.content_type not in suitable_types:
-            return False
+            return "unsuitable_content_type"
+        
+        # Lingua, pagine d'errore / cookie wall / login, densita' informativa
+        decision = content_gate.evaluate(content.cleaned_text, content.page_title)
+        if not decision.accepted:
+            self.stats['rejected_by_gate'] += 1
+            logger.info(f"🚧 Content {content.id} rejected before embedding: {decision.reason} ({content.page_url})")
+            return decision.reason
         
-        return True
+        return None
     
     def _prepare_document_data(self, content: ScrapedContentModel) -> Dict[str, Any]:
         """Prepara dati per knowledge_documents"""
@@ -235,6 +471,8 @@ class WebScrapingRAGIntegration:
                 })
                 chunk_id += 1
             
+            if chunk_end >= len(text):
+                break
             chunk_start = chunk_end - self.chunk_overlap
         
         return chunks
@@ -251,22 +489,21 @@ class WebScrapingRAGIntegration:
         }
         
         try:
-            # Per ogni chunk, crea embedding
-            for chunk in chunks:
+            for start in range(0, len(chunks), self.embed_batch_size):
+                batch = chunks[start:start + self.embed_batch_size]
                 try:
-                    # Simula creazione embedding
-                    embedding_result = await self._simulate_embedding_creation(
-                        chunk, knowledge_doc_id, content
-                    )
+                    embeddings = await self._embed_chunk_batch(batch, [knowledge_doc_id] * len(batch))
+                    stored = [embedding for embedding in embeddings if embedding.get('success')]
+                    for chunk, embedding in zip(batch, embeddings):
+                        if not embedding.get('success'):
+                            result['errors'].append(f"Failed to create embedding for chunk {chunk['chunk_id']}")
                     
-                    if embedding_result['success']:
-                        result['embeddings_created'] += 1
-                        result['chunks_created'] += 1
-                    else:
-                        result['errors'].append(f"Failed to create embedding for chunk {chunk['chunk_id']}")
+                    await self._upsert_embeddings(stored)
+                    result['embeddings_created'] += len(stored)
+                    result['chunks_created'] += len(stored)
                 
                 except Exception as e:
-                    result['errors'].append(f"Error processing chunk {chunk['chunk_id']}: {str(e)}")
+                    result['errors'].append(f"Error processing chunks {start}-{start + len(batch) - 1}: {str(e)}")
             
             result['success'] = result['embeddings_created'] > 0
             self.stats['embeddings_created'] += result['embeddings_created']
@@ -276,20 +513,28 @@ class WebScrapingRAGIntegration:
         
         return result
     
-    async def _simulate_embedding_creation(self, chunk: Dict[str, Any], 
-                                         knowledge_doc_id: str,
-                                         content: ScrapedContentModel) -> Dict[str, Any]:
-        """Simula creazione embedding"""
+    async def _embed_chunk_batch(self, chunks: List[Dict[str, Any]],
+                                 knowledge_doc_ids: List[str]) -> List[Dict[str, Any]]:
+        """Simula creazione embedding: una chiamata API per batch di chunk"""
         
         # Simula delay API
         await asyncio.sleep(0.1)
         
         # Simula successo
-        return {
-            'success': True,
-            'embedding_id': f"emb_{knowledge_doc_id}_{chunk['chunk_id']}",
-            'vector_id': f"vec_{uuid.uuid4()}"
-        }
+        return [
+            {
+                'success': True,
+                'embedding_id': f"emb_{knowledge_doc_id}_{chunk['chunk_id']}",
+                'vector_id': f"vec_{uuid.uuid4()}"
+            }
+            for chunk, knowledge_doc_id in zip(chunks, knowledge_doc_ids)
+        ]
+    
+    async def _upsert_embeddings(self, embeddings: List[Dict[str, Any]]) -> int:
+        """Simula upsert dei vettori in Qdrant (un batch per chiamata)"""
+        if embeddings:
+            await asyncio.sleep(0.01)
+        return len(embeddings)
     
     async def get_rag_content_by_website(self, website_id: int) -> List[Dict[str, Any]]:
         """Ottieni contenuti RAG per un sito web"""
@@ -321,6 +566,7 @@ class WebScrapingRAGIntegration:
             'documents_processed': 0,
             'embeddings_created': 0,
             'rag_integrations': 0,
+            'rejected_by_gate': 0,
             'errors': 0
         }
 
@@ -0,0 +1,166 @@
+"""
+🚦 Rate control adattivo per dominio
+
+Token bucket per dominio con regolazione AIMD:
+- risposte sane e latenza stabile: la velocita' cresce di un passo fisso
+- 429, 5xx, errori di rete o latenza in salita: la velocita' si dimezza
+- Retry-After e Crawl-delay di robots.txt sono sempre rispettati
+
+I limiti (intervallo minimo e massimo tra richieste) sono configurabili;
+un CDN veloce sale fino al limite, un server fragile resta lento.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# Retry-After oltre questo tetto non blocca il crawl per ore
+MAX_RETRY_AFTER = 120.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Secondi da un header Retry-After (delta-seconds o data HTTP)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+@dataclass
+class DomainRate:
+    """Stato di un dominio"""
+    rate: float
+    max_rate: float
+    tokens: float = 1.0
+    updated: float = field(default_factory=time.monotonic)
+    latency_ewma: Optional[float] = None
+    latency_baseline: Optional[float] = None
+    blocked_until: float = 0.0
+    last_decrease: float = 0.0
+    successes: int = 0
+    failures: int = 0
+
+class AdaptiveRateController:
+    """
+    Args:
+        initial_interval: secondi tra richieste allo stesso dominio all'inizio
+        min_interval: limite inferiore (velocita' massima)
+        max_interval: limite superiore (velocita' minima)
+        increase: aumento additivo della velocita' (richieste/s) per risposta sana
+        decrease: fattore moltiplicativo in caso di errore o rallentamento
+        latency_factor: latenza media oltre baseline * fattore = rallentamento
+        burst: richieste consecutive ammesse senza attesa
+    """
+
+    def __init__(self, initial_interval: float = 2.0, min_interval: float = 0.25,
+                 max_interval: float = 30.0, increase: float = 0.1, decrease: float = 0.5,
+                 latency_factor: float = 2.0, burst: float = 1.0):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, initial_interval)
+        self.initial_rate = 1.0 / max(initial_interval, min_interval)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.burst = burst
+        self._domains: Dict[str, DomainRate] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @property
+    def min_rate(self) -> float:
+        return 1.0 / self.max_interval
+
+    def _state(self, domain: str) -> DomainRate:
+        state = self._domains.get(domain)
+        if state is None:
+            state = self._domains[domain] = DomainRate(rate=self.initial_rate, max_rate=1.0 / self.min_interval)
+        return state
+
+    def set_crawl_delay(self, domain: str, seconds: float):
+        """Crawl-delay di robots.txt: tetto alla velocita' del dominio"""
+        state = self._state(domain)
+        # Anche oltre max_interval: il Crawl-delay si rispetta sempre
+        state.max_rate = min(1.0 / self.min_interval, 1.0 / max(seconds, self.min_interval))
+        state.rate = min(state.rate, state.max_rate)
+
+    def set_interval(self, domain: str, seconds: float):
+        """Riparte da un intervallo noto (es. lasciato da un altro worker)"""
+        state = self._state(domain)
+        state.rate = min(max(1.0 / max(seconds, 1e-3), self.min_rate), state.max_rate)
+
+    def interval(self, domain: str) -> float:
+        return 1.0 / self._state(domain).rate
+
+    async def acquire(self, domain: str):
+        """Attende un token del dominio"""
+        lock = self._locks.setdefault(domain, asyncio.Lock())
+        async with lock:
+            state = self._state(domain)
+            while True:
+                now = time.monotonic()
+                if now < state.blocked_until:
+                    await asyncio.sleep(state.blocked_until - now)
+                    continue
+
+                state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+                state.updated = now
+                if state.tokens >= 1.0:
+                    state.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - state.tokens) / state.rate)
+
+    def record(self, domain: str, status: Optional[int], latency: Optional[float] = None,
+               retry_after: Optional[float] = None):
+        """
+        Esito di una richiesta
+
+        Args:
+            status: codice HTTP, None per errore di rete / timeout
+            latency: secondi (None per i fetch via browser, non confrontabili)
+            retry_after: secondi dall'header Retry-After
+        """
+        state = self._state(domain)
+        now = time.monotonic()
+
+        if retry_after:
+            state.blocked_until = max(state.blocked_until, now + retry_after)
+
+        slow = False
+        if latency is not None:
+            state.latency_ewma = latency if state.latency_ewma is None else 0.7 * state.latency_ewma + 0.3 * latency
+            if state.latency_baseline is None or state.latency_ewma < state.latency_baseline:
+                state.latency_baseline = state.latency_ewma
+            slow = state.latency_ewma > self.latency_factor * state.latency_baseline
+
+        if status is None or status == 429 or status >= 500 or slow:
+            state.failures += 1
+            # Un solo dimezzamento per intervallo: errori concorrenti non fanno crollare la velocita'
+            if now - state.last_decrease >= 1.0 / state.rate:
+                # Il tetto del Crawl-delay vale anche in backoff
+                state.rate = min(state.max_rate, max(self.min_rate, state.rate * self.decrease))
+                state.last_decrease = now
+                if slow:
+                    # Nuovo riferimento: si riparte dalla latenza attuale
+                    state.latency_baseline = state.latency_ewma
+        else:
+            state.successes += 1
+            state.rate = min(state.max_rate, state.rate + self.increase)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Stato corrente per dominio (intervallo in secondi, latenza in ms)"""
+        return {
+            domain: {
+                'interval_seconds': round(1.0 / state.rate, 3),
+                'latency_ewma_ms': round(state.latency_ewma * 1000, 1) if state.latency_ewma is not None else None,
+                'successes': state.successes,
+                'failures': state.failures
+            }
+            for domain, state in self._domains.items()
+        }
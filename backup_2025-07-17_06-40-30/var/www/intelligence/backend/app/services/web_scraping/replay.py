@@ -0,0 +1,224 @@
+"""
+📼 Registrazione e replay offline di siti per i benchmark dello scraper
+
+- SiteArchive: pagine registrate (status, header, body) su disco locale
+- RecordingScrapingEngine: crawl reale che salva ogni pagina nell'archivio
+- ReplayServer: server aiohttp locale che riserve l'archivio con latenza
+  ed errori iniettati, per test ripetibili e senza rete (anche in CI)
+
+Layout archivio:
+    <dir>/manifest.json     origin + record (path, status, header, body)
+    <dir>/bodies/<sha256>.html
+    <dir>/expected.json     opzionale: valori attesi per l'accuratezza
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from app.services.web_scraping.fetching import FetchedPage
+from app.services.web_scraping.scraping_engine import IntelligenceWebScrapingEngine
+
+logger = logging.getLogger(__name__)
+
+# Header non riproducibili: il body e' salvato gia' decompresso
+_HOP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive'}
+
+def archive_path(url: str) -> str:
+    """Chiave di una pagina nell'archivio: path + query"""
+    parsed = urlparse(url)
+    path = parsed.path or '/'
+    return f"{path}?{parsed.query}" if parsed.query else path
+
+class SiteArchive:
+    """Archivio locale delle risposte di un sito"""
+
+    def __init__(self, directory: str, origin: Optional[str] = None):
+        self.directory = Path(directory)
+        self.origin = origin
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    @classmethod
+    def load(cls, directory: str) -> "SiteArchive":
+        archive = cls(directory)
+        manifest = json.loads(archive.manifest_path.read_text(encoding='utf-8'))
+        archive.origin = manifest['origin']
+        archive.records = {record['path']: record for record in manifest['records']}
+        return archive
+
+    def add(self, url: str, status: int, headers: Dict[str, str], body: Optional[str],
+            render_mode: Optional[str] = None, elapsed_ms: float = 0.0):
+        body_file = None
+        if body is not None:
+            data = body.encode('utf-8')
+            body_file = f"bodies/{hashlib.sha256(data).hexdigest()}.html"
+            path = self.directory / body_file
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not path.exists():
+                path.write_bytes(data)
+
+        self.records[archive_path(url)] = {
+            'path': archive_path(url),
+            'url': url,
+            'status': status,
+            'headers': {key: value for key, value in headers.items() if key.lower() not in _HOP_HEADERS},
+            'body': body_file,
+            'render_mode': render_mode,
+            'elapsed_ms': elapsed_ms
+        }
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_path.write_text(json.dumps({
+            'origin': self.origin,
+            'recorded_at': datetime.now().isoformat(),
+            'records': list(self.records.values())
+        }, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    def body(self, record: Dict[str, Any]) -> Optional[str]:
+        if not record.get('body'):
+            return None
+        return (self.directory / record['body']).read_text(encoding='utf-8')
+
+    def page_paths(self) -> List[str]:
+        """Path delle pagine HTML registrate con successo"""
+        return [
+            path for path, record in self.records.items()
+            if record['body'] and 200 <= record['status'] < 300 and path != '/robots.txt'
+        ]
+
+    def expected(self) -> Dict[str, Any]:
+        path = self.directory / "expected.json"
+        return json.loads(path.read_text(encoding='utf-8')) if path.exists() else {}
+
+class RecordingScrapingEngine(IntelligenceWebScrapingEngine):
+    """Motore di scraping che registra ogni pagina scaricata in un SiteArchive"""
+
+    def __init__(self, archive: SiteArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    async def _fetch_page(self, url, previous=None) -> Optional[FetchedPage]:
+        fetched = await super()._fetch_page(url, previous)
+        if fetched is not None and not fetched.not_modified:
+            # L'HTML renderizzato da Playwright viene riservito come pagina statica
+            self.archive.add(url, fetched.status, fetched.headers, fetched.html,
+                             fetched.render_mode, fetched.elapsed_ms)
+        return fetched
+
+    async def record_robots_txt(self, site_url: str):
+        parsed = urlparse(site_url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            async with self.session.get(robots_url) as response:
+                body = await response.text(errors='replace')
+                self.archive.add(robots_url, response.status, dict(response.headers), body)
+        except Exception as e:
+            logger.warning(f"robots.txt not recorded for {site_url}: {e}")
+
+async def record_site(website, directory: str, **engine_kwargs) -> SiteArchive:
+    """Crawl reale di un sito con salvataggio delle risposte"""
+    parsed = urlparse(str(website.url))
+    archive = SiteArchive(directory, origin=f"{parsed.scheme}://{parsed.netloc}")
+
+    async with RecordingScrapingEngine(archive, **engine_kwargs) as engine:
+        results = await engine.scrape_website(website)
+        await engine.record_robots_txt(str(website.url))
+
+    archive.save()
+    logger.info(f"📼 Recorded {len(archive.records)} responses from {archive.origin} ({results['status']})")
+    return archive
+
+class ReplayServer:
+    """
+    Server HTTP locale che riserve un SiteArchive
+
+    Args:
+        latency_ms: ritardo fisso per risposta
+        jitter_ms: ritardo casuale aggiuntivo (0..jitter_ms)
+        error_rate: frazione di richieste che ricevono un errore iniettato
+        error_statuses: codici usati per gli errori iniettati
+    """
+
+    def __init__(self, archive: SiteArchive, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: Iterable[int] = (500, 503, 429), seed: Optional[int] = None):
+        self.archive = archive
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.stats = {'requests': 0, 'served': 0, 'not_found': 0, 'injected_errors': 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _rewrite(self, body: str) -> str:
+        """I link assoluti all'origine registrata puntano al server di replay"""
+        netloc = urlparse(self.archive.origin).netloc
+        for scheme in ('https', 'http'):
+            body = body.replace(f"{scheme}://{netloc}", self.base_url)
+        return body
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.stats['requests'] += 1
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats['injected_errors'] += 1
+            return web.Response(status=self._random.choice(self.error_statuses), text="injected error")
+
+        record = self.archive.records.get(archive_path(str(request.rel_url)))
+        if record is None:
+            self.stats['not_found'] += 1
+            return web.Response(status=404, text="not recorded")
+
+        self.stats['served'] += 1
+        body = self.archive.body(record)
+        headers = {key: value for key, value in record['headers'].items() if key.lower() not in _HOP_HEADERS}
+        return web.Response(
+            status=record['status'],
+            body=self._rewrite(body).encode('utf-8') if body is not None else b'',
+            headers=headers
+        )
+
+    async def start(self) -> "ReplayServer":
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # Porta 0: assegnata dal sistema
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"📼 Replay server for {self.archive.origin} on {self.base_url}")
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
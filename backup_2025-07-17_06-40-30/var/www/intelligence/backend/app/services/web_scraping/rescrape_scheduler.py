@@ -0,0 +1,291 @@
+"""
+⏰ Scheduler del re-scraping periodico
+
+Seleziona i siti con next_scrape_scheduled scaduto, li ri-scrapa con
+richieste condizionali e aggiorna solo i documenti cambiati:
+- 304 / hash invariato: solo lo stato pagina viene toccato
+- pagina modificata: extracted_text aggiornato e documento re-indicizzato
+- pagina nuova: nuovo documento scraped_*
+Il template del sito (boilerplate) viene ricaricato e aggiornato a ogni giro.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from psycopg2.extras import Json
+
+from app.modules.rag_engine.kb_counters import bump_counters
+from app.services.web_scraping.content_gate import content_gate
+from app.modules.rag_engine.vectorization_worker import chunk_text
+from app.services.web_scraping.boilerplate import SiteTemplate
+from app.services.web_scraping.change_detection import PageStateStore, next_scrape_time
+from app.services.web_scraping.models.scraped_data import (
+    ScrapedWebsiteModel,
+    ScrapingFrequency,
+    ScrapingStatus
+)
+
+logger = logging.getLogger(__name__)
+
+MIN_TEXT_LENGTH = 50
+
+class RescrapeScheduler:
+    """
+    Re-scraping dei siti scaduti
+
+    Args:
+        connection_factory: funzione che ritorna una connessione psycopg2
+        engine_factory: classe/funzione che crea il motore di scraping
+            (context manager asincrono)
+        vector_service: VectorRAGService per re-indicizzare i documenti
+            cambiati; None per saltare la vettorizzazione (chunk e vettori
+            restano quelli del contenuto precedente)
+    """
+
+    def __init__(self, connection_factory: Callable, engine_factory: Callable,
+                 vector_service=None):
+        self._connect = connection_factory
+        self._engine_factory = engine_factory
+        self.vector_service = vector_service
+        self.states = PageStateStore(connection_factory)
+
+    def due_websites(self, limit: int = 10) -> List[ScrapedWebsiteModel]:
+        """Siti con frequenza periodica e scadenza passata (o mai pianificati)"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, url, domain, title, scraping_frequency, last_scraped, next_scrape_scheduled
+                FROM scraped_websites
+                WHERE scraping_frequency <> %s
+                  AND (next_scrape_scheduled IS NULL OR next_scrape_scheduled <= NOW())
+                ORDER BY next_scrape_scheduled NULLS FIRST, id
+                LIMIT %s
+            """, (ScrapingFrequency.ON_DEMAND.value, limit))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        return [
+            ScrapedWebsiteModel(
+                id=row[0], url=row[1], domain=row[2], title=row[3],
+                scraping_frequency=row[4], last_scraped=row[5], next_scrape_scheduled=row[6]
+            )
+            for row in rows
+        ]
+
+    def load_template(self, website_id: int) -> SiteTemplate:
+        """Template boilerplate salvato dai crawl precedenti"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT boilerplate_template FROM scraped_websites WHERE id = %s", (website_id,))
+            row = cursor.fetchone()
+            return SiteTemplate.from_dict(row[0] if row else None)
+        finally:
+            conn.close()
+
+    async def run_once(self, limit: int = 10) -> Dict[str, Any]:
+        """Un giro dello scheduler: ri-scrapa i siti scaduti"""
+        summary = {
+            'websites': 0,
+            'pages_changed': 0,
+            'pages_unchanged': 0,
+            'documents_reindexed': 0,
+            'bytes_downloaded': 0,
+            'errors': []
+        }
+
+        websites = await asyncio.to_thread(self.due_websites, limit)
+        for website in websites:
+            try:
+                result = await self.rescrape(website)
+                summary['websites'] += 1
+                for key in ('pages_changed', 'pages_unchanged', 'documents_reindexed', 'bytes_downloaded'):
+                    summary[key] += result[key]
+                summary['errors'].extend(result['errors'])
+            except Exception as e:
+                logger.error(f"Rescrape failed for {website.url}: {e}")
+                summary['errors'].append(f"{website.url}: {e}")
+
+        logger.info(
+            f"⏰ Rescrape: {summary['websites']} sites, {summary['pages_changed']} changed, "
+            f"{summary['pages_unchanged']} unchanged, {summary['bytes_downloaded']} bytes"
+        )
+        return summary
+
+    async def rescrape(self, website: ScrapedWebsiteModel) -> Dict[str, Any]:
+        """Ri-scrapa un sito e salva solo le differenze"""
+        page_states = await asyncio.to_thread(self.states.load_site, website.id)
+        template = await asyncio.to_thread(self.load_template, website.id)
+        if page_states:
+            # Le pagine note devono restare nei limiti del crawl
+            website.max_depth = min(max(website.max_depth, max(s.depth for s in page_states.values())), 5)
+            website.max_pages = min(max(website.max_pages, len(page_states)), 500)
+
+        async with self._engine_factory() as engine:
+            results = await engine.scrape_website(website, page_states=page_states, template=template)
+
+        if results['status'] != ScrapingStatus.COMPLETED:
+            await asyncio.to_thread(self._reschedule, website)
+            return {
+                'pages_changed': 0,
+                'pages_unchanged': 0,
+                'documents_reindexed': 0,
+                'bytes_downloaded': results['bytes_downloaded'],
+                'errors': results['errors']
+            }
+
+        changed_documents = await asyncio.to_thread(self._store_changes, website, results)
+
+        reindexed = 0
+        if self.vector_service:
+            for document_id, filename, text in changed_documents:
+                if await self._reindex_document(document_id, filename, text):
+                    reindexed += 1
+
+        return {
+            'pages_changed': len(results['pages']),
+            'pages_unchanged': results['pages_unchanged'],
+            'documents_reindexed': reindexed,
+            'bytes_downloaded': results['bytes_downloaded'],
+            'errors': results['errors']
+        }
+
+    def _store_changes(self, website: ScrapedWebsiteModel, results: Dict[str, Any]) -> List[tuple]:
+        """
+        Aggiorna documenti e stati in un'unica transazione
+
+        Returns:
+            (document_id, filename, testo) dei documenti nuovi o modificati
+        """
+        states_by_url = {state.url: state for state in results['page_states']}
+        changed = []
+        documents_created = 0
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+
+            for index, page in enumerate(results['pages']):
+                text = page['text']
+                if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+                    continue
+
+                document_id = page.get('knowledge_document_id')
+
+                # Pagina diventata errore / login / cookie wall: testo, chunk e vettori
+                # precedenti restano insieme, e senza nuovo stato la pagina viene
+                # riconfrontata al prossimo giro
+                decision = content_gate.evaluate(text, page.get('title'))
+                if not decision.accepted:
+                    logger.info(f"🚧 Not storing {page['url']} (document {document_id}): {decision.reason}")
+                    states_by_url.pop(page['url'], None)
+                    continue
+
+                if document_id:
+                    cursor.execute("""
+                        UPDATE knowledge_documents
+                        SET extracted_text = %s, updated_at = NOW()
+                        WHERE id = %s
+                        RETURNING filename
+                    """, (text, document_id))
+                    row = cursor.fetchone()
+                    if row:
+                        # I chunk restano fino alla re-indicizzazione, che li sostituisce
+                        # insieme ai vettori (niente documento senza chunk se fallisce)
+                        changed.append((document_id, row[0], text))
+                        continue
+
+                filename = f"scraped_{timestamp}_{index:03d}.html"
+                cursor.execute("""
+                    INSERT INTO knowledge_documents (filename, extracted_text, created_at, updated_at)
+                    VALUES (%s, %s, NOW(), NOW()) RETURNING id
+                """, (filename, text))
+                document_id = cursor.fetchone()[0]
+                documents_created += 1
+                changed.append((document_id, filename, text))
+
+                state = states_by_url.get(page['url'])
+                if state:
+                    state.knowledge_document_id = document_id
+
+            self.states.save(cursor, website.id, states_by_url.values())
+
+            cursor.execute("""
+                UPDATE scraped_websites
+                SET last_scraped = NOW(), next_scrape_scheduled = %s, status = %s,
+                    boilerplate_template = %s, updated_at = NOW()
+                WHERE id = %s
+            """, (
+                next_scrape_time(website.scraping_frequency), "completed",
+                Json(results['site_template'].to_dict()), website.id
+            ))
+
+            bump_counters(cursor, total_documents=documents_created, scraped_documents=documents_created)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return changed
+
+    def _reschedule(self, website: ScrapedWebsiteModel):
+        """Sposta la scadenza anche se lo scraping fallisce (niente retry a raffica)"""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE scraped_websites SET next_scrape_scheduled = %s, updated_at = NOW() WHERE id = %s",
+                (next_scrape_time(website.scraping_frequency), website.id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def _reindex_document(self, document_id: int, filename: str, text: str) -> bool:
+        """Sostituisce i vettori di un solo documento (testo gia' passato dal content gate)"""
+        try:
+            await asyncio.to_thread(self.vector_service.delete_document_points, str(document_id), filename)
+        except Exception as e:
+            logger.warning(f"Could not delete old vectors for document {document_id}: {e}")
+
+        chunks = [
+            {
+                'content': chunk,
+                'metadata': {
+                    'filename': filename,
+                    'chunk_index': index,
+                    'source': 'web_scraping'
+                }
+            }
+            for index, chunk in enumerate(chunk_text(
+                text, self.vector_service.chunk_size, self.vector_service.chunk_overlap
+            ))
+        ]
+        return await self.vector_service.add_document_chunks(chunks, str(document_id))
+
+async def run_scheduler(interval_seconds: int = 300, limit: int = 10,
+                        vectorize: bool = True, iterations: Optional[int] = None):
+    """Loop dello scheduler (iterations=None: infinito)"""
+    from app.services.web_scraping.api_routes_working import get_db_connection
+    from app.services.web_scraping.scraping_engine import IntelligenceWebScrapingEngine
+
+    vector_service = None
+    if vectorize:
+        from app.modules.rag_engine.vector_service import VectorRAGService
+        vector_service = VectorRAGService()
+
+    scheduler = RescrapeScheduler(get_db_connection, IntelligenceWebScrapingEngine, vector_service)
+
+    done = 0
+    while iterations is None or done < iterations:
+        await scheduler.run_once(limit)
+        done += 1
+        if iterations is None or done < iterations:
+            await asyncio.sleep(interval_seconds)
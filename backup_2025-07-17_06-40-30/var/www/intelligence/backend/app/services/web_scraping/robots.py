@@ -0,0 +1,128 @@
+"""
+🤖 Cache robots.txt per dominio
+
+- Un solo download di robots.txt per origin entro il TTL, condiviso tra
+  tutte le istanze del motore nello stesso processo
+- Matching completo di Allow/Disallow con urllib.robotparser
+- Crawl-delay / Request-rate esposti per il rate limiter per dominio
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_USER_AGENT = "IntelligenceBot"
+
+class RobotsCache:
+    """
+    robots.txt in cache per origin (schema + host)
+
+    Semantica dei fetch falliti:
+    - 401/403: tutto vietato
+    - altri 4xx: tutto permesso
+    - 5xx / errori di rete: tutto permesso, ma con TTL breve
+    """
+
+    def __init__(self, ttl: float = 3600.0, failure_ttl: float = 300.0,
+                 user_agent: str = ROBOTS_USER_AGENT, max_entries: int = 10000):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.user_agent = user_agent
+        self.max_entries = max_entries
+
+        self._entries: Dict[str, Tuple[RobotFileParser, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.fetches = 0
+
+    @staticmethod
+    def origin(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def _store(self, origin: str, parser: RobotFileParser, ttl: float):
+        if len(self._entries) >= self.max_entries:
+            # Elimina la voce piu' vecchia
+            oldest = min(self._entries, key=lambda key: self._entries[key][1])
+            self._entries.pop(oldest, None)
+            self._locks.pop(oldest, None)
+        self._entries[origin] = (parser, time.monotonic() + ttl)
+
+    def _cached(self, origin: str) -> Optional[RobotFileParser]:
+        entry = self._entries.get(origin)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    async def get(self, session, url: str) -> RobotFileParser:
+        """Parser robots.txt dell'origin di url (scaricato al massimo una volta per TTL)"""
+        origin = self.origin(url)
+        parser = self._cached(origin)
+        if parser:
+            return parser
+
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            # Un'altra coroutine puo' averlo appena scaricato
+            parser = self._cached(origin)
+            if parser:
+                return parser
+
+            parser, ttl = await self._fetch(session, origin)
+            self._store(origin, parser, ttl)
+            return parser
+
+    async def _fetch(self, session, origin: str) -> Tuple[RobotFileParser, float]:
+        robots_url = f"{origin}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        self.fetches += 1
+
+        try:
+            async with session.get(robots_url, allow_redirects=True) as response:
+                if response.status == 200:
+                    content = await response.text(errors='replace')
+                    parser.parse(content.splitlines())
+                    return parser, self.ttl
+
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                else:
+                    parser.allow_all = True
+
+                parser.modified()
+                return parser, self.failure_ttl if response.status >= 500 else self.ttl
+
+        except Exception as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {str(e)}")
+            parser.allow_all = True
+            parser.modified()
+            return parser, self.failure_ttl
+
+    async def can_fetch(self, session, url: str) -> bool:
+        """True se robots.txt permette di visitare url"""
+        parser = await self.get(session, url)
+        return parser.can_fetch(self.user_agent, url)
+
+    async def crawl_delay(self, session, url: str) -> Optional[float]:
+        """Crawl-delay (o 1/Request-rate) in secondi per l'origin di url"""
+        parser = await self.get(session, url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+
+        rate = parser.request_rate(self.user_agent)
+        if rate and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    async def site_maps(self, session, url: str) -> List[str]:
+        """Sitemap dichiarate in robots.txt"""
+        parser = await self.get(session, url)
+        return parser.site_maps() or []
+
+# Cache condivisa: il motore viene istanziato per ogni richiesta
+robots_cache = RobotsCache()
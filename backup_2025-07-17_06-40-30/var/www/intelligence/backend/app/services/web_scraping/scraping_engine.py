@@ -1,18 +1,36 @@
 import asyncio
 import logging
 import hashlib
-import re
+import time
 from typing import List, Dict, Any, Optional, Tuple
 from urllib.parse import urljoin, urlparse
-from urllib.robotparser import RobotFileParser
 from datetime import datetime
 import aiohttp
 import json
 
 from playwright.async_api import async_playwright, Browser, Page
-from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
 
+from app.services.web_scraping.boilerplate import SiteTemplate
+from app.services.web_scraping.change_detection import PageState, content_hash
+from app.services.web_scraping.crawler import CrawlFrontier, site_key
+from app.services.web_scraping.metrics import CrawlMetrics, ScrapingMetrics, scraping_metrics
+from app.services.web_scraping.rate_control import AdaptiveRateController, parse_retry_after
+from app.services.web_scraping.robots import RobotsCache, robots_cache
+from app.services.web_scraping.sitemaps import discover_sitemap_entries, rank_entries
+from app.services.web_scraping.html_extraction import (
+    ParsedPage,
+    extract_company_fields,
+    extract_contact_fields,
+    parse_page
+)
+from app.services.web_scraping.fetching import (
+    BrowserContextPool,
+    FetchedPage,
+    RENDER_MODE_BROWSER,
+    RENDER_MODE_HTTP,
+    needs_js_rendering
+)
 from app.services.web_scraping.models.scraped_data import (
     ScrapedWebsiteModel,
     ScrapedContentModel,
@@ -30,27 +48,66 @@ class IntelligenceWebScrapingEngine:
     
     Features:
     - Respectful scraping con robots.txt
-    - JavaScript support via Playwright
+    - Fetch HTTP diretto, Playwright solo per pagine renderizzate via JS
     - Intelligent content extraction
-    - Rate limiting automatico
+    - Rate limiting adattivo per dominio (token bucket + AIMD)
+    - Crawling multi-pagina (max_depth / max_pages), seed e priorita' da sitemap.xml
+    - Rimozione del boilerplate ripetuto su tutte le pagine del sito
+    - Metriche per dominio (latenza, byte, status, render mode, parsing)
     - Error handling robusto
     """
     
     def __init__(self, 
                  rate_limit_delay: float = 2.0,
                  max_concurrent: int = 3,
-                 timeout: int = 30):
+                 timeout: int = 30,
+                 render_mode: str = "auto",
+                 network_idle_timeout: float = 3.0,
+                 robots: Optional[RobotsCache] = None,
+                 parser_backend: str = "auto",
+                 strip_boilerplate: bool = True,
+                 metrics: Optional[ScrapingMetrics] = None,
+                 min_rate_limit_delay: float = 0.25,
+                 max_rate_limit_delay: float = 30.0,
+                 use_sitemaps: bool = True):
         
         self.rate_limit_delay = rate_limit_delay
         self.max_concurrent = max_concurrent
         self.timeout = timeout
+        # "auto": HTTP con escalation a Playwright, "http" o "playwright" forzati
+        self.render_mode = render_mode
+        self.network_idle_timeout = network_idle_timeout
+        self.robots = robots or robots_cache
+        # "auto": selectolax se installato, altrimenti lxml / html.parser
+        self.parser_backend = parser_backend
+        self.strip_boilerplate = strip_boilerplate
+        # Seed della frontiera da sitemap.xml (robots.txt o path noti)
+        self.use_sitemaps = use_sitemaps
+        # Registro di processo esportato su /metrics
+        self.metrics = metrics or scraping_metrics
         self.browser: Optional[Browser] = None
         self.session: Optional[aiohttp.ClientSession] = None
         self.ua = UserAgent()
         
-        # Semaforo per limitare richieste concorrenti
+        # Browser avviato solo alla prima pagina che richiede JavaScript
+        self._browser_lock = asyncio.Lock()
+        self.browser_pool = BrowserContextPool(
+            self._get_browser,
+            size=max_concurrent,
+            user_agent_factory=lambda: self.ua.random
+        )
+        
+        # Semaforo per limitare richieste concorrenti (globale)
         self.semaphore = asyncio.Semaphore(max_concurrent)
         
+        # Intervallo tra richieste allo stesso dominio: parte da rate_limit_delay
+        # e si adatta (AIMD) alle risposte, entro i limiti min/max
+        self.rate_control = AdaptiveRateController(
+            initial_interval=rate_limit_delay,
+            min_interval=min_rate_limit_delay,
+            max_interval=max_rate_limit_delay
+        )
+        
         # Contatori per statistiche
         self.stats = {
             'pages_scraped': 0,
@@ -63,22 +120,6 @@ class IntelligenceWebScrapingEngine:
     async def __aenter__(self):
         """Inizializza risorse asincrone"""
         try:
-            # Avvia Playwright
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--disable-gpu',
-                    '--window-size=1920x1080',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor'
-                ]
-            )
-            
             # Crea sessione HTTP
             connector = aiohttp.TCPConnector(limit=10, ssl=False)
             timeout = aiohttp.ClientTimeout(total=self.timeout)
@@ -106,6 +147,7 @@ class IntelligenceWebScrapingEngine:
         """Pulisce risorse"""
         if self.session:
             await self.session.close()
+        await self.browser_pool.close()
         if self.browser:
             await self.browser.close()
         if hasattr(self, 'playwright'):
@@ -113,27 +155,36 @@ class IntelligenceWebScrapingEngine:
             
         logger.info("Intelligence WebScrapingEngine closed")
     
-    async def scrape_website(self, website: ScrapedWebsiteModel) -> Dict[str, Any]:
+    async def scrape_website(self, website: ScrapedWebsiteModel,
+                             page_states: Optional[Dict[str, PageState]] = None,
+                             template: Optional[SiteTemplate] = None) -> Dict[str, Any]:
         """
         Scraping principale di un sito web
         
+        Visita il sito a partire da website.url fino a website.max_depth
+        livelli e website.max_pages pagine, in un unico job.
+        
+        Con page_states (re-scraping) le richieste sono condizionali e le
+        pagine invariate (304 o stesso hash) non vengono estratte: in
+        results['pages'] finiscono solo pagine nuove o modificate, mentre
+        results['page_states'] contiene lo stato aggiornato di tutte.
+        
+        Il testo delle pagine e' ripulito dai segmenti di template del sito
+        (menu, footer, banner); results['site_template'] va salvato e
+        ripassato ai crawl successivi.
+        
         Args:
             website: Modello del sito da scrapare
+            page_states: Stati noti delle pagine, per URL normalizzato
+            template: Template del sito dai crawl precedenti
             
         Returns:
             Dict con risultati scraping
         """
-        results = {
-            'website_id': website.id,
-            'url': str(website.url),
-            'status': ScrapingStatus.RUNNING,
-            'started_at': datetime.now(),
-            'pages_scraped': 0,
-            'content_extracted': [],
-            'contacts_found': [],
-            'companies_found': [],
-            'errors': []
-        }
+        page_states = page_states or {}
+        results = self._new_results(website, template)
+        started = time.monotonic()
+        crawl_metrics = CrawlMetrics(self.metrics)
         
         try:
             # Verifica robots.txt se richiesto
@@ -143,34 +194,25 @@ class IntelligenceWebScrapingEngine:
                     results['errors'].append("Scraping not allowed by robots.txt")
                     return results
             
-            # Usa semaforo per limitare richieste concorrenti
-            async with self.semaphore:
-                # Delay per rate limiting
-                await asyncio.sleep(self.rate_limit_delay)
-                
-                # Scraping con Playwright
-                page_content = await self._scrape_page_with_playwright(str(website.url))
-                
-                if page_content:
-                    results['pages_scraped'] = 1
-                    self.stats['pages_scraped'] += 1
-                    
-                    # Estrai contenuti
-                    content_results = await self._extract_all_content(
-                        page_content, str(website.url), website.id
-                    )
-                    
-                    results['content_extracted'] = content_results.get('content', [])
-                    results['contacts_found'] = content_results.get('contacts', [])
-                    results['companies_found'] = content_results.get('companies', [])
-                    
-                    # Aggiorna statistiche
-                    self.stats['content_extracted'] += len(results['content_extracted'])
-                    self.stats['contacts_found'] += len(results['contacts_found'])
-                    self.stats['companies_found'] += len(results['companies_found'])
-                
-                results['status'] = ScrapingStatus.COMPLETED
-                results['completed_at'] = datetime.now()
+            frontier = CrawlFrontier(
+                str(website.url),
+                max_depth=website.max_depth,
+                max_pages=website.max_pages,
+                follow_external_links=website.follow_external_links
+            )
+            # Le pagine invariate non vengono parse: i loro link arrivano dagli stati noti
+            for state in sorted(page_states.values(), key=lambda s: s.depth):
+                frontier.add(state.url, state.depth)
+            if self.use_sitemaps and website.max_depth > 1:
+                # Pagine delle sitemap come link della home, le piu' utili per prime
+                for url, priority in await self.sitemap_seeds(website):
+                    frontier.add(url, 2, priority=priority)
+            
+            await self._crawl(frontier, website, results, page_states, crawl_metrics)
+            self._strip_site_boilerplate(results, template)
+            
+            results['status'] = ScrapingStatus.COMPLETED
+            results['completed_at'] = datetime.now()
                 
         except Exception as e:
             logger.error(f"Scraping failed for {website.url}: {str(e)}")
@@ -179,76 +221,384 @@ class IntelligenceWebScrapingEngine:
             results['completed_at'] = datetime.now()
             self.stats['errors'] += 1
         
+        duration = time.monotonic() - started
+        results['metrics'] = crawl_metrics.summary()
+        results['metrics']['rate_control'] = self.rate_control.snapshot().get(site_key(str(website.url)))
+        results['duration_seconds'] = round(duration, 3)
+        results['pages_per_second'] = round(results['pages_scraped'] / duration, 3) if duration > 0 else 0.0
+        
+        logger.info(
+            f"Crawl {website.url}: {results['pages_scraped']} pages, "
+            f"{results['pages_unchanged']} unchanged, "
+            f"{results['bytes_downloaded']} bytes, {results['pages_per_second']} pages/s, "
+            f"fetch p95 {results['metrics']['fetch_latency_p95_ms']} ms, "
+            f"render {results['metrics']['render_modes']}"
+        )
         return results
     
-    async def _scrape_page_with_playwright(self, url: str) -> Optional[str]:
-        """Scraping con Playwright per supporto JavaScript"""
+    async def crawl_page(self, url: str, depth: int, website: ScrapedWebsiteModel,
+                         previous: Optional[PageState] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Una sola pagina fuori da scrape_website (worker della frontiera distribuita)
+        
+        Returns:
+            (results con al piu' una pagina, link trovati)
+        """
+        results = self._new_results(website)
+        links = await self._crawl_page(url, depth, website, results, previous)
+        return results, links
+    
+    async def sitemap_seeds(self, website: ScrapedWebsiteModel) -> List[Tuple[str, float]]:
+        """
+        URL delle sitemap nello scope del sito, ordinati per priorita'
+        
+        Al massimo max_pages - 1 (la home e' gia' in frontiera).
+        """
+        site_url = str(website.url)
         try:
-            page = await self.browser.new_page()
-            
-            # Imposta user agent random
-            await page.set_extra_http_headers({
-                'User-Agent': self.ua.random
-            })
-            
-            # Naviga alla pagina
-            await page.goto(url, wait_until='networkidle', timeout=self.timeout * 1000)
-            
-            # Attendi caricamento completo
-            await asyncio.sleep(2)
-            
-            # Ottieni contenuto
-            content = await page.content()
-            
-            await page.close()
-            return content
-            
+            declared = await self.robots.site_maps(self.session, site_url)
+            delay = await self.robots.crawl_delay(self.session, site_url)
+            if delay:
+                self.rate_control.set_crawl_delay(site_key(site_url), delay)
+            entries = await discover_sitemap_entries(
+                self.session, site_url, declared, rate_control=self.rate_control
+            )
         except Exception as e:
-            logger.error(f"Playwright scraping failed for {url}: {str(e)}")
+            logger.warning(f"Sitemap discovery failed for {site_url}: {e}")
+            return []
+        
+        site = site_key(site_url)
+        ranked = [
+            (url, priority) for url, priority in rank_entries(entries)
+            if website.follow_external_links or site_key(url) == site
+        ]
+        return ranked[:max(website.max_pages - 1, 0)]
+    
+    def _new_results(self, website: ScrapedWebsiteModel,
+                     template: Optional[SiteTemplate] = None) -> Dict[str, Any]:
+        return {
+            'website_id': website.id,
+            'url': str(website.url),
+            'status': ScrapingStatus.RUNNING,
+            'started_at': datetime.now(),
+            'pages_scraped': 0,
+            'bytes_downloaded': 0,
+            'pages': [],
+            'pages_unchanged': 0,
+            'page_states': [],
+            'site_template': template,
+            'boilerplate_chars_removed': 0,
+            'content_extracted': [],
+            'contacts_found': [],
+            'companies_found': [],
+            'failed_fetches': [],
+            'errors': []
+        }
+    
+    async def _crawl(self, frontier: CrawlFrontier, website: ScrapedWebsiteModel,
+                     results: Dict[str, Any], page_states: Dict[str, PageState],
+                     crawl_metrics: Optional[CrawlMetrics] = None):
+        """
+        Visita la frontiera con max_concurrent worker
+        
+        Ogni worker prende dalla frontiera la pagina a priorita' piu' alta
+        al momento del pop, cosi' i link appena scoperti (es. /contatti)
+        passano davanti a quelli accodati prima.
+        """
+        changed = asyncio.Condition()
+        in_flight = 0
+        
+        async def worker():
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    # Frontiera vuota: finche' qualcuno lavora possono arrivare link
+                    while not len(frontier) and in_flight:
+                        await changed.wait()
+                    item = frontier.pop()
+                    if item is None:
+                        changed.notify_all()
+                        return
+                    in_flight += 1
+                
+                url, depth = item
+                try:
+                    links = await self._crawl_page(
+                        url, depth, website, results, page_states.get(url), crawl_metrics
+                    )
+                    if links:
+                        frontier.add_links(links, url, depth)
+                except Exception as e:
+                    logger.error(f"Crawl page failed for {url}: {str(e)}")
+                    results['errors'].append(f"{url}: {str(e)}")
+                    self.stats['errors'] += 1
+                finally:
+                    async with changed:
+                        in_flight -= 1
+                        changed.notify_all()
+        
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrent)))
+    
+    async def _crawl_page(self, url: str, depth: int, website: ScrapedWebsiteModel,
+                          results: Dict[str, Any], previous: Optional[PageState] = None,
+                          crawl_metrics: Optional[CrawlMetrics] = None) -> List[str]:
+        """Scarica ed estrae una pagina; ritorna i link trovati"""
+        crawl_metrics = crawl_metrics or CrawlMetrics(self.metrics)
+        # Stessa chiave dei lease della frontiera distribuita
+        domain = site_key(url)
+        if website.respect_robots_txt and not await self._check_robots_txt(url):
+            results['errors'].append(f"Blocked by robots.txt: {url}")
+            return []
+        
+        await self.rate_control.acquire(domain)
+        
+        fetch_started = time.perf_counter()
+        async with self.semaphore:
+            fetched = await self._fetch_page(url, previous)
+        self.rate_control.record(
+            domain,
+            fetched.status if fetched else None,
+            # La latenza del browser non e' confrontabile con quella HTTP
+            fetched.elapsed_ms / 1000 if fetched and fetched.render_mode == RENDER_MODE_HTTP else None,
+            parse_retry_after(fetched.header('Retry-After')) if fetched else None
+        )
+        crawl_metrics.fetch(
+            domain,
+            time.perf_counter() - fetch_started,
+            fetched.size_bytes if fetched else 0,
+            fetched.status if fetched else 'error',
+            fetched.render_mode if fetched else self.render_mode
+        )
+        
+        if fetched and fetched.not_modified and previous:
+            results['pages_unchanged'] += 1
+            results['page_states'].append(
+                previous.refreshed(fetched.header('ETag'), fetched.header('Last-Modified'), depth=depth)
+            )
+            return []
+        
+        if not fetched or not fetched.ok:
+            status = fetched.status if fetched else 'error'
+            results['errors'].append(f"Fetch failed ({status}): {url}")
+            results['failed_fetches'].append({'url': url, 'status': status})
+            return []
+        
+        page_content = fetched.html
+        page_bytes = fetched.size_bytes
+        results['pages_scraped'] += 1
+        results['bytes_downloaded'] += page_bytes
+        self.stats['pages_scraped'] += 1
+        
+        page_hash = content_hash(page_content)
+        state = (previous or PageState(url=url, depth=depth)).refreshed(
+            fetched.header('ETag'), fetched.header('Last-Modified'), page_hash, depth
+        )
+        results['page_states'].append(state)
+        
+        # Server senza validatori: il contenuto e' identico, niente estrazione
+        if previous and previous.content_hash == page_hash:
+            results['pages_unchanged'] += 1
+            return []
+        
+        # Un solo parsing per link, testo ed estrattori
+        parse_started = time.perf_counter()
+        page = parse_page(page_content, self.parser_backend)
+        links = page.links
+        
+        # Estrai contenuti
+        content_results = await self._extract_all_content(
+            page_content, url, website.id, page=page, render_mode=fetched.render_mode
+        )
+        crawl_metrics.parse(domain, time.perf_counter() - parse_started)
+        for kind in ('content', 'contacts', 'companies'):
+            crawl_metrics.extracted(domain, kind, len(content_results.get(kind, [])))
+        
+        results['content_extracted'].extend(content_results.get('content', []))
+        results['contacts_found'].extend(content_results.get('contacts', []))
+        results['companies_found'].extend(content_results.get('companies', []))
+        results['pages'].append({
+            'url': url,
+            'depth': depth,
+            'bytes': page_bytes,
+            'render_mode': fetched.render_mode,
+            'elapsed_ms': fetched.elapsed_ms,
+            'content_hash': page_hash,
+            'knowledge_document_id': state.knowledge_document_id,
+            'title': page.title,
+            'text': page.text,
+            'segments': page.segments
+        })
+        
+        # Aggiorna statistiche
+        self.stats['content_extracted'] += len(content_results.get('content', []))
+        self.stats['contacts_found'] += len(content_results.get('contacts', []))
+        self.stats['companies_found'] += len(content_results.get('companies', []))
+        
+        return links
+    
+    def _strip_site_boilerplate(self, results: Dict[str, Any], template: Optional[SiteTemplate]):
+        """Toglie dal testo delle pagine i segmenti presenti su quasi tutto il sito"""
+        pages = results['pages']
+        if not self.strip_boilerplate:
+            for page in pages:
+                page.pop('segments', None)
+            return
+        
+        template = template or SiteTemplate()
+        for page in pages:
+            template.observe(page['segments'], page['url'])
+        
+        for page in pages:
+            cleaned = template.clean(page.pop('segments'))
+            results['boilerplate_chars_removed'] += max(len(page['text']) - len(cleaned), 0)
+            page['text'] = cleaned
+        
+        results['site_template'] = template
+        if pages:
+            logger.info(
+                f"🧽 Boilerplate: {template.boilerplate_count()} template segments, "
+                f"{results['boilerplate_chars_removed']} chars removed from {len(pages)} pages"
+            )
+    
+    async def _get_browser(self) -> Browser:
+        """Avvia Chromium al primo utilizzo"""
+        async with self._browser_lock:
+            if self.browser is None:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(
+                    headless=True,
+                    args=[
+                        '--no-sandbox',
+                        '--disable-setuid-sandbox',
+                        '--disable-dev-shm-usage',
+                        '--disable-accelerated-2d-canvas',
+                        '--disable-gpu',
+                        '--window-size=1920x1080',
+                        '--disable-web-security',
+                        '--disable-features=VizDisplayCompositor'
+                    ]
+                )
+                logger.info("Playwright browser launched")
+            return self.browser
+    
+    async def _fetch_page(self, url: str, previous: Optional[PageState] = None) -> Optional[FetchedPage]:
+        """
+        Fetch di una pagina: prima HTTP diretto, poi Playwright solo se
+        il fetch fallisce o la pagina sembra renderizzata via JavaScript
+        
+        Con uno stato precedente la GET e' condizionale (ETag/Last-Modified).
+        """
+        if self.render_mode == RENDER_MODE_BROWSER:
+            return await self._scrape_page_with_playwright(url)
+        
+        headers = previous.conditional_headers() if previous else None
+        fetched = await self._fetch_with_http(url, headers)
+        if self.render_mode == RENDER_MODE_HTTP:
+            return fetched
+        
+        if fetched and fetched.not_modified:
+            return fetched
+        
+        if fetched and fetched.ok and not needs_js_rendering(fetched.html):
+            return fetched
+        
+        # Pagine non trovate non migliorano con il browser; su 429 il browser
+        # sarebbe solo un'altra richiesta a un server che chiede di rallentare
+        if fetched and fetched.status in (404, 410, 429):
+            return fetched
+        
+        logger.info(f"Escalating to Playwright: {url}")
+        rendered = await self._scrape_page_with_playwright(url)
+        return rendered or fetched
+    
+    async def _fetch_with_http(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[FetchedPage]:
+        """Fetch HTTP con la sessione aiohttp condivisa"""
+        started = time.perf_counter()
+        try:
+            async with self.session.get(url, headers=headers, allow_redirects=True) as response:
+                content_type = response.headers.get('Content-Type', '')
+                html = None
+                if 'html' in content_type or not content_type:
+                    html = await response.text(errors='replace')
+                
+                return FetchedPage(
+                    url=str(response.url),
+                    status=response.status,
+                    html=html,
+                    render_mode=RENDER_MODE_HTTP,
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+                    headers=dict(response.headers)
+                )
+                
+        except Exception as e:
+            logger.warning(f"HTTP fetch failed for {url}: {str(e)}")
             return None
     
-    async def _check_robots_txt(self, url: str) -> bool:
-        """Verifica robots.txt"""
+    async def _scrape_page_with_playwright(self, url: str) -> Optional[FetchedPage]:
+        """Scraping con Playwright per pagine che richiedono JavaScript"""
+        started = time.perf_counter()
         try:
-            parsed_url = urlparse(url)
-            robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
-            
-            async with self.session.get(robots_url) as response:
-                if response.status == 200:
-                    robots_content = await response.text()
-                    
-                    # Parsing semplificato robots.txt
-                    lines = robots_content.split('\n')
-                    current_user_agent = None
-                    
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith('User-agent:'):
-                            current_user_agent = line.split(':', 1)[1].strip()
-                        elif line.startswith('Disallow:') and current_user_agent in ['*', 'IntelligenceBot']:
-                            disallow_path = line.split(':', 1)[1].strip()
-                            if disallow_path == '/':
-                                logger.info(f"Scraping disallowed by robots.txt for {url}")
-                                return False
-                    
-            return True
+            async with self.browser_pool.page() as page:
+                # Naviga alla pagina
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout * 1000)
+                
+                # Attendi le richieste XHR, con un tetto breve invece di uno sleep fisso
+                try:
+                    await page.wait_for_load_state('networkidle', timeout=self.network_idle_timeout * 1000)
+                except Exception:
+                    pass
+                
+                # Ottieni contenuto
+                content = await page.content()
+                
+                return FetchedPage(
+                    url=page.url,
+                    status=response.status if response else 200,
+                    html=content,
+                    render_mode=RENDER_MODE_BROWSER,
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+                    headers=await response.all_headers() if response else {}
+                )
             
         except Exception as e:
-            logger.warning(f"Could not check robots.txt for {url}: {str(e)}")
-            return True  # Se non possiamo verificare, assumiamo permesso
+            logger.error(f"Playwright scraping failed for {url}: {str(e)}")
+            return None
     
-    async def _extract_all_content(self, html_content: str, url: str, website_id: int) -> Dict[str, List]:
-        """Estrae tutti i tipi di contenuto da una pagina"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+    async def _check_robots_txt(self, url: str) -> bool:
+        """
+        Verifica robots.txt (cache per dominio) e applica il Crawl-delay
+        al rate limiter del dominio
+        """
+        if not await self.robots.can_fetch(self.session, url):
+            logger.info(f"Scraping disallowed by robots.txt for {url}")
+            return False
+        
+        delay = await self.robots.crawl_delay(self.session, url)
+        if delay:
+            self.rate_control.set_crawl_delay(site_key(url), delay)
+        return True
+    
+    async def _extract_all_content(self, html_content: str, url: str, website_id: Optional[int],
+                                   page: Optional[ParsedPage] = None,
+                                   render_mode: str = RENDER_MODE_BROWSER) -> Dict[str, List]:
+        """
+        Estrae tutti i tipi di contenuto da una pagina (un solo parsing)
+        
+        website_id e' None per i siti non ancora salvati (/crawl-site salva
+        il sito solo a crawl finito)
+        """
+        if page is None:
+            page = parse_page(html_content, self.parser_backend)
         
         results = {
             'content': [],
             'contacts': [],
             'companies': []
         }
+        page_title = page.title
         
         # Estrai informazioni aziendali
-        company_info = await self._extract_company_info(soup, url, website_id)
+        company_info = await self._extract_company_info(page, url, website_id)
         if company_info:
             results['companies'].append(company_info)
             
@@ -256,19 +606,19 @@ class IntelligenceWebScrapingEngine:
             company_content = ScrapedContentModel(
                 website_id=website_id,
                 page_url=url,
-                page_title=self._extract_page_title(soup),
+                page_title=page_title,
                 content_type=ContentType.COMPANY_INFO,
                 content_hash=self._generate_content_hash(company_info.model_dump_json()),
-                cleaned_text=self._extract_clean_text(soup),
+                cleaned_text=page.text[:2000],
                 structured_data=company_info.model_dump(),
-                extraction_method="playwright",
+                extraction_method=render_mode,
                 confidence_score=company_info.confidence_score,
                 scraped_at=datetime.now()
             )
             results['content'].append(company_content)
         
         # Estrai contatti
-        contacts = await self._extract_contacts(soup, url, website_id)
+        contacts = await self._extract_contacts(page, url, website_id)
         results['contacts'].extend(contacts)
         
         # Crea content records per i contatti
@@ -276,12 +626,12 @@ class IntelligenceWebScrapingEngine:
             contact_content = ScrapedContentModel(
                 website_id=website_id,
                 page_url=url,
-                page_title=self._extract_page_title(soup),
+                page_title=page_title,
                 content_type=ContentType.CONTACT_INFO,
                 content_hash=self._generate_content_hash(contact.model_dump_json()),
                 cleaned_text=f"{contact.full_name} - {contact.email} - {contact.position}",
                 structured_data=contact.model_dump(),
-                extraction_method="playwright",
+                extraction_method=render_mode,
                 confidence_score=contact.confidence_score,
                 scraped_at=datetime.now()
             )
@@ -289,41 +639,15 @@ class IntelligenceWebScrapingEngine:
         
         return results
     
-    async def _extract_company_info(self, soup: BeautifulSoup, url: str, website_id: int) -> Optional[ScrapedCompanyModel]:
+    async def _extract_company_info(self, page: ParsedPage, url: str, website_id: Optional[int]) -> Optional[ScrapedCompanyModel]:
         """Estrae informazioni aziendali"""
-        company_data = {}
-        
-        # Nome azienda (strategie multiple)
-        company_name = self._extract_company_name(soup)
-        if not company_name:
+        company_data = extract_company_fields(page, url)
+        if not company_data:
             return None
-        
-        company_data['company_name'] = company_name
-        
-        # Descrizione
-        description = self._extract_company_description(soup)
-        if description:
-            company_data['description'] = description
-        
-        # Contatti
-        email = self._extract_company_email(soup)
-        if email:
-            company_data['email'] = email
-        
-        phone = self._extract_company_phone(soup)
-        if phone:
-            company_data['phone'] = phone
-        
-        # Indirizzo
-        address = self._extract_company_address(soup)
-        if address:
-            company_data.update(address)
-        
-        # Website
-        company_data['website'] = url
+        structured_fields = company_data.pop('_structured_fields', [])
         
         # Calcola confidence score
-        confidence = self._calculate_company_confidence(company_data)
+        confidence = self._calculate_company_confidence(company_data, structured_fields)
         company_data['confidence_score'] = confidence
         
         # Calcola completezza dati
@@ -341,222 +665,28 @@ class IntelligenceWebScrapingEngine:
         
         return None
     
-    def _extract_company_name(self, soup: BeautifulSoup) -> Optional[str]:
-        """Estrae nome azienda"""
-        # Strategie multiple per nome azienda
-        selectors = [
-            'h1',
-            'title',
-            '.company-name',
-            '#company-name',
-            '[itemprop="name"]',
-            '.logo img[alt]',
-            '.brand',
-            '.site-title'
-        ]
-        
-        for selector in selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                if element.name == 'img':
-                    text = element.get('alt', '').strip()
-                elif element.name == 'title':
-                    text = element.get_text().strip()
-                    # Pulisci titolo pagina
-                    text = text.split('|')[0].split('-')[0].strip()
-                else:
-                    text = element.get_text().strip()
-                
-                if text and len(text) > 2 and len(text) < 100:
-                    return text
-        
-        return None
-    
-    def _extract_company_description(self, soup: BeautifulSoup) -> Optional[str]:
-        """Estrae descrizione azienda"""
-        # Meta description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc:
-            return meta_desc.get('content', '').strip()
-        
-        # Sezioni about/chi siamo
-        selectors = [
-            '.about', '#about', '.company-description',
-            '.chi-siamo', '.about-us', '.company-info'
-        ]
-        
-        for selector in selectors:
-            element = soup.select_one(selector)
-            if element:
-                text = element.get_text().strip()
-                if len(text) > 50:
-                    return text[:500]  # Limita lunghezza
-        
-        return None
-    
-    def _extract_company_email(self, soup: BeautifulSoup) -> Optional[str]:
-        """Estrae email aziendale"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        # Cerca in tutto il testo
-        emails = re.findall(email_pattern, soup.get_text())
-        
-        # Filtra email valide (evita quelle generiche)
-        valid_emails = []
-        for email in emails:
-            if not any(generic in email.lower() for generic in ['example', 'test', 'dummy', 'noreply']):
-                valid_emails.append(email)
-        
-        return valid_emails[0] if valid_emails else None
-    
-    def _extract_company_phone(self, soup: BeautifulSoup) -> Optional[str]:
-        """Estrae telefono aziendale"""
-        # Pattern telefono italiano
-        phone_patterns = [
-            r'\+39\s?\d{2,3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}',
-            r'0\d{1,3}[\s.-]?\d{3,4}[\s.-]?\d{3,4}',
-            r'\d{3}[\s.-]?\d{3}[\s.-]?\d{4}'
-        ]
-        
-        text = soup.get_text()
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, text)
-            if phones:
-                return phones[0]
-        
-        return None
-    
-    def _extract_company_address(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Estrae indirizzo aziendale"""
-        address_data = {}
-        
-        # Cerca sezioni indirizzo
-        selectors = [
-            '.address', '.indirizzo', '.contact-info',
-            '[itemprop="address"]', '.location'
-        ]
-        
-        for selector in selectors:
-            element = soup.select_one(selector)
-            if element:
-                text = element.get_text().strip()
-                
-                # Parsing semplificato indirizzo
-                lines = [line.strip() for line in text.split('\n') if line.strip()]
-                if lines:
-                    address_data['address_street'] = lines[0]
-                    
-                    # Cerca CAP e città
-                    for line in lines:
-                        if re.search(r'\d{5}', line):  # CAP
-                            parts = line.split()
-                            for i, part in enumerate(parts):
-                                if re.match(r'\d{5}', part):
-                                    address_data['address_zip'] = part
-                                    if i + 1 < len(parts):
-                                        address_data['address_city'] = ' '.join(parts[i+1:])
-                                    break
-                break
-        
-        return address_data
-    
-    async def _extract_contacts(self, soup: BeautifulSoup, url: str, website_id: int) -> List[ScrapedContactModel]:
+    async def _extract_contacts(self, page: ParsedPage, url: str, website_id: Optional[int]) -> List[ScrapedContactModel]:
         """Estrae contatti dalla pagina"""
         contacts = []
         
-        # Cerca sezioni team/contatti
-        contact_sections = soup.find_all(['div', 'section'], class_=lambda x: x and any(
-            keyword in x.lower() for keyword in ['team', 'staff', 'contact', 'chi-siamo', 'about']
-        ))
-        
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        for section in contact_sections:
-            # Trova email nella sezione
-            emails = re.findall(email_pattern, section.get_text())
-            
-            for email in emails:
-                contact_data = {'email': email}
-                
-                # Cerca nome associato
-                name = self._find_name_near_email(section, email)
-                if name:
-                    contact_data['full_name'] = name
-                    parts = name.split()
-                    if len(parts) >= 2:
-                        contact_data['first_name'] = parts[0]
-                        contact_data['last_name'] = ' '.join(parts[1:])
-                
-                # Cerca posizione
-                position = self._find_position_near_email(section, email)
-                if position:
-                    contact_data['position'] = position
-                
-                # Calcola confidence
-                confidence = self._calculate_contact_confidence(contact_data)
-                contact_data['confidence_score'] = confidence
-                
-                if confidence > 0.4:  # Soglia minima
-                    contact = ScrapedContactModel(
-                        scraped_content_id=0,  # Sarà impostato dal caller
-                        extracted_at=datetime.now(),
-                        **contact_data
-                    )
-                    contacts.append(contact)
-        
-        return contacts[:5]  # Limita a 5 contatti per pagina
-    
-    def _find_name_near_email(self, section: BeautifulSoup, email: str) -> Optional[str]:
-        """Trova nome vicino all'email"""
-        # Cerca nel testo circostante
-        text = section.get_text()
-        email_pos = text.find(email)
-        
-        if email_pos > 0:
-            # Testo prima dell'email
-            before_text = text[:email_pos].strip()
-            words = before_text.split()
-            
-            # Cerca parole che sembrano nomi (iniziano con maiuscola)
-            potential_names = []
-            for word in words[-10:]:  # Ultime 10 parole
-                if word.istitle() and len(word) > 2:
-                    potential_names.append(word)
+        for contact_data in extract_contact_fields(page):
+            # Calcola confidence
+            confidence = self._calculate_contact_confidence(contact_data)
+            contact_data['confidence_score'] = confidence
             
-            if len(potential_names) >= 2:
-                return ' '.join(potential_names[-2:])
-        
-        return None
+            if confidence > 0.4:  # Soglia minima
+                contacts.append(ScrapedContactModel(
+                    scraped_content_id=0,  # Sarà impostato dal caller
+                    extracted_at=datetime.now(),
+                    **contact_data
+                ))
+                if len(contacts) == 5:  # Limita a 5 contatti per pagina
+                    break
+        
+        return contacts
     
-    def _find_position_near_email(self, section: BeautifulSoup, email: str) -> Optional[str]:
-        """Trova posizione vicino all'email"""
-        # Parole chiave posizioni
-        position_keywords = [
-            'ceo', 'cto', 'cmo', 'direttore', 'manager', 'responsabile',
-            'coordinatore', 'amministratore', 'presidente', 'vicepresidente',
-            'founder', 'co-founder', 'partner', 'senior', 'junior', 'lead'
-        ]
-        
-        text = section.get_text().lower()
-        for keyword in position_keywords:
-            if keyword in text:
-                # Estrai contesto intorno alla parola
-                start = max(0, text.find(keyword) - 50)
-                end = min(len(text), text.find(keyword) + 50)
-                context = text[start:end]
-                
-                # Estrai la posizione
-                words = context.split()
-                for i, word in enumerate(words):
-                    if keyword in word:
-                        # Prendi 2-3 parole intorno
-                        position_words = words[max(0, i-1):i+3]
-                        position = ' '.join(position_words).strip()
-                        return position.title()
-        
-        return None
-    
-    def _calculate_company_confidence(self, company_data: Dict[str, Any]) -> float:
+    def _calculate_company_confidence(self, company_data: Dict[str, Any],
+                                      structured_fields: Optional[List[str]] = None) -> float:
         """Calcola confidence score per azienda"""
         score = 0.0
         
@@ -573,6 +703,10 @@ class IntelligenceWebScrapingEngine:
             if field in company_data and company_data[field]:
                 score += weight
         
+        # Campi dichiarati dal sito stesso (JSON-LD, microdata, OpenGraph)
+        if structured_fields and 'company_name' in structured_fields:
+            score = max(score, 0.6 + 0.1 * len(structured_fields))
+        
         return min(score, 1.0)
     
     def _calculate_contact_confidence(self, contact_data: Dict[str, Any]) -> float:
@@ -598,27 +732,6 @@ class IntelligenceWebScrapingEngine:
         filled_fields = sum(1 for field in required_fields if field in data and data[field])
         return filled_fields / len(required_fields) if required_fields else 0.0
     
-    def _extract_page_title(self, soup: BeautifulSoup) -> Optional[str]:
-        """Estrae titolo pagina"""
-        title = soup.find('title')
-        return title.get_text().strip() if title else None
-    
-    def _extract_clean_text(self, soup: BeautifulSoup) -> str:
-        """Estrae testo pulito dalla pagina"""
-        # Rimuovi script e style
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Ottieni testo pulito
-        text = soup.get_text()
-        
-        # Pulisci spazi multipli
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text[:2000]  # Limita lunghezza
-    
     def _generate_content_hash(self, content: str) -> str:
         """Genera hash per contenuto"""
         return hashlib.md5(content.encode()).hexdigest()
@@ -0,0 +1,110 @@
+"""
+🔌 Risorse condivise del processo API per lo scraping
+
+- Sessione aiohttp unica (connection pooling, DNS cache, keep-alive)
+- Process pool per il parsing HTML (CPU-bound, fuori dall'event loop)
+- Pool di connessioni psycopg2 thread-safe, usato via asyncio.to_thread
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+import aiohttp
+from psycopg2.pool import ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'it-IT,it;q=0.8,en-US;q=0.5,en;q=0.3',
+}
+
+_http_session: Optional[aiohttp.ClientSession] = None
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_db_pool: Optional[ThreadedConnectionPool] = None
+_db_slots: Optional[threading.BoundedSemaphore] = None
+_db_init_lock = threading.Lock()
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Sessione aiohttp condivisa (creata al primo utilizzo)"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=8, ttl_dns_cache=300),
+            timeout=HTTP_TIMEOUT,
+            headers=HTTP_HEADERS
+        )
+    return _http_session
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Process pool per il parsing HTML"""
+    global _parse_pool
+    if _parse_pool is None:
+        workers = int(os.getenv("SCRAPING_PARSE_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
+        _parse_pool = ProcessPoolExecutor(max_workers=workers)
+    return _parse_pool
+
+async def run_in_parse_pool(func: Callable, *args) -> Any:
+    """Esegue una funzione top-level nel process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_pool(), func, *args)
+
+def get_db_pool() -> ThreadedConnectionPool:
+    """Pool di connessioni PostgreSQL condiviso"""
+    global _db_pool, _db_slots
+    with _db_init_lock:
+        if _db_pool is None:
+            size = int(os.getenv("SCRAPING_DB_POOL_SIZE", "10"))
+            # getconn() non attende: i thread in eccesso aspettano sul semaforo
+            _db_slots = threading.BoundedSemaphore(size)
+            _db_pool = ThreadedConnectionPool(
+                minconn=1,
+                maxconn=size,
+                host=os.getenv("DB_HOST", "localhost"),
+                database=os.getenv("DB_NAME", "intelligence"),
+                user=os.getenv("DB_USER", "intelligence_user"),
+                password=os.getenv("DB_PASSWORD", "intelligence_pass"),
+                port=int(os.getenv("DB_PORT", "5432"))
+            )
+    return _db_pool
+
+@contextmanager
+def pooled_connection():
+    """
+    Connessione dal pool: commit a fine blocco, rollback in caso di errore
+    """
+    pool = get_db_pool()
+    slots = _db_slots
+    with slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+async def close_shared_resources():
+    """Chiude sessione HTTP, process pool e pool DB (shutdown API)"""
+    global _http_session, _parse_pool, _db_pool
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+    _parse_pool = None
+
+    if _db_pool is not None:
+        _db_pool.closeall()
+    _db_pool = None
+    logger.info("Shared scraping resources closed")
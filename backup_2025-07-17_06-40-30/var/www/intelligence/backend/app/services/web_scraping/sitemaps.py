@@ -0,0 +1,217 @@
+"""
+🗺️ Sitemap: scoperta, parsing e priorita' delle pagine
+
+- Sitemap da robots.txt, altrimenti dai path noti (/sitemap.xml, ...)
+- Sitemap index seguiti fino a max_sitemaps file, anche .xml.gz
+- Priorita' per URL: parole chiave delle pagine aziendali (chi-siamo,
+  contatti, team, servizi...) e freschezza del lastmod; blog, tag e
+  paginazioni in fondo
+
+Lo stesso punteggio ordina i link scoperti durante il crawl.
+"""
+
+import logging
+import math
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from xml.etree import ElementTree
+
+from app.services.web_scraping.rate_control import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+WELL_KNOWN_SITEMAPS = ('/sitemap.xml', '/sitemap_index.xml', '/sitemap.xml.gz', '/wp-sitemap.xml')
+
+# Tetto al contenuto decompresso (protezione da gzip bomb)
+MAX_SITEMAP_BYTES = 20 * 1024 * 1024
+
+# Peso delle parole chiave nei segmenti del path
+KEYWORD_WEIGHTS: Dict[str, float] = {
+    'contatti': 3.0, 'contattaci': 3.0, 'contact': 3.0, 'contacts': 3.0, 'contact-us': 3.0,
+    'chi-siamo': 3.0, 'chisiamo': 3.0, 'about': 3.0, 'about-us': 3.0,
+    'azienda': 2.5, 'company': 2.5, 'dove-siamo': 2.5, 'sede': 2.0, 'sedi': 2.0,
+    'team': 2.0, 'staff': 2.0, 'persone': 2.0, 'management': 2.0,
+    'servizi': 2.0, 'services': 2.0, 'prodotti': 1.5, 'products': 1.5, 'soluzioni': 1.5,
+    'storia': 1.0, 'mission': 1.0, 'lavora-con-noi': 1.0, 'careers': 1.0,
+    'note-legali': 1.0, 'privacy': 0.5,
+}
+# Sezioni con molte pagine e poco valore per il profilo aziendale
+PENALTY_SEGMENTS = {'blog', 'news', 'tag', 'tags', 'category', 'categoria', 'author', 'page', 'feed', 'archivio'}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+_DATE_RE = re.compile(r'^\d{4}(?:-\d{2}(?:-\d{2})?)?$')
+
+@dataclass
+class SitemapEntry:
+    url: str
+    lastmod: Optional[datetime] = None
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Data W3C (YYYY, YYYY-MM-DD, ISO 8601 con fuso) in UTC"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        if _DATE_RE.match(value):
+            parts = [int(part) for part in value.split('-')] + [1, 1]
+            return datetime(parts[0], parts[1], parts[2], tzinfo=timezone.utc)
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def decompress_sitemap(data: bytes) -> bytes:
+    """Decomprime .xml.gz (riconosciuto dai magic byte) con tetto sulla dimensione"""
+    if data[:2] != b'\x1f\x8b':
+        return data[:MAX_SITEMAP_BYTES]
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return decompressor.decompress(data, MAX_SITEMAP_BYTES)
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1].lower()
+
+def parse_sitemap(data: bytes) -> Tuple[List[SitemapEntry], List[str]]:
+    """
+    Parsing di un urlset o di un sitemap index
+
+    Returns:
+        (pagine, sitemap figlie)
+    """
+    try:
+        root = ElementTree.fromstring(decompress_sitemap(data))
+    except (ElementTree.ParseError, zlib.error) as e:
+        logger.warning(f"Invalid sitemap: {e}")
+        return [], []
+
+    pages, children = [], []
+    kind = _local(root.tag)
+    for node in root:
+        values = {_local(child.tag): (child.text or '').strip() for child in node}
+        location = values.get('loc')
+        if not location:
+            continue
+        if kind == 'sitemapindex':
+            children.append(location)
+        else:
+            pages.append(SitemapEntry(location, parse_lastmod(values.get('lastmod'))))
+    return pages, children
+
+def url_priority(url: str, lastmod: Optional[datetime] = None,
+                 now: Optional[datetime] = None) -> float:
+    """
+    Punteggio di utilita' di una pagina (piu' alto = prima)
+
+    Parole chiave nel path (peso massimo) + freschezza del lastmod
+    (fino a +1, dimezzata ogni ~6 mesi) - profondita' del path e sezioni
+    a basso valore.
+    """
+    segments = [segment for segment in urlparse(url).path.lower().split('/') if segment]
+    score = 0.0
+    for segment in segments:
+        segment = segment.rsplit('.', 1)[0]
+        weight = KEYWORD_WEIGHTS.get(segment)
+        if weight is None:
+            weight = max((KEYWORD_WEIGHTS.get(token, 0.0) for token in _TOKEN_RE.findall(segment)), default=0.0)
+        score = max(score, weight)
+        if segment in PENALTY_SEGMENTS or segment.isdigit():
+            score -= 1.5
+
+    score -= 0.25 * max(len(segments) - 1, 0)
+
+    if lastmod is not None:
+        now = now or datetime.now(timezone.utc)
+        age_days = max((now - lastmod).total_seconds() / 86400, 0.0)
+        score += math.exp(-age_days / 260)
+    return score
+
+async def _read_capped(response, limit: int = MAX_SITEMAP_BYTES) -> bytes:
+    """Corpo completo della risposta fino a limit byte (read(n) ritorna solo il gia' bufferizzato)"""
+    data = bytearray()
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        data.extend(chunk[:limit - len(data)])
+        if len(data) >= limit:
+            logger.warning(f"Sitemap {response.url} truncated at {limit} bytes")
+            break
+    return bytes(data)
+
+async def _fetch_sitemap(session, url: str, rate_control=None) -> Optional[bytes]:
+    # Import locale: crawler importa gia' questo modulo
+    from app.services.web_scraping.crawler import site_key
+    domain = site_key(url)
+    if rate_control is not None:
+        await rate_control.acquire(domain)
+    started = time.perf_counter()
+    status, retry_after = None, None
+    try:
+        async with session.get(url, allow_redirects=True) as response:
+            status = response.status
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status != 200:
+                return None
+            return await _read_capped(response)
+    except Exception as e:
+        logger.warning(f"Could not fetch sitemap {url}: {e}")
+        return None
+    finally:
+        if rate_control is not None:
+            # 404 dei path noti: risposta sana per il rate control
+            rate_control.record(domain, status, time.perf_counter() - started, retry_after)
+
+async def discover_sitemap_entries(session, site_url: str, declared: List[str],
+                                   max_sitemaps: int = 20, max_urls: int = 5000,
+                                   rate_control=None) -> List[SitemapEntry]:
+    """
+    Pagine delle sitemap del sito
+
+    Args:
+        declared: sitemap dichiarate in robots.txt; se vuoto si provano i path noti
+        max_sitemaps: file di sitemap scaricati al massimo (index compresi)
+        max_urls: pagine raccolte al massimo
+        rate_control: AdaptiveRateController del crawl, se presente le
+            richieste passano dal token bucket del dominio come le pagine
+    """
+    parsed = urlparse(site_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    declared = list(declared)
+    queue = declared or [urljoin(origin, path) for path in WELL_KNOWN_SITEMAPS]
+    probing = not declared
+
+    seen, entries = set(), []
+    fetched = 0
+    while queue and fetched < max_sitemaps and len(entries) < max_urls:
+        url = queue.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+
+        data = await _fetch_sitemap(session, url, rate_control)
+        fetched += 1
+        if not data:
+            continue
+
+        pages, children = parse_sitemap(data)
+        entries.extend(pages[:max_urls - len(entries)])
+        queue.extend(child for child in children if child not in seen)
+        # Path noti: basta la prima sitemap valida
+        if probing and (pages or children):
+            queue = [child for child in queue if child in children]
+            probing = False
+
+    if entries:
+        logger.info(f"🗺️ Sitemap {origin}: {len(entries)} URLs from {fetched} files")
+    return entries
+
+def rank_entries(entries: List[SitemapEntry], now: Optional[datetime] = None) -> List[Tuple[str, float]]:
+    """(url, punteggio) ordinati per priorita' decrescente, senza duplicati"""
+    now = now or datetime.now(timezone.utc)
+    best: Dict[str, float] = {}
+    for entry in entries:
+        score = url_priority(entry.url, entry.lastmod, now)
+        if score > best.get(entry.url, float('-inf')):
+            best[entry.url] = score
+    return sorted(best.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,230 @@
+"""
+🏷️ Dati strutturati delle pagine: JSON-LD, microdata, OpenGraph
+
+Molti siti aziendali pubblicano gia' Organization / LocalBusiness in
+JSON-LD, microdata schema.org o meta OpenGraph. Questi campi sono
+affidabili ed economici da leggere: gli estrattori euristici girano solo
+per i campi mancanti.
+
+Le funzioni lavorano su una ParsedPage (json_ld, meta, select) gia'
+costruita, senza un secondo parsing.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+ORGANIZATION_TYPES = {
+    'organization', 'corporation', 'localbusiness', 'professionalservice',
+    'store', 'onlinestore', 'restaurant', 'ngo', 'educationalorganization',
+    'medicalorganization', 'governmentorganization', 'sportsorganization',
+    'homeandconstructionbusiness', 'automotivebusiness', 'legalservice',
+    'financialservice', 'accountingservice', 'lodgingbusiness', 'foodestablishment'
+}
+
+# Campi di ScrapedCompanyModel coperti dai dati strutturati
+COMPANY_FIELDS = (
+    'company_name', 'description', 'email', 'phone',
+    'address_street', 'address_city', 'address_zip', 'partita_iva'
+)
+
+_CDATA_RE = re.compile(r'^\s*(?:<!--|<!\[CDATA\[)|(?:-->|\]\]>)\s*$')
+_VAT_RE = re.compile(r'\d{11}')
+
+def _is_organization(node: Dict[str, Any]) -> bool:
+    types = node.get('@type') or []
+    if isinstance(types, str):
+        types = [types]
+    for value in types:
+        name = str(value).rsplit('/', 1)[-1].lower()
+        if name in ORGANIZATION_TYPES or name.endswith('business'):
+            return True
+    return False
+
+def _flatten(data: Any) -> Iterable[Dict[str, Any]]:
+    if isinstance(data, list):
+        for item in data:
+            yield from _flatten(item)
+    elif isinstance(data, dict):
+        yield data
+        if '@graph' in data:
+            yield from _flatten(data['@graph'])
+
+def parse_json_ld(blocks: List[str]) -> List[Dict[str, Any]]:
+    """Nodi JSON-LD della pagina (blocchi non validi ignorati)"""
+    nodes = []
+    for block in blocks:
+        try:
+            data = json.loads(_CDATA_RE.sub('', block).strip())
+        except (ValueError, TypeError):
+            continue
+        nodes.extend(_flatten(data))
+    return nodes
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('@value')
+    if value is None:
+        return None
+    text = ' '.join(str(value).split())
+    return text or None
+
+def _clean_email(value: Any) -> Optional[str]:
+    text = _text(value)
+    if text and text.lower().startswith('mailto:'):
+        text = text[7:]
+    return text if text and '@' in text else None
+
+def _clean_phone(value: Any) -> Optional[str]:
+    text = _text(value)
+    if text and text.lower().startswith('tel:'):
+        text = text[4:]
+    return text
+
+def _clean_vat(value: Any) -> Optional[str]:
+    text = _text(value)
+    match = _VAT_RE.search(text.replace(' ', '')) if text else None
+    return match.group(0) if match else None
+
+def _social_profiles(same_as: Any) -> Dict[str, str]:
+    urls = same_as if isinstance(same_as, list) else [same_as] if same_as else []
+    profiles = {}
+    for url in urls:
+        host = urlparse(str(url)).netloc.lower().removeprefix('www.')
+        if host:
+            profiles.setdefault(host.split('.')[0], str(url))
+    return profiles
+
+def _address_fields(address: Any) -> Dict[str, str]:
+    if isinstance(address, list):
+        address = address[0] if address else None
+    if isinstance(address, str):
+        return {'address_street': ' '.join(address.split())}
+    if not isinstance(address, dict):
+        return {}
+
+    fields = {
+        'address_street': _text(address.get('streetAddress')),
+        'address_city': _text(address.get('addressLocality')),
+        'address_zip': _text(address.get('postalCode')),
+    }
+    return {key: value for key, value in fields.items() if value}
+
+def company_from_json_ld(nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Campi azienda dal primo nodo Organization/LocalBusiness"""
+    for node in nodes:
+        if not _is_organization(node):
+            continue
+
+        data = {
+            'company_name': _text(node.get('name')) or _text(node.get('legalName')),
+            'description': _text(node.get('description')),
+            'email': _clean_email(node.get('email')),
+            'phone': _clean_phone(node.get('telephone')),
+            'partita_iva': _clean_vat(node.get('vatID')) or _clean_vat(node.get('taxID')),
+        }
+        data.update(_address_fields(node.get('address')))
+        social = _social_profiles(node.get('sameAs'))
+        if social:
+            data['social_media'] = social
+        return {key: value for key, value in data.items() if value}
+    return {}
+
+MICRODATA_PROPS = {
+    'name': 'company_name',
+    'legalName': 'company_name',
+    'description': 'description',
+    'email': 'email',
+    'telephone': 'phone',
+    'streetAddress': 'address_street',
+    'addressLocality': 'address_city',
+    'postalCode': 'address_zip',
+    'vatID': 'partita_iva',
+}
+MICRODATA_CLEANERS = {'email': _clean_email, 'phone': _clean_phone, 'partita_iva': _clean_vat}
+# Item annidati nell'azienda da cui si leggono solo alcuni campi
+MICRODATA_NESTED = {
+    'postaladdress': ('address_street', 'address_city', 'address_zip'),
+    'contactpoint': ('email', 'phone'),
+}
+
+def _item_type(element) -> str:
+    itemtype = (element.get('itemtype') or '').split()
+    return itemtype[0].rstrip('/').rsplit('/', 1)[-1].lower() if itemtype else ''
+
+def company_from_microdata(page) -> Dict[str, Any]:
+    """
+    Campi azienda da microdata schema.org
+
+    Solo le itemprop il cui itemscope piu' vicino e' l'Organization /
+    LocalBusiness (o un PostalAddress / ContactPoint annidato in essa):
+    name e description di un Product sulla stessa pagina non contano.
+    """
+    organizations = {
+        element.key for element in page.select('[itemtype]')
+        if _is_organization({'@type': element.get('itemtype')})
+    }
+    if not organizations:
+        return {}
+
+    data: Dict[str, Any] = {}
+    for element in page.select('[itemprop]'):
+        field = MICRODATA_PROPS.get(element.get('itemprop'))
+        if not field or field in data:
+            continue
+
+        scope = element.item_scope()
+        if scope is None:
+            continue
+        if scope.key not in organizations:
+            allowed = MICRODATA_NESTED.get(_item_type(scope), ())
+            parent = scope.item_scope() if field in allowed else None
+            if parent is None or parent.key not in organizations:
+                continue
+
+        value = element.get('content') or element.get('href') or element.text
+        value = MICRODATA_CLEANERS.get(field, _text)(value)
+        if value:
+            data[field] = value
+    return data
+
+OPENGRAPH_PROPS = {
+    'og:site_name': 'company_name',
+    'og:description': 'description',
+    'business:contact_data:email': 'email',
+    'business:contact_data:phone_number': 'phone',
+    'business:contact_data:street_address': 'address_street',
+    'business:contact_data:locality': 'address_city',
+    'business:contact_data:postal_code': 'address_zip',
+}
+
+def company_from_opengraph(meta: Dict[str, str]) -> Dict[str, Any]:
+    """Campi azienda dai meta OpenGraph (og:site_name, business:contact_data:*)"""
+    data = {}
+    for key, field in OPENGRAPH_PROPS.items():
+        value = _text(meta.get(key))
+        if value and field not in data:
+            data[field] = value
+    return data
+
+def extract_structured_company(page) -> Dict[str, Any]:
+    """
+    Campi azienda dai dati strutturati: JSON-LD > microdata > OpenGraph
+
+    Ritorna anche '_structured_fields', i campi coperti (per la confidence).
+    """
+    data: Dict[str, Any] = {}
+    for source in (
+        company_from_json_ld(parse_json_ld(page.json_ld)) if page.json_ld else {},
+        company_from_microdata(page),
+        company_from_opengraph(page.meta),
+    ):
+        for key, value in source.items():
+            data.setdefault(key, value)
+
+    if data:
+        data['_structured_fields'] = [field for field in COMPANY_FIELDS if data.get(field)]
+    return data
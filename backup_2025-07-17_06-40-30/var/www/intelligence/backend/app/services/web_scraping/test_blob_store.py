@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test blob store dell'HTML grezzo (reference counting)
+"""
+
+import os
+import sys
+import tempfile
+
+# Backend root (per gli import app.*)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from app.services.web_scraping.blob_store import BlobStore
+
+HTML = "<html><head><title>Rossi Pompe</title></head><body>" + "<p>Pompe centrifughe</p>" * 200 + "</body></html>"
+
+def test_put_get():
+    """Contenuto compresso su disco e riletto identico"""
+    print("🧪 Testing BlobStore put/get...")
+
+    with tempfile.TemporaryDirectory() as root:
+        try:
+            store = BlobStore(root)
+            key = store.put(HTML)
+            assert key == BlobStore.key_for(HTML)
+            assert store.get(key) == HTML
+            assert store.get(BlobStore.key_for("mai salvato")) is None
+
+            stats = store.stats()
+            assert stats['blobs'] == 1
+            assert stats['compressed_bytes'] < len(HTML.encode())
+            print(f"✅ Put/get OK ({len(HTML)} -> {stats['compressed_bytes']} bytes)")
+            return True
+        except AssertionError as e:
+            print(f"❌ Error: {e}")
+            return False
+
+def test_release_refcount():
+    """Pagine identiche condividono il blob; cancellato all'ultimo release"""
+    print("\n🧪 Testing BlobStore release refcounting...")
+
+    with tempfile.TemporaryDirectory() as root:
+        try:
+            store = BlobStore(root)
+            key = store.put(HTML)
+            assert store.put(HTML.encode("utf-8")) == key
+            assert store.references(key) == 2
+            assert store.stats()['blobs'] == 1
+
+            assert store.release(key) is False
+            assert store.references(key) == 1
+            assert store.get(key) == HTML
+
+            assert store.release(key) is True
+            assert store.references(key) == 0
+            assert store.get(key) is None
+            assert store.stats()['blobs'] == 0
+
+            # Ri-salvare dopo la cancellazione riparte da un riferimento
+            assert store.put(HTML) == key
+            assert store.references(key) == 1
+            print("✅ Refcounting OK")
+            return True
+        except AssertionError as e:
+            print(f"❌ Error: {e}")
+            return False
+
+def main():
+    """Main test function"""
+    print("🚀 Testing Blob Store")
+    print("=" * 50)
+
+    tests = [
+        test_put_get,
+        test_release_refcount
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{total} passed")
+
+    if passed == total:
+        print("🎉 All tests passed!")
+        return 0
+    else:
+        print("❌ Some tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,7 @@ class ScrapeResponse(BaseModel):
     chunks_created: Optional[int] = None
     chunks_vectorized: Optional[int] = None
     duplicate: Optional[bool] = None
+    canonical_document_id: Optional[int] = None
     error: Optional[str] = None
     stage: Optional[str] = None
 
@@ -68,7 +69,8 @@ async def scrape_url(request: ScrapeRequest, db: Session = Depends(get_db)):
                 title=result.get("title"),
                 chunks_created=result.get("chunks_created"),
                 chunks_vectorized=result.get("chunks_vectorized"),
-                duplicate=result.get("duplicate", False)
+                duplicate=result.get("duplicate", False),
+                canonical_document_id=result.get("canonical_document_id")
             )
         else:
             return ScrapeResponse(
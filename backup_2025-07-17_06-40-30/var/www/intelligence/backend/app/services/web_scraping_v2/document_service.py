@@ -1,7 +1,11 @@
+from sqlalchemy import String, cast, func, literal, or_
+from sqlalchemy.dialects.postgresql import BIT
 from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
 import logging
 from .models import ScrapedDocument, DocumentChunk
+from app.services.web_scraping.blob_store import get_blob_store
+from .fingerprints import DEFAULT_MAX_DISTANCE, simhash, simhash_bands, to_signed
 import hashlib
 
 logger = logging.getLogger(__name__)
@@ -9,13 +13,43 @@ logger = logging.getLogger(__name__)
 class DocumentService:
     """Servizio dedicato alla gestione database documenti"""
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, max_distance: int = DEFAULT_MAX_DISTANCE):
         self.db = db_session
+        # Bit diversi ammessi tra SimHash per considerare un documento quasi duplicato
+        self.max_distance = max_distance
+    
+    def find_near_duplicate(self, fingerprint: int) -> Optional[ScrapedDocument]:
+        """
+        Documento canonico piu' vicino entro max_distance bit
+        
+        I candidati condividono almeno una banda LSH (colonne indicizzate);
+        la distanza di Hamming e' calcolata in SQL (bit a 1 dello XOR), cosi'
+        nessun candidato viene tagliato. A parita' vince il documento piu' vecchio.
+        """
+        bands = simhash_bands(fingerprint)
+        xor_bits = cast(cast(ScrapedDocument.simhash.op('#')(literal(to_signed(fingerprint))), BIT(64)), String)
+        distance = func.length(func.replace(xor_bits, '0', ''))
+        return self.db.query(ScrapedDocument).filter(
+            ScrapedDocument.canonical_document_id.is_(None),
+            ScrapedDocument.simhash.isnot(None),
+            or_(
+                ScrapedDocument.simhash_band_0 == bands[0],
+                ScrapedDocument.simhash_band_1 == bands[1],
+                ScrapedDocument.simhash_band_2 == bands[2],
+                ScrapedDocument.simhash_band_3 == bands[3]
+            ),
+            distance <= self.max_distance
+        ).order_by(distance, ScrapedDocument.id).first()
     
     def save_document(self, scraping_data: Dict) -> Dict:
         """
         Salva documento nel database
-        Returns: {success: bool, document_id: int, error: str}
+        
+        I quasi-duplicati (SimHash entro max_distance bit) vengono salvati
+        collegati al documento canonico e non vanno chunkati ne' vettorizzati.
+        
+        Returns: {success: bool, document_id: int, duplicate: bool,
+                  canonical_document_id: int, error: str}
         """
         try:
             # Sanitize content - remove NULL bytes
@@ -35,6 +69,26 @@ class DocumentService:
                     "duplicate": True
                 }
             
+            fingerprint = simhash(content)
+            canonical = self.find_near_duplicate(fingerprint)
+            
+            if canonical and canonical.url == scraping_data["url"]:
+                # Stessa pagina con differenze minime (data, token): nulla da salvare
+                logger.info(f"Near-duplicate of itself, keeping document {canonical.id}: {scraping_data['url']}")
+                return {
+                    "success": True,
+                    "document_id": canonical.id,
+                    "duplicate": True,
+                    "canonical_document_id": canonical.id
+                }
+            
+            bands = simhash_bands(fingerprint)
+            
+            # HTML grezzo nel blob store: nel DB solo l'hash
+            raw_html_hash = None
+            if scraping_data.get("raw_html"):
+                raw_html_hash = get_blob_store().put(scraping_data["raw_html"])
+            
             # Create new document
             document = ScrapedDocument(
                 url=scraping_data["url"],
@@ -42,18 +96,34 @@ class DocumentService:
                 title=scraping_data["title"],
                 content=content,
                 content_hash=scraping_data["content_hash"],
-                status="completed"
+                raw_html_hash=raw_html_hash,
+                status="duplicate" if canonical else "completed",
+                simhash=to_signed(fingerprint),
+                simhash_band_0=bands[0],
+                simhash_band_1=bands[1],
+                simhash_band_2=bands[2],
+                simhash_band_3=bands[3],
+                canonical_document_id=canonical.id if canonical else None
             )
             
             self.db.add(document)
-            self.db.commit()
+            try:
+                self.db.commit()
+            except Exception:
+                if raw_html_hash:
+                    get_blob_store().release(raw_html_hash)
+                raise
             self.db.refresh(document)
             
-            logger.info(f"Document saved: ID {document.id}")
+            if canonical:
+                logger.info(f"Near-duplicate saved: ID {document.id} -> canonical {canonical.id}")
+            else:
+                logger.info(f"Document saved: ID {document.id}")
             return {
                 "success": True,
                 "document_id": document.id,
-                "duplicate": False
+                "duplicate": canonical is not None,
+                "canonical_document_id": canonical.id if canonical else None
             }
             
         except Exception as e:
@@ -107,7 +177,10 @@ class DocumentService:
     def delete_document(self, document_id: int) -> Dict:
         """
         Elimina documento e tutti i chunks correlati
-        Returns: {success: bool, error: str}
+        
+        Se il documento e' canonico, il suo quasi-duplicato piu' vecchio diventa
+        il nuovo canonico (da chunkare e vettorizzare) e gli altri puntano a lui.
+        Returns: {success: bool, promoted_document_id: int, error: str}
         """
         try:
             document = self.db.query(ScrapedDocument).filter(
@@ -117,10 +190,28 @@ class DocumentService:
             if not document:
                 return {"success": False, "error": "Document not found"}
             
+            raw_html_hash = document.raw_html_hash
+            
+            duplicates = self.db.query(ScrapedDocument).filter(
+                ScrapedDocument.canonical_document_id == document_id
+            ).order_by(ScrapedDocument.id).all()
+            promoted = duplicates[0] if duplicates else None
+            if promoted:
+                promoted.canonical_document_id = None
+                promoted.status = "completed"
+                for duplicate in duplicates[1:]:
+                    duplicate.canonical_document_id = promoted.id
+            
             # Cascading delete will handle chunks automatically
             self.db.delete(document)
             self.db.commit()
             
+            if raw_html_hash:
+                get_blob_store().release(raw_html_hash)
+            
+            if promoted:
+                logger.info(f"Document {document_id} deleted, duplicate {promoted.id} promoted to canonical")
+                return {"success": True, "promoted_document_id": promoted.id}
             logger.info(f"Document {document_id} deleted successfully")
             return {"success": True}
             
@@ -129,6 +220,18 @@ class DocumentService:
             logger.error(f"Failed to delete document {document_id}: {e}")
             return {"success": False, "error": str(e)}
     
+    def get_raw_html(self, document: ScrapedDocument) -> Optional[str]:
+        """HTML grezzo del documento dal blob store"""
+        if not document.raw_html_hash:
+            return None
+        return get_blob_store().get(document.raw_html_hash)
+    
+    def get_document_by_id(self, document_id: int) -> Optional[ScrapedDocument]:
+        """Trova documento per ID"""
+        return self.db.query(ScrapedDocument).filter(
+            ScrapedDocument.id == document_id
+        ).first()
+    
     def get_document_by_url(self, url: str) -> Optional[ScrapedDocument]:
         """Trova documento per URL"""
         return self.db.query(ScrapedDocument).filter(
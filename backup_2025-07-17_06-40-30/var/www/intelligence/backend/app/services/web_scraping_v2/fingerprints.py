@@ -0,0 +1,64 @@
+"""
+Impronte SimHash per riconoscere i documenti quasi duplicati
+
+Una pagina che differisce solo per una data o un token di sessione ha un
+MD5 diverso ma una SimHash a pochi bit di distanza. La SimHash a 64 bit
+e' divisa in 4 bande da 16 bit (LSH): due impronte entro 3 bit di
+distanza hanno almeno una banda identica, quindi la ricerca dei candidati
+usa gli indici sulle bande invece di scorrere tutti i documenti.
+"""
+import hashlib
+import os
+import re
+from collections import Counter
+from typing import List
+
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+SHINGLE_SIZE = 3
+
+# Distanza di Hamming massima per considerare due documenti quasi duplicati
+# (oltre BANDS - 1 la ricerca per bande puo' perdere qualche coppia)
+DEFAULT_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3"))
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+_MASK = (1 << SIMHASH_BITS) - 1
+
+def _shingles(text: str) -> Counter:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return Counter([' '.join(words)]) if words else Counter()
+    return Counter(' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+
+def simhash(text: str) -> int:
+    """SimHash a 64 bit (senza segno) sugli shingle di 3 parole"""
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in _shingles(text).items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count('1')
+
+def similarity(a: int, b: int) -> float:
+    return 1.0 - hamming_distance(a, b) / SIMHASH_BITS
+
+def simhash_bands(fingerprint: int) -> List[int]:
+    """Bande LSH della SimHash (una colonna indicizzata per banda)"""
+    band_mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (band * BAND_BITS)) & band_mask for band in range(BANDS)]
+
+def to_signed(fingerprint: int) -> int:
+    """SimHash senza segno -> BIGINT PostgreSQL"""
+    return fingerprint - (1 << SIMHASH_BITS) if fingerprint >= 1 << (SIMHASH_BITS - 1) else fingerprint
+
+def to_unsigned(value: int) -> int:
+    return value & _MASK
@@ -2,14 +2,57 @@
 Database migration script per Web Scraping V2
 Crea le nuove tabelle senza toccare quelle esistenti
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import os
-from .models import Base
+from .models import Base, ScrapedDocument
+from .fingerprints import simhash, simhash_bands, to_signed
 import logging
 
 logger = logging.getLogger(__name__)
 
+# create_all non aggiunge colonne a tabelle esistenti
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS simhash BIGINT",
+    "ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS simhash_band_0 INTEGER",
+    "ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS simhash_band_1 INTEGER",
+    "ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS simhash_band_2 INTEGER",
+    "ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS simhash_band_3 INTEGER",
+    """ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS canonical_document_id INTEGER
+       REFERENCES scraped_documents_v2(id) ON DELETE SET NULL""",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_documents_v2_simhash_band_0 ON scraped_documents_v2(simhash_band_0)",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_documents_v2_simhash_band_1 ON scraped_documents_v2(simhash_band_1)",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_documents_v2_simhash_band_2 ON scraped_documents_v2(simhash_band_2)",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_documents_v2_simhash_band_3 ON scraped_documents_v2(simhash_band_3)",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_documents_v2_canonical_document_id ON scraped_documents_v2(canonical_document_id)",
+    "ALTER TABLE scraped_documents_v2 ADD COLUMN IF NOT EXISTS raw_html_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_scraped_documents_v2_raw_html_hash ON scraped_documents_v2(raw_html_hash)",
+]
+
+def backfill_fingerprints(engine, batch_size: int = 200) -> int:
+    """Calcola SimHash e bande per i documenti salvati prima dei quasi-duplicati"""
+    session = sessionmaker(bind=engine)()
+    updated = 0
+    try:
+        while True:
+            documents = session.query(ScrapedDocument).filter(
+                ScrapedDocument.simhash.is_(None)
+            ).limit(batch_size).all()
+            if not documents:
+                break
+            
+            for document in documents:
+                fingerprint = simhash(document.content or "")
+                document.simhash = to_signed(fingerprint)
+                (document.simhash_band_0, document.simhash_band_1,
+                 document.simhash_band_2, document.simhash_band_3) = simhash_bands(fingerprint)
+            
+            session.commit()
+            updated += len(documents)
+        return updated
+    finally:
+        session.close()
+
 def migrate_database():
     """Crea le nuove tabelle V2"""
     try:
@@ -20,6 +63,14 @@ def migrate_database():
         # Create only V2 tables
         Base.metadata.create_all(bind=engine)
         
+        with engine.begin() as conn:
+            for migration in COLUMN_MIGRATIONS:
+                conn.execute(text(migration))
+        
+        backfilled = backfill_fingerprints(engine)
+        if backfilled:
+            logger.info(f"SimHash backfilled for {backfilled} documents")
+        
         logger.info("✅ Database migration completed successfully")
         logger.info("New tables created:")
         logger.info("- scraped_documents_v2")
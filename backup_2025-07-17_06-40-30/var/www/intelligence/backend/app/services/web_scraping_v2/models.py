@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -15,12 +15,22 @@ class ScrapedDocument(Base):
     title = Column(String, nullable=True)
     content = Column(Text, nullable=False)
     content_hash = Column(String, nullable=False)  # Per evitare duplicati
+    raw_html_hash = Column(String(64), nullable=True, index=True)  # Chiave SHA-256 nel blob store
     status = Column(String, default="completed")  # completed, failed, processing
     scraped_at = Column(DateTime, default=datetime.utcnow)
     vectorized = Column(Boolean, default=False)
     vector_chunks_count = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
     
+    # Quasi-duplicati: SimHash a 64 bit e bande LSH indicizzate
+    simhash = Column(BigInteger, nullable=True)
+    simhash_band_0 = Column(Integer, nullable=True, index=True)
+    simhash_band_1 = Column(Integer, nullable=True, index=True)
+    simhash_band_2 = Column(Integer, nullable=True, index=True)
+    simhash_band_3 = Column(Integer, nullable=True, index=True)
+    # Documento canonico di cui questo e' un quasi-duplicato (non chunkato ne' vettorizzato)
+    canonical_document_id = Column(Integer, ForeignKey("scraped_documents_v2.id", ondelete="SET NULL"), nullable=True, index=True)
+    
     # Relazione con chunks
     chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan")
 
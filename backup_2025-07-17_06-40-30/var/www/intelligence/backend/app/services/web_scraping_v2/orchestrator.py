@@ -51,11 +51,13 @@ class WebScrapingOrchestrator:
             is_duplicate = save_result.get("duplicate", False)
             
             if is_duplicate:
+                canonical_id = save_result.get("canonical_document_id")
                 logger.info(f"Document is duplicate, skipping vectorization")
                 return {
                     "success": True,
-                    "message": "Document already exists",
+                    "message": f"Near-duplicate of document {canonical_id}" if canonical_id else "Document already exists",
                     "document_id": document_id,
+                    "canonical_document_id": canonical_id,
                     "duplicate": True
                 }
             
@@ -143,6 +145,11 @@ class WebScrapingOrchestrator:
             if not db_delete["success"]:
                 return db_delete
             
+            # Il quasi-duplicato promosso a canonico non era mai stato vettorizzato
+            promoted_id = db_delete.get("promoted_document_id")
+            if promoted_id:
+                self._vectorize_promoted(promoted_id)
+            
             return {
                 "success": True,
                 "message": f"Document completely deleted: {url}"
@@ -152,6 +159,19 @@ class WebScrapingOrchestrator:
             logger.error(f"Complete deletion failed for {url}: {e}")
             return {"success": False, "error": str(e)}
     
+    def _vectorize_promoted(self, document_id: int):
+        """Chunk e vettori per un documento appena diventato canonico"""
+        document = self.document_service.get_document_by_id(document_id)
+        if not document:
+            return
+        chunks_result = self.document_service.create_chunks(document_id, document.content)
+        if not chunks_result["success"]:
+            logger.warning(f"Chunking failed for promoted document {document_id}: {chunks_result['error']}")
+            return
+        vector_result = self.vector_service.vectorize_document(document_id)
+        if not vector_result["success"]:
+            logger.warning(f"Vectorization failed for promoted document {document_id}: {vector_result['error']}")
+    
     def get_stats(self) -> Dict:
         """Statistiche complete del sistema"""
         try:
@@ -2,9 +2,12 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 import hashlib
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 import logging
 
+from app.services.web_scraping.boilerplate import site_templates
+from app.services.web_scraping.html_extraction import collapse_text, soup_segments
+
 logger = logging.getLogger(__name__)
 
 class ScrapingService:
@@ -43,9 +46,10 @@ class ScrapingService:
             
             # Extract data
             title = self._extract_title(soup)
-            content = self._extract_clean_content(soup)
             domain = parsed_url.netloc
-            content_hash = hashlib.md5(content.encode()).hexdigest()
+            content, full_text = self._extract_clean_content(soup, domain, url)
+            # Hash sul testo completo: non dipende dal template accumulato sul dominio
+            content_hash = hashlib.md5(full_text.encode()).hexdigest()
             
             return {
                 "success": True,
@@ -80,18 +84,18 @@ class ScrapingService:
         
         return "No title found"
     
-    def _extract_clean_content(self, soup: BeautifulSoup) -> str:
-        """Estrai contenuto pulito per vettorizzazione"""
+    def _extract_clean_content(self, soup: BeautifulSoup, domain: str, url: str) -> Tuple[str, str]:
+        """
+        Estrai contenuto pulito per vettorizzazione
+        
+        Returns:
+            (testo senza il boilerplate del sito, testo completo della pagina)
+        """
         # Remove unwanted elements
         for element in soup(["script", "style", "nav", "header", "footer", "aside", "noscript"]):
             element.decompose()
         
-        # Get text content
-        text = soup.get_text()
-        
-        # Clean whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        clean_text = ' '.join(chunk for chunk in chunks if chunk)
+        full_text = collapse_text(soup.get_text())
         
-        return clean_text
+        # Segmenti ripetuti sulle pagine dello stesso dominio (banner, menu non semantici)
+        return site_templates.clean_page(domain, soup_segments(soup), url), full_text
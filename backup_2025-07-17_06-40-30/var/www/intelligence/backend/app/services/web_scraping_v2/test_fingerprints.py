@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test impronte SimHash (quasi duplicati)
+"""
+
+import os
+import sys
+
+# Backend root (per gli import app.*)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from app.services.web_scraping_v2.fingerprints import (
+    BANDS,
+    DEFAULT_MAX_DISTANCE,
+    SIMHASH_BITS,
+    hamming_distance,
+    simhash,
+    simhash_bands,
+    to_signed,
+    to_unsigned
+)
+
+ARTICLE = (
+    "Rossi Pompe Srl progetta e produce pompe centrifughe per uso industriale dal 1975. "
+    "Lo stabilimento di Milano serve clienti in tutta Europa nei settori alimentare, "
+    "chimico e del trattamento delle acque. Il nostro ufficio tecnico segue ogni "
+    "progetto dalla scelta del modello fino all'assistenza post vendita, con ricambi "
+    "disponibili in pronta consegna e tecnici specializzati su tutto il territorio. "
+) * 3
+
+def test_hamming_distance():
+    """Distanza di Hamming sui 64 bit"""
+    print("🧪 Testing hamming_distance...")
+
+    try:
+        assert hamming_distance(0, 0) == 0
+        assert hamming_distance(0b1011, 0b0001) == 2
+        assert hamming_distance(0, (1 << SIMHASH_BITS) - 1) == SIMHASH_BITS
+        # Valori con segno (BIGINT) e senza segno danno la stessa distanza
+        value = simhash(ARTICLE)
+        assert to_unsigned(to_signed(value)) == value
+        assert hamming_distance(to_unsigned(to_signed(value)), value) == 0
+        print("✅ Hamming distance OK")
+        return True
+    except AssertionError as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_near_duplicate_distance():
+    """Una data diversa resta entro la soglia, un testo diverso no"""
+    print("\n🧪 Testing SimHash near-duplicates...")
+
+    try:
+        original = simhash(ARTICLE + "Aggiornato il 3 marzo 2025.")
+        updated = simhash(ARTICLE + "Aggiornato il 4 marzo 2025.")
+        other = simhash(
+            "Il ristorante propone cucina tradizionale toscana con prodotti a chilometro zero, "
+            "pasta fatta in casa, carni alla brace e una carta dei vini con etichette locali. "
+            "Aperto tutti i giorni a pranzo e cena, chiuso il lunedi'. Prenotazione consigliata."
+        )
+        near = hamming_distance(original, updated)
+        far = hamming_distance(original, other)
+        print(f"   near: {near} bit, far: {far} bit")
+        assert near <= DEFAULT_MAX_DISTANCE, near
+        assert far > DEFAULT_MAX_DISTANCE, far
+        assert simhash(ARTICLE) == simhash(ARTICLE.upper())
+        print("✅ Near-duplicate distance OK")
+        return True
+    except AssertionError as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def test_band_candidacy():
+    """Entro BANDS - 1 bit di distanza almeno una banda e' identica"""
+    print("\n🧪 Testing LSH band candidacy...")
+
+    try:
+        fingerprint = simhash(ARTICLE)
+        bands = simhash_bands(fingerprint)
+        assert len(bands) == BANDS
+
+        # Bande ricomposte = impronta originale
+        rebuilt = sum(band << (index * (SIMHASH_BITS // BANDS)) for index, band in enumerate(bands))
+        assert rebuilt == fingerprint
+
+        # Un bit diverso in ciascuna di BANDS - 1 bande: una banda resta uguale
+        flipped = fingerprint
+        for band in range(BANDS - 1):
+            flipped ^= 1 << (band * (SIMHASH_BITS // BANDS))
+        shared = sum(1 for a, b in zip(bands, simhash_bands(flipped)) if a == b)
+        assert hamming_distance(fingerprint, flipped) == BANDS - 1
+        assert shared >= 1, shared
+
+        # Un bit diverso in ogni banda: nessun candidato (limite documentato)
+        flipped ^= 1 << ((BANDS - 1) * (SIMHASH_BITS // BANDS))
+        assert all(a != b for a, b in zip(bands, simhash_bands(flipped)))
+        print("✅ Band candidacy OK")
+        return True
+    except AssertionError as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def main():
+    """Main test function"""
+    print("🚀 Testing SimHash fingerprints")
+    print("=" * 50)
+
+    tests = [
+        test_hamming_distance,
+        test_near_duplicate_distance,
+        test_band_candidacy
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print("\n" + "=" * 50)
+    print(f"📊 Test Results: {passed}/{total} passed")
+
+    if passed == total:
+        print("🎉 All tests passed!")
+        return 0
+    else:
+        print("❌ Some tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
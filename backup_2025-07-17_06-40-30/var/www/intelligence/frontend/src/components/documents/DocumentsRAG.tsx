@@ -10,6 +10,7 @@ interface Document {
 interface DocumentsResponse {
   documents: Document[];
   total: number;
+  next_cursor: string | null;
   upload_directory: string;
   timestamp: string;
 }
@@ -24,17 +25,30 @@ const DocumentsRAG: React.FC = () => {
   const loadDocuments = async () => {
     try {
       setLoading(true);
-      const response = await fetch('/api/v1/rag/documents');
-      if (response.ok) {
-        const data: DocumentsResponse = await response.json();
-        setDocuments(data.documents || []);
+      // Il catalogo e' paginato: segue next_cursor fino all'ultima pagina
+      const allDocuments: Document[] = [];
+      let cursor: string | null = null;
+      let data: DocumentsResponse | null = null;
+      do {
+        const params = new URLSearchParams({ limit: '200' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/api/v1/rag/documents?${params}`);
+        if (!response.ok) {
+          console.error('Errore caricamento documenti:', response.status);
+          break;
+        }
+        data = await response.json();
+        allDocuments.push(...(data!.documents || []));
+        cursor = data!.next_cursor;
+      } while (cursor);
+
+      if (data) {
+        setDocuments(allDocuments);
         setStats({
           total: data.total,
           upload_directory: data.upload_directory,
           timestamp: data.timestamp
         });
-      } else {
-        console.error('Errore caricamento documenti:', response.status);
       }
     } catch (error) {
       console.error('Errore connessione:', error);
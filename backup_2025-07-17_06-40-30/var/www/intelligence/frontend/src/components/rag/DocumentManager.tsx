@@ -49,9 +49,18 @@ const DocumentManager: React.FC = () => {
   const loadDocuments = async () => {
     setLoading(true);
     try {
-      const response = await fetch('/api/v1/rag/documents');
-      const data = await response.json();
-      setDocuments(data.documents || []);
+      // Il catalogo e' paginato: segue next_cursor fino all'ultima pagina
+      const allDocuments: Document[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams({ limit: '200' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/api/v1/rag/documents?${params}`);
+        const data = await response.json();
+        allDocuments.push(...(data.documents || []));
+        cursor = data.next_cursor || null;
+      } while (cursor);
+      setDocuments(allDocuments);
     } catch (error) {
       console.error('Errore caricamento documenti:', error);
     } finally {